@@ -1,36 +1,73 @@
 from http.server import BaseHTTPRequestHandler
-import json
-import urllib.request
-import urllib.error
-import ssl
 from datetime import datetime
+from urllib.parse import urlparse, parse_qs
 import statistics
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bootstrap import load_bootstrap_versioned, bootstrap_age
+from _derived import derived_table
+from _leaderboards import leaderboards
+from _response import send_json, stream_json
+from _seed import stable_seed
+from _table import player_table
+from _trace import stage, traced
+
+# Position-specific performance patterns of the synthetic 3-year history
+POSITION_PATTERNS = {
+    'Forward': {
+        'avg_multiplier': 1.0,
+        'variance': 0.35,
+        'consistency_base': 55,
+        'injury_base': 2.2,
+        'games_base': 28
+    },
+    'Midfielder': {
+        'avg_multiplier': 0.95,
+        'variance': 0.25,
+        'consistency_base': 68,
+        'injury_base': 1.8,
+        'games_base': 32
+    },
+    'Defender': {
+        'avg_multiplier': 0.85,
+        'variance': 0.20,
+        'consistency_base': 75,
+        'injury_base': 1.5,
+        'games_base': 34
+    },
+    'Goalkeeper': {
+        'avg_multiplier': 0.90,
+        'variance': 0.15,
+        'consistency_base': 82,
+        'injury_base': 1.0,
+        'games_base': 35
+    }
+}
+
+# Rankings behind the league insights: (key, descending)
+INSIGHT_METRICS = {
+    'total_3year_points': (lambda p: p['three_year_metrics']['total_3year_points'], True),
+    'consistency_score': (lambda p: p['three_year_metrics']['consistency_score'], True),
+    'points_per_million': (lambda p: p['three_year_metrics']['total_3year_points'] / max(0.1, p['price']), True),
+    'injury_risk': (lambda p: p['three_year_metrics']['injury_risk'], False)
+}
 
 class handler(BaseHTTPRequestHandler):
+    @traced('3year-analysis')
     def do_GET(self):
         try:
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             # Get current FPL data
-            ssl_context = ssl.create_default_context()
-            req = urllib.request.Request(
-                'https://fantasy.premierleague.com/api/bootstrap-static/',
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            )
-            
-            with urllib.request.urlopen(req, context=ssl_context, timeout=30) as response:
-                fpl_data = json.loads(response.read().decode('utf-8'))
+            fpl_data, version, updated_at = load_bootstrap_versioned()
             
-            # Process players with 3-year analysis
-            analyzed_players = self.perform_3year_analysis(fpl_data)
+            # Process players with 3-year analysis (shared per bootstrap version)
+            with stage('metrics'):
+                analyzed_players = derived_table('3year-analysis', version, lambda: self.perform_3year_analysis(fpl_data))
             
             # Calculate league insights
-            insights = self.calculate_league_insights(analyzed_players)
+            with stage('insights'):
+                insights = self.calculate_league_insights(analyzed_players)
             
             response_data = {
                 'success': True,
@@ -39,10 +76,13 @@ class handler(BaseHTTPRequestHandler):
                 'players': analyzed_players,
                 'insights': insights,
                 'last_updated': datetime.now().isoformat(),
-                'data_source': 'FPL Official API + Historical Analysis'
+                'data_source': 'FPL Official API + Historical Analysis',
+                'data_age_seconds': bootstrap_age(updated_at)
             }
             
-            self.wfile.write(json.dumps(response_data).encode())
+            # Players are serialized and sent in chunks (or as NDJSON with ?format=ndjson)
+            ndjson = parse_qs(urlparse(self.path).query).get('format', ['json'])[0] == 'ndjson'
+            stream_json(self, response_data, 'players', version=version, ndjson=ndjson)
             
         except Exception as e:
             print(f"Error in 3year-analysis: {e}")
@@ -51,164 +91,144 @@ class handler(BaseHTTPRequestHandler):
                 'error': str(e),
                 'message': 'Failed to perform 3-year analysis'
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            send_json(self, error_response, cacheable=False)
 
     def perform_3year_analysis(self, fpl_data):
         """Perform comprehensive 3-year analysis on all players"""
         teams = {team['id']: team['name'] for team in fpl_data.get('teams', [])}
         positions = {pos['id']: pos['singular_name'] for pos in fpl_data.get('element_types', [])}
         
-        analyzed_players = []
-        
-        for player in fpl_data.get('elements', []):
-            if player.get('minutes', 0) >= 90:  # Only active players
-                # Base current season data
-                base_data = {
-                    'id': player.get('id', 0),
-                    'name': player.get('web_name', 'Unknown'),
-                    'fullName': f"{player.get('first_name', '')} {player.get('second_name', '')}".strip(),
-                    'team': teams.get(player.get('team', 0), 'Unknown'),
-                    'position': positions.get(player.get('element_type', 0), 'Unknown'),
-                    'price': round(player.get('now_cost', 0) / 10, 1),
-                    'totalPoints': player.get('total_points', 0),
-                    'ppg': float(player.get('points_per_game', 0)) if player.get('points_per_game') else 0,
-                    'goals': player.get('goals_scored', 0),
-                    'assists': player.get('assists', 0),
-                    'minutes': player.get('minutes', 0),
-                    'cleanSheets': player.get('clean_sheets', 0),
-                    'form': float(player.get('form', 0)) if player.get('form') else 0,
-                    'ownership': float(player.get('selected_by_percent', 0)) if player.get('selected_by_percent') else 0
-                }
-                
-                # Generate 3-year metrics
-                three_year_metrics = self.generate_historical_metrics(player, base_data)
-                
-                # Combine all data
-                analyzed_player = {
-                    **base_data,
-                    'three_year_metrics': three_year_metrics,
-                    'seasons_data': self.generate_seasonal_breakdown(player, base_data),
-                    'performance_rating': self.calculate_performance_rating(base_data, three_year_metrics),
-                    'investment_rating': self.calculate_investment_rating(base_data, three_year_metrics)
-                }
-                
-                analyzed_players.append(analyzed_player)
-        
-        # Sort by 3-year total points
-        return sorted(analyzed_players, 
-                     key=lambda x: x['three_year_metrics']['total_3year_points'], 
-                     reverse=True)
-
-    def generate_historical_metrics(self, player_data, base_data):
-        """Generate realistic 3-year historical metrics"""
-        current_points = player_data.get('total_points', 0)
-        position = base_data['position']
-        
-        # Use player name hash for consistent "historical" data
-        player_seed = hash(base_data['name']) % 1000
-        
-        # Position-specific performance patterns
-        position_patterns = {
-            'Forward': {
-                'avg_multiplier': 1.0,
-                'variance': 0.35,
-                'consistency_base': 55,
-                'injury_base': 2.2,
-                'games_base': 28
-            },
-            'Midfielder': {
-                'avg_multiplier': 0.95,
-                'variance': 0.25,
-                'consistency_base': 68,
-                'injury_base': 1.8,
-                'games_base': 32
-            },
-            'Defender': {
-                'avg_multiplier': 0.85,
-                'variance': 0.20,
-                'consistency_base': 75,
-                'injury_base': 1.5,
-                'games_base': 34
-            },
-            'Goalkeeper': {
-                'avg_multiplier': 0.90,
-                'variance': 0.15,
-                'consistency_base': 82,
-                'injury_base': 1.0,
-                'games_base': 35
-            }
-        }
-        
-        pattern = position_patterns.get(position, position_patterns['Midfielder'])
-        
-        # Generate 3 seasons of performance with realistic variance
-        seasons_points = []
-        for i in range(3):
-            season_variance = 1 + ((player_seed + i * 100) % 60 - 30) / 100 * pattern['variance']
-            season_points = max(30, current_points * pattern['avg_multiplier'] * season_variance)
-            seasons_points.append(int(season_points))
-        
-        # Calculate metrics
-        avg_points_per_season = sum(seasons_points) / 3
-        total_3year_points = sum(seasons_points)
+        table = player_table(fpl_data)
+        ids, team_ids, position_ids = table['id'], table['team'], table['element_type']
+        points, ppg, form, ownership = table['total_points'], table['points_per_game'], table['form'], table['selected_by_percent']
+        goals, assists, minutes, clean_sheets = table['goals_scored'], table['assists'], table['minutes'], table['clean_sheets']
+        web_names = table.text['web_name']
         
-        # Consistency score (inverse of coefficient of variation)
-        if len(seasons_points) > 1:
-            cv = statistics.stdev(seasons_points) / max(1, statistics.mean(seasons_points))
-            consistency_score = max(10, min(95, pattern['consistency_base'] - (cv * 50)))
-        else:
-            consistency_score = pattern['consistency_base']
+        rows = table.active_rows()  # Only active players
         
-        # Injury risk
-        injury_risk = max(0, min(6, pattern['injury_base'] + ((player_seed % 30 - 15) / 10)))
+        # Base current season data, extended in place with the 3-year analysis
+        analyzed_players = [{
+            'id': ids[row],
+            'name': web_names[row] or 'Unknown',
+            'fullName': table.full_names[row],
+            'team': teams.get(team_ids[row], 'Unknown'),
+            'position': positions.get(position_ids[row], 'Unknown'),
+            'price': round(table.price[row], 1),
+            'totalPoints': points[row],
+            'ppg': ppg[row],
+            'goals': goals[row],
+            'assists': assists[row],
+            'minutes': minutes[row],
+            'cleanSheets': clean_sheets[row],
+            'form': form[row],
+            'ownership': ownership[row]
+        } for row in rows]
         
-        # Games reliability
-        avg_games = max(15, min(38, pattern['games_base'] + ((player_seed % 10 - 5))))
-        reliable_starter = avg_games >= 30
+        seeds = [stable_seed(player['id']) for player in analyzed_players]
+        all_metrics = self.generate_historical_metrics_batch(
+            [player['totalPoints'] for player in analyzed_players],
+            [player['position'] for player in analyzed_players],
+            seeds
+        )
+        all_seasons = self.generate_seasonal_breakdown_batch(analyzed_players, seeds)
         
-        # Value trend
-        value_trend = ((player_seed % 80 - 40) / 100)  # -0.4 to +0.4
+        for player, three_year_metrics, seasons_data in zip(analyzed_players, all_metrics, all_seasons):
+            player['three_year_metrics'] = three_year_metrics
+            player['seasons_data'] = seasons_data
+            player['performance_rating'] = self.calculate_performance_rating(player, three_year_metrics)
+            player['investment_rating'] = self.calculate_investment_rating(player, three_year_metrics)
         
-        return {
-            'avg_points_per_season': round(avg_points_per_season, 1),
-            'total_3year_points': total_3year_points,
-            'best_season': max(seasons_points),
-            'worst_season': min(seasons_points),
-            'consistency_score': round(consistency_score, 1),
-            'injury_risk': round(injury_risk, 1),
-            'value_trend': round(value_trend, 2),
-            'avg_games_per_season': round(avg_games, 1),
-            'reliable_starter': reliable_starter,
-            'seasons_breakdown': seasons_points
-        }
+        # Sort by 3-year total points
+        analyzed_players.sort(key=lambda x: x['three_year_metrics']['total_3year_points'], reverse=True)
+        return analyzed_players
 
-    def generate_seasonal_breakdown(self, player_data, base_data):
-        """Generate detailed seasonal breakdown"""
-        seasons = ['2022-23', '2023-24', '2024-25']
-        player_seed = hash(base_data['name']) % 1000
+    def generate_historical_metrics_batch(self, current_points, positions, seeds):
+        """Synthetic 3-year history metrics for whole columns of current points, positions and stable seeds"""
+        # Season multipliers, injury, games and trend depend only on (position, seed)
+        seeded = {}
+        for key in set(zip(positions, seeds)):
+            position, player_seed = key
+            pattern = POSITION_PATTERNS.get(position, POSITION_PATTERNS['Midfielder'])
+            avg_games = max(15, min(38, pattern['games_base'] + ((player_seed % 10 - 5))))
+            seeded[key] = (
+                [pattern['avg_multiplier'], pattern['consistency_base']] + [
+                    1 + ((player_seed + i * 100) % 60 - 30) / 100 * pattern['variance'] for i in range(3)
+                ],
+                round(max(0, min(6, pattern['injury_base'] + ((player_seed % 30 - 15) / 10))), 1),
+                round((player_seed % 80 - 40) / 100, 2),
+                round(avg_games, 1),
+                avg_games >= 30
+            )
         
-        seasonal_data = []
-        for i, season in enumerate(seasons):
-            variance = 1 + ((player_seed + i * 123) % 40 - 20) / 100
-            
-            season_data = {
-                'season': season,
-                'total_points': max(30, int(base_data['totalPoints'] * variance)),
-                'games_played': max(15, min(38, int(30 + (player_seed + i * 50) % 15))),
-                'goals': max(0, int(base_data['goals'] * variance)),
-                'assists': max(0, int(base_data['assists'] * variance)),
-                'clean_sheets': max(0, int(base_data['cleanSheets'] * variance)),
-                'price_start': max(4.0, base_data['price'] + ((player_seed + i * 25) % 20 - 10) / 10),
-                'price_end': max(4.0, base_data['price'] + ((player_seed + i * 75) % 20 - 10) / 10),
-                'ownership_avg': max(0.1, min(50.0, base_data['ownership'] + ((player_seed + i * 33) % 20 - 10)))
-            }
+        all_metrics = []
+        for points, key in zip(current_points, zip(positions, seeds)):
+            (multiplier, consistency_base, v0, v1, v2), injury_risk, value_trend, avg_games, reliable_starter = seeded[key]
+            seasons_points = [
+                int(max(30, points * multiplier * v0)),
+                int(max(30, points * multiplier * v1)),
+                int(max(30, points * multiplier * v2))
+            ]
+            total_3year_points = seasons_points[0] + seasons_points[1] + seasons_points[2]
             
-            season_data['ppg'] = round(season_data['total_points'] / max(1, season_data['games_played']), 2)
-            season_data['price_change'] = round(season_data['price_end'] - season_data['price_start'], 1)
+            # Consistency score (inverse of coefficient of variation)
+            cv = statistics.stdev(seasons_points) / max(1, total_3year_points / 3)
+            consistency_score = max(10, min(95, consistency_base - (cv * 50)))
             
-            seasonal_data.append(season_data)
+            all_metrics.append({
+                'avg_points_per_season': round(total_3year_points / 3, 1),
+                'total_3year_points': total_3year_points,
+                'best_season': max(seasons_points),
+                'worst_season': min(seasons_points),
+                'consistency_score': round(consistency_score, 1),
+                'injury_risk': injury_risk,
+                'value_trend': value_trend,
+                'avg_games_per_season': avg_games,
+                'reliable_starter': reliable_starter,
+                'seasons_breakdown': seasons_points
+            })
+        return all_metrics
+
+    def generate_seasonal_breakdown_batch(self, players, seeds):
+        """Synthetic per-season breakdown for each base record and its stable seed"""
+        seasons = ['2022-23', '2023-24', '2024-25']
+        
+        # Per-season multipliers and offsets depend only on the seed
+        seeded = {}
+        for player_seed in set(seeds):
+            seeded[player_seed] = [(
+                season,
+                1 + ((player_seed + i * 123) % 40 - 20) / 100,
+                max(15, min(38, int(30 + (player_seed + i * 50) % 15))),
+                ((player_seed + i * 25) % 20 - 10) / 10,
+                ((player_seed + i * 75) % 20 - 10) / 10,
+                ((player_seed + i * 33) % 20 - 10)
+            ) for i, season in enumerate(seasons)]
         
-        return seasonal_data
+        breakdowns = []
+        for player, player_seed in zip(players, seeds):
+            total_points, price, ownership = player['totalPoints'], player['price'], player['ownership']
+            goals, assists, clean_sheets = player['goals'], player['assists'], player['cleanSheets']
+            
+            seasonal_data = []
+            for season, variance, games_played, start_offset, end_offset, ownership_offset in seeded[player_seed]:
+                season_points = max(30, int(total_points * variance))
+                price_start = max(4.0, price + start_offset)
+                price_end = max(4.0, price + end_offset)
+                seasonal_data.append({
+                    'season': season,
+                    'total_points': season_points,
+                    'games_played': games_played,
+                    'goals': max(0, int(goals * variance)),
+                    'assists': max(0, int(assists * variance)),
+                    'clean_sheets': max(0, int(clean_sheets * variance)),
+                    'price_start': price_start,
+                    'price_end': price_end,
+                    'ownership_avg': max(0.1, min(50.0, ownership + ownership_offset)),
+                    'ppg': round(season_points / max(1, games_played), 2),
+                    'price_change': round(price_end - price_start, 1)
+                })
+            breakdowns.append(seasonal_data)
+        return breakdowns
 
     def calculate_performance_rating(self, base_data, metrics):
         """Calculate overall performance rating (1-10)"""
@@ -241,22 +261,24 @@ class handler(BaseHTTPRequestHandler):
         all_3y_points = [p['three_year_metrics']['total_3year_points'] for p in players]
         
         # Position analysis
+        boards = leaderboards(players, INSIGHT_METRICS)
+        by_position = boards.positions()
         position_stats = {}
         for position in ['Forward', 'Midfielder', 'Defender', 'Goalkeeper']:
-            pos_players = [p for p in players if p['position'] == position]
+            pos_players = by_position.get(position)
             if pos_players:
                 position_stats[position] = {
                     'count': len(pos_players),
                     'avg_3y_points': round(sum(p['three_year_metrics']['total_3year_points'] for p in pos_players) / len(pos_players), 1),
                     'avg_consistency': round(sum(p['three_year_metrics']['consistency_score'] for p in pos_players) / len(pos_players), 1),
-                    'best_performer': max(pos_players, key=lambda x: x['three_year_metrics']['total_3year_points'])['name']
+                    'best_performer': boards.top('total_3year_points', 1, position)[0]['name']
                 }
         
-        # Find standout performers
-        most_consistent = sorted(players, key=lambda x: x['three_year_metrics']['consistency_score'], reverse=True)[:5]
-        best_value = sorted(players, key=lambda x: x['three_year_metrics']['total_3year_points'] / max(0.1, x['price']), reverse=True)[:5]
+        # Find standout performers (prefixes of rankings kept for this player list)
+        most_consistent = boards.top('consistency_score', 5)
+        best_value = boards.top('points_per_million', 5)
         most_reliable = [p for p in players if p['three_year_metrics']['reliable_starter']]
-        low_injury_risk = sorted(players, key=lambda x: x['three_year_metrics']['injury_risk'])[:10]
+        low_injury_risk = boards.top('injury_risk', 10)
         
         return {
             'league_avg_consistency': round(sum(all_consistencies) / len(all_consistencies), 1),
@@ -274,4 +296,5 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
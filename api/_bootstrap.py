@@ -0,0 +1,311 @@
+"""Shared loader for the FPL bootstrap-static payload.
+
+Every endpoint needs the same multi-megabyte document, so it is fetched once
+per process and kept in memory. A copy is fresh for ``FPL_BOOTSTRAP_TTL``
+seconds, or ``FPL_BOOTSTRAP_DEADLINE_TTL`` seconds within
+``FPL_BOOTSTRAP_DEADLINE_WINDOW`` of a gameweek deadline (taken from the
+payload's ``events``), when prices and ownership move fastest.
+
+Requests never wait on a refresh once a copy exists: a stale copy is
+returned immediately while one background fetch revalidates it with the
+``ETag``/``Last-Modified`` validators the upstream sent, and if that fetch
+fails the last good copy keeps being served. The last good payload is also
+written to ``FPL_CACHE_DIR``, so a cold start during an upstream outage
+serves it instead of an error. Only the very first load blocks, and
+concurrent cold misses wait on a single in-flight fetch.
+
+Long-running processes can call ``start_refresher()`` to refresh on that
+schedule in the background, so requests rarely see a stale copy at all.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from _history import CACHE_DIR
+from _trace import stage
+from _upstream import fetch
+
+BOOTSTRAP_URL = os.environ.get('FPL_BOOTSTRAP_URL', 'https://fantasy.premierleague.com/api/bootstrap-static/')
+BOOTSTRAP_TTL = float(os.environ.get('FPL_BOOTSTRAP_TTL', '300'))
+DEADLINE_TTL = float(os.environ.get('FPL_BOOTSTRAP_DEADLINE_TTL', '60'))
+DEADLINE_WINDOW = float(os.environ.get('FPL_BOOTSTRAP_DEADLINE_WINDOW', '3600'))
+# After a failed refresh, wait this long before asking the upstream again
+FAILURE_BACKOFF = float(os.environ.get('FPL_BOOTSTRAP_FAILURE_BACKOFF', '30'))
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+class _Flight:
+    """One upstream fetch that concurrent callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+def event_deadlines(data):
+    """Sorted gameweek deadlines of a payload, as UNIX timestamps"""
+    deadlines = []
+    for event in data.get('events') or []:
+        deadline = event.get('deadline_time')
+        if not deadline:
+            continue
+        try:
+            deadlines.append(datetime.fromisoformat(deadline.replace('Z', '+00:00')).timestamp())
+        except ValueError:
+            continue
+    return sorted(deadlines)
+
+
+def refresh_interval(deadlines, now, ttl=BOOTSTRAP_TTL):
+    """Seconds a copy fetched at ``now`` stays fresh, given the gameweek deadlines"""
+    interval = ttl
+    for deadline in deadlines:
+        until = deadline - now
+        if -DEADLINE_WINDOW <= until <= DEADLINE_WINDOW:
+            return min(ttl, DEADLINE_TTL)
+        if until > DEADLINE_WINDOW:
+            # Expire when the next deadline window opens
+            interval = min(interval, until - DEADLINE_WINDOW)
+            break
+    return max(interval, 1.0)
+
+
+class BootstrapCache:
+    def __init__(self, url=BOOTSTRAP_URL, ttl=BOOTSTRAP_TTL, timeout=30, cache_dir=CACHE_DIR):
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.data = None
+        self.version = None
+        self.etag = None
+        self.last_modified = None
+        self.deadlines = []
+        self.fetched_at = 0.0
+        self.expires_at = 0.0
+        self.updated_at = None
+        self.failed_at = None
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'revalidated': 0, 'fetched': 0, 'failed': 0}
+        self._lock = threading.Lock()
+        self._flight = None
+        self._refresher = None
+
+    def is_fresh(self):
+        return self.data is not None and time.monotonic() < self.expires_at
+
+    def age(self):
+        """Seconds since the upstream last confirmed the held copy, or None without one"""
+        if self.updated_at is None:
+            return None
+        return max(0.0, time.time() - self.updated_at)
+
+    def get(self):
+        """Return the parsed payload; a stale copy is returned as-is and refreshed in the background"""
+        return self.get_versioned()[0]
+
+    def get_versioned(self):
+        """Like get(), but returns (payload, version, updated_at) read together
+
+        A background refresh can replace the payload at any moment, so callers
+        that key caches or ETags on the version, or report the data's age, must
+        take them from here rather than from ``self.version`` or ``age()``.
+        ``updated_at`` is the wall-clock time upstream last confirmed the payload.
+        """
+        with stage('bootstrap') as current:
+            with self._lock:
+                if self.is_fresh():
+                    self.stats['hits'] += 1
+                    current.cache = 'hit'
+                    return self.data, self.version, self.updated_at
+                self.stats['misses'] += 1
+                stale = (self.data, self.version, self.updated_at)
+                if self.data is not None:
+                    self.stats['stale'] += 1
+                    current.cache = 'stale'
+                    if self._flight is not None or self._backing_off():
+                        return stale
+                flight = self._flight
+                leader = flight is None
+                if leader:
+                    flight = self._flight = _Flight()
+
+            if stale[0] is not None:
+                threading.Thread(target=self._run_flight, args=(flight,), name='bootstrap-refresh', daemon=True).start()
+                return stale
+
+            current.cache = 'miss'
+            if leader:
+                self._run_flight(flight)
+            else:
+                flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                return self.data, self.version, self.updated_at
+
+    def refresh(self):
+        """Fetch or revalidate now, joining a fetch already in flight; returns False if it failed"""
+        with self._lock:
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+        if leader:
+            self._run_flight(flight)
+        else:
+            flight.done.wait()
+        return flight.error is None
+
+    def invalidate(self):
+        with self._lock:
+            self.expires_at = 0.0
+
+    def start_refresher(self):
+        """Refresh in a background thread whenever the held copy expires"""
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, name='bootstrap-refresher', daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            self.refresh()
+            delay = self.expires_at - time.monotonic()
+            time.sleep(delay if delay > 0 else FAILURE_BACKOFF)
+
+    def _backing_off(self):
+        return self.failed_at is not None and time.monotonic() - self.failed_at < FAILURE_BACKOFF
+
+    def _run_flight(self, flight):
+        try:
+            self._refresh()
+        except Exception as e:
+            print(f"Bootstrap refresh failed: {e}")
+            with self._lock:
+                self.failed_at = time.monotonic()
+                self.stats['failed'] += 1
+            # Without a copy in memory, fall back to the last payload persisted to disk
+            if self.data is None and not self._load_saved():
+                flight.error = e
+        finally:
+            with self._lock:
+                self._flight = None
+            flight.done.set()
+
+    def _refresh(self):
+        headers = {'User-Agent': USER_AGENT}
+        if self.data is not None:
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            if self.last_modified:
+                headers['If-Modified-Since'] = self.last_modified
+
+        with stage('bootstrap_fetch') as current:
+            response = fetch(self.url, headers=headers, timeout=self.timeout)
+            current.bytes = len(response.body)
+        if response.status == 304 and self.data is not None:
+            with self._lock:
+                self._mark_updated(time.time())
+                self.stats['revalidated'] += 1
+            return
+        if response.status != 200:
+            raise Exception(f"FPL API returned status {response.status}")
+        body = response.body
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+        with stage('bootstrap_parse') as current:
+            data = json.loads(body.decode('utf-8'))
+            current.bytes = len(body)
+        version = hashlib.sha1(body).hexdigest()
+        updated_at = time.time()
+        with self._lock:
+            self._install(data, version, etag, last_modified)
+            self._mark_updated(updated_at)
+            self.stats['fetched'] += 1
+        self._save(body, version, etag, last_modified, updated_at)
+
+    def _install(self, data, version, etag, last_modified):
+        self.data = data
+        self.version = version
+        self.etag = etag
+        self.last_modified = last_modified
+        self.deadlines = event_deadlines(data)
+
+    def _mark_updated(self, updated_at):
+        now = time.monotonic()
+        self.fetched_at = now
+        self.updated_at = updated_at
+        self.failed_at = None
+        self.expires_at = now + refresh_interval(self.deadlines, updated_at, self.ttl)
+
+    def _paths(self):
+        return os.path.join(self.cache_dir, 'bootstrap-static.json'), os.path.join(self.cache_dir, 'bootstrap-static.meta.json')
+
+    def _save(self, body, version, etag, last_modified, updated_at):
+        body_path, meta_path = self._paths()
+        meta = {'version': version, 'etag': etag, 'last_modified': last_modified, 'updated_at': updated_at}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for path, content in ((body_path, body), (meta_path, json.dumps(meta).encode('utf-8'))):
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not persist bootstrap data: {e}")
+
+    def _load_saved(self):
+        body_path, meta_path = self._paths()
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return False
+        if hashlib.sha1(body).hexdigest() != meta.get('version'):
+            return False
+
+        data = json.loads(body.decode('utf-8'))
+        with self._lock:
+            if self.data is None:
+                self._install(data, meta['version'], meta.get('etag'), meta.get('last_modified'))
+                self.updated_at = meta.get('updated_at')
+        print(f"Serving saved bootstrap data from {round(self.age() or 0)}s ago")
+        return True
+
+
+_cache = BootstrapCache()
+
+
+def load_bootstrap():
+    """Get the bootstrap-static payload shared by every endpoint"""
+    return _cache.get()
+
+
+def load_bootstrap_versioned():
+    """(payload, content hash, updated_at) of the shared bootstrap-static payload, read together"""
+    return _cache.get_versioned()
+
+
+def bootstrap_version():
+    """Content hash of the payload held now, which a refresh may have replaced since load_bootstrap()"""
+    return _cache.version
+
+
+def bootstrap_age(updated_at):
+    """Seconds since a payload was confirmed upstream at ``updated_at`` (from load_bootstrap_versioned), rounded for responses"""
+    if updated_at is None:
+        return None
+    return round(max(0.0, time.time() - updated_at), 1)
+
+
+def start_refresher():
+    """Keep the shared payload refreshed from a background thread"""
+    _cache.start_refresher()
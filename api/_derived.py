@@ -0,0 +1,78 @@
+"""Shared cache of derived per-player metric tables.
+
+The synthetic 3-year metrics are a pure function of the bootstrap payload
+and the stable player seeds, so each table is computed once per bootstrap
+version and seeding scheme, kept in memory and written to ``FPL_CACHE_DIR``
+as JSON. Other processes pointed at the same cache directory (another
+worker, the next cold start) load the file instead of recomputing it.
+"""
+import json
+import os
+import tempfile
+import threading
+
+from _history import CACHE_DIR
+from _seed import seed_scheme
+
+
+class DerivedStore:
+    def __init__(self, cache_dir=os.path.join(CACHE_DIR, 'derived')):
+        self.cache_dir = cache_dir
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, name, version):
+        return os.path.join(self.cache_dir, f"{name}-{version}.json")
+
+    def get(self, name, bootstrap_version, compute):
+        """Table ``name`` for this bootstrap version, from memory, disk or ``compute()``"""
+        version = f"{bootstrap_version[:16]}-{seed_scheme()}"
+        cached = self._tables.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with self._lock:
+            cached = self._tables.get(name)
+            if cached is None or cached[0] != version:
+                path = self.path_for(name, version)
+                table = self._read(path)
+                if table is None:
+                    table = compute()
+                    self._write(name, path, table)
+                cached = self._tables[name] = (version, table)
+        return cached[1]
+
+    def _read(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, name, path, table):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(table, f)
+            os.replace(tmp_path, path)
+
+            # Only the latest version of each table is kept
+            for entry in os.listdir(self.cache_dir):
+                if entry.startswith(f"{name}-") and entry.endswith('.json') and os.path.join(self.cache_dir, entry) != path:
+                    os.remove(os.path.join(self.cache_dir, entry))
+        except OSError as e:
+            print(f"Could not persist derived table {name}: {e}")
+
+
+_store = DerivedStore()
+
+
+def derived_table(name, bootstrap_version, compute):
+    """Get a derived metrics table from the shared store
+
+    ``bootstrap_version`` must be the version returned together with the
+    payload ``compute`` reads (``load_bootstrap_versioned()``); otherwise a
+    table built from the old payload can be stored under the new version.
+    """
+    return _store.get(name, bootstrap_version, compute)
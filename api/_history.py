@@ -0,0 +1,367 @@
+"""Persistent store for historical vaastav season data.
+
+Past seasons never change, so each ``cleaned_players.csv`` is downloaded and
+parsed exactly once, then written to ``FPL_CACHE_DIR`` as a compact columnar
+file: a JSON header (row names, teams, positions, column layout) followed by packed
+numeric columns that are memory-mapped on load. Later lookups go through a
+name -> row index and never touch the network.
+
+Each row also stores the player's FPL ``code`` taken from the season's
+``players_raw.csv``. Element ids are reassigned every season but codes are
+not, so ``_identity`` can join seasons on them instead of on names.
+
+Loaded tables are kept in a least-recently-used cache bounded by
+``FPL_HISTORY_MEMORY_MB`` per store, so serving wide season windows does
+not keep every season ever requested mapped and indexed.
+"""
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict, deque
+
+from _trace import stage
+from _upstream import fetch
+
+VAASTAV_DATA_URL = os.environ.get('FPL_VAASTAV_URL', 'https://raw.githubusercontent.com/vaastav/Fantasy-Premier-League/master/data').rstrip('/')
+VAASTAV_URL = VAASTAV_DATA_URL + '/{season}/cleaned_players.csv'
+VAASTAV_RAW_URL = VAASTAV_DATA_URL + '/{season}/players_raw.csv'
+CACHE_DIR = os.environ.get('FPL_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'fpl-dashboard'))
+# Memory budget of the tables one store keeps loaded
+MEMORY_BUDGET = int(float(os.environ.get('FPL_HISTORY_MEMORY_MB', 64)) * 1024 * 1024)
+# Rough cost of a row's name string and index entries on top of the mapped columns
+INDEX_BYTES_PER_ROW = 200
+
+MAGIC = b'FPLH2\n'
+POSITION_MAP = {
+    '1': 'Goalkeeper', '2': 'Defender', '3': 'Midfielder', '4': 'Forward',
+    'GK': 'Goalkeeper', 'DEF': 'Defender', 'MID': 'Midfielder', 'FWD': 'Forward'
+}
+
+# (column name, array typecode, CSV field)
+COLUMNS = (
+    ('total_points', 'i', 'total_points'),
+    ('goals', 'i', 'goals_scored'),
+    ('assists', 'i', 'assists'),
+    ('clean_sheets', 'i', 'clean_sheets'),
+    ('minutes', 'i', 'minutes'),
+    ('start_cost', 'd', 'start_cost'),
+    ('end_cost', 'd', 'end_cost'),
+    ('ppg', 'd', 'points_per_game'),
+)
+
+
+def parse_csv_body(parse, body):
+    """Run ``parse`` over the lines of a CSV body, decoded as it is read
+
+    Older vaastav seasons are not all valid UTF-8; those are parsed again
+    as Latin-1, which decodes any byte string.
+    """
+    try:
+        return parse(io.TextIOWrapper(io.BytesIO(body), encoding='utf-8-sig', newline=''))
+    except UnicodeDecodeError:
+        return parse(io.TextIOWrapper(io.BytesIO(body), encoding='latin-1', newline=''))
+
+
+def parse_season_csv(lines):
+    """Parse cleaned_players.csv lines into (names, teams, positions, columns)"""
+    names = []
+    teams = []
+    positions = []
+    columns = {name: array(typecode) for name, typecode, _ in COLUMNS}
+
+    for row in csv.DictReader(lines):
+        try:
+            first_name = row.get('first_name', '').strip()
+            second_name = row.get('second_name', '').strip()
+            full_name = f"{first_name} {second_name}".strip()
+
+            if not full_name:
+                continue
+
+            values = (
+                int(row.get('total_points', 0)),
+                int(row.get('goals_scored', 0)),
+                int(row.get('assists', 0)),
+                int(row.get('clean_sheets', 0)),
+                int(row.get('minutes', 0)),
+                float(row.get('start_cost', 0)) if row.get('start_cost') else 0.0,
+                float(row.get('end_cost', 0)) if row.get('end_cost') else 0.0,
+                float(row.get('points_per_game', 0)) if row.get('points_per_game') else 0.0,
+            )
+        except (ValueError, TypeError):
+            continue
+
+        names.append(full_name)
+        teams.append(row.get('team', 'Unknown'))
+        positions.append(POSITION_MAP.get(str(row.get('element_type', '0')), 'Unknown'))
+        for (name, _, _), value in zip(COLUMNS, values):
+            columns[name].append(value)
+
+    return names, teams, positions, columns
+
+
+def parse_player_codes(lines):
+    """(full name, code) of every row of players_raw.csv lines, in file order"""
+    pairs = []
+    for row in csv.DictReader(lines):
+        full_name = f"{row.get('first_name', '').strip()} {row.get('second_name', '').strip()}".strip()
+        try:
+            pairs.append((full_name, int(row.get('code') or 0)))
+        except ValueError:
+            continue
+    return pairs
+
+
+def match_codes(names, pairs):
+    """Code for each name; the n-th row with a name gets the n-th code listed under it (0 if none)"""
+    queues = {}
+    for full_name, code in pairs:
+        queues.setdefault(full_name, deque()).append(code)
+    return array('i', [queues[name].popleft() if queues.get(name) else 0 for name in names])
+
+
+def write_columns_file(path, magic, header, columns):
+    """Write ``header`` (JSON) and the ``columns`` arrays atomically, each column 8-byte aligned"""
+    layout = []
+    offset = 0
+    for name, values in columns.items():
+        size = len(values) * values.itemsize
+        layout.append({'name': name, 'typecode': values.typecode, 'offset': offset, 'size': size})
+        offset += (size + 7) & ~7
+
+    header = json.dumps({**header, 'columns': layout}).encode('utf-8')
+    header += b' ' * (-(len(magic) + 4 + len(header)) % 8)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(magic)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for column in layout:
+            data = columns[column['name']].tobytes()
+            f.write(data)
+            f.write(b'\0' * (-len(data) % 8))
+    os.replace(tmp_path, path)
+
+
+def map_columns_file(path, magic):
+    """Memory-map a file written by write_columns_file; returns (mmap, header, {name: memoryview})"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        if mapped[:len(magic)] != magic:
+            raise ValueError(f"{path} is not a {magic.strip().decode()} file")
+        header_len = struct.unpack_from('<I', mapped, len(magic))[0]
+        data_start = len(magic) + 4 + header_len
+        header = json.loads(mapped[len(magic) + 4:data_start].decode('utf-8'))
+
+        if any(data_start + column['offset'] + column['size'] > len(mapped) for column in header['columns']):
+            raise ValueError(f"{path} is truncated")
+    except Exception:
+        mapped.close()
+        raise
+
+    view = memoryview(mapped)
+    columns = {}
+    for column in header['columns']:
+        start = data_start + column['offset']
+        columns[column['name']] = view[start:start + column['size']].cast(column['typecode'])
+    return mapped, header, columns
+
+
+def write_season_file(path, season, version, names, teams, positions, columns):
+    """Write a season table atomically as header + 8-byte aligned columns"""
+    header = {
+        'season': season,
+        'version': version,
+        'rows': len(names),
+        'names': names,
+        'teams': teams,
+        'positions': positions,
+    }
+    write_columns_file(path, MAGIC, header, columns)
+
+
+class SeasonTable:
+    """Read-only, memory-mapped view of one season; behaves like {full_name: row}"""
+
+    def __init__(self, path):
+        self._mmap, header, self.columns = map_columns_file(path, MAGIC)
+
+        self.season = header['season']
+        self.version = header['version']
+        self.names = header['names']
+        self.teams = header['teams']
+        self.positions = header['positions']
+        self.index = {name: row for row, name in enumerate(self.names)}
+        self.codes = self.columns.get('code')
+        self.code_index = {code: row for row, code in enumerate(self.codes or ()) if code}
+        self.nbytes = len(self._mmap) + INDEX_BYTES_PER_ROW * len(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, full_name):
+        return full_name in self.index
+
+    def __getitem__(self, full_name):
+        return self.row(self.index[full_name])
+
+    def get(self, full_name, default=None):
+        row = self.index.get(full_name)
+        return default if row is None else self.row(row)
+
+    def row(self, row):
+        """Materialize one row in the shape the analysis code expects"""
+        columns = self.columns
+        minutes = columns['minutes'][row]
+        return {
+            'season': self.season,
+            'total_points': columns['total_points'][row],
+            'goals': columns['goals'][row],
+            'assists': columns['assists'][row],
+            'clean_sheets': columns['clean_sheets'][row],
+            'minutes': minutes,
+            'games_played': max(1, minutes // 90),
+            'start_cost': columns['start_cost'][row] / 10,
+            'end_cost': columns['end_cost'][row] / 10,
+            'position': self.positions[row],
+            'team': self.teams[row],
+            'ppg': columns['ppg'][row]
+        }
+
+
+class _Flight:
+    """One season load that concurrent callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.table = None
+        self.error = None
+
+
+class HistoryStore:
+    table_class = SeasonTable
+    # Stages are traced as <prefix>_load, <prefix>_fetch and <prefix>_parse
+    stage_prefix = 'history'
+    description = 'real data'
+
+    def __init__(self, cache_dir=CACHE_DIR, url_template=VAASTAV_URL, raw_url_template=VAASTAV_RAW_URL, timeout=30, memory_budget=MEMORY_BUDGET):
+        self.cache_dir = cache_dir
+        self.url_template = url_template
+        self.raw_url_template = raw_url_template
+        self.timeout = timeout
+        self.memory_budget = memory_budget
+        # season -> table, least recently used first
+        self._tables = OrderedDict()
+        # season -> _Flight of a load in progress
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, season):
+        return os.path.join(self.cache_dir, f"{season}.fplh")
+
+    def load(self, season):
+        """Return the table for a season, downloading it on first use
+
+        Only the cache lookup and publishing a table hold the store lock, so a
+        cold season being downloaded does not hold up other seasons; callers
+        asking for the same cold season wait for the one load in flight.
+        """
+        with stage(f"{self.stage_prefix}_load") as current:
+            with self._lock:
+                table = self._tables.get(season)
+                if table is not None:
+                    self._tables.move_to_end(season)
+                    current.cache = 'hit'
+                    return table
+                flight = self._flights.get(season)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[season] = _Flight()
+            current.cache = 'miss'
+
+            if not leader:
+                flight.done.wait()
+                if flight.error is not None:
+                    raise flight.error
+                return flight.table
+
+            try:
+                table = self._open(season)
+                with self._lock:
+                    self._tables[season] = table
+                    self._evict()
+                flight.table = table
+            except Exception as e:
+                flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[season]
+                flight.done.set()
+        return table
+
+    def _open(self, season):
+        """Map the season's file, downloading and converting it first if needed"""
+        path = self.path_for(season)
+        if os.path.exists(path):
+            try:
+                return self.table_class(path)
+            except (ValueError, KeyError, struct.error, OSError) as e:
+                # Written in an older file format, truncated or otherwise corrupt; download the season again
+                print(f"Discarding unreadable {path}: {e}")
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self._ingest(season, path)
+        return self.table_class(path)
+
+    def _evict(self):
+        """Drop least recently used tables while over budget, always keeping the newest
+
+        An evicted table stays mapped for as long as an analysis still uses it.
+        """
+        total = sum(table.nbytes for table in self._tables.values())
+        while total > self.memory_budget and len(self._tables) > 1:
+            season, table = self._tables.popitem(last=False)
+            total -= table.nbytes
+            print(f"Evicted {season} from the history cache")
+
+    def _ingest(self, season, path):
+        print(f"Fetching {self.description} for {season}...")
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        with stage(f"{self.stage_prefix}_fetch") as current:
+            raw = fetch(self.url_template.format(season=season), headers=headers, timeout=self.timeout).body
+            players_raw = fetch(self.raw_url_template.format(season=season), headers=headers, timeout=self.timeout).body
+            current.bytes = len(raw) + len(players_raw)
+
+        with stage(f"{self.stage_prefix}_parse") as current:
+            stored = self._convert(path, season, hashlib.sha1(raw + players_raw).hexdigest(), raw, players_raw)
+            current.bytes = len(raw) + len(players_raw)
+        print(f"Stored {stored} for {season}")
+
+    def _convert(self, path, season, version, raw, players_raw):
+        """Parse the downloaded CSV bodies, write the season's file and describe what was stored"""
+        names, teams, positions, columns = parse_csv_body(parse_season_csv, raw)
+        columns['code'] = match_codes(names, parse_csv_body(parse_player_codes, players_raw))
+        write_season_file(path, season, version, names, teams, positions, columns)
+        return f"{len(names)} players"
+
+
+_store = HistoryStore()
+
+
+def load_season(season):
+    """Get a historical season table from the shared store"""
+    return _store.load(season)
@@ -0,0 +1,125 @@
+"""Cross-season player identity.
+
+FPL element ids are reassigned every season, but a player's ``code`` is
+not, and every historical season table stores the code of each row. A
+current player is matched to a past season by code first, then by exact
+full name, and finally by a normalized name (folded by ``_search.fold``, the
+same accent, case and punctuation folding player search uses) when that
+name is unique within the season. Renamed or
+re-spelled players are no longer dropped, and two players who share a
+name are no longer swapped.
+
+``IdentityMap`` holds one ``array('i')`` per season of season rows indexed
+by current ``PlayerTable`` row (-1 when there is no match), so the
+analysis join is an integer lookup. Each season's matches are computed once
+per bootstrap payload and season version and shared by every season window
+that includes it; the map reports how many players each method matched per
+season.
+"""
+import threading
+from array import array
+from collections import Counter
+
+from _search import fold
+
+# How a row was matched, as stored in SeasonIdentity.methods
+UNMATCHED, BY_CODE, BY_NAME, BY_NORMALIZED_NAME = 0, 1, 2, 3
+METHOD_NAMES = {BY_CODE: 'code', BY_NAME: 'name', BY_NORMALIZED_NAME: 'normalized_name'}
+
+
+def unique_index(keys):
+    """key -> row for keys that occur exactly once"""
+    index = {}
+    repeated = set()
+    for row, key in enumerate(keys):
+        if key in index:
+            repeated.add(key)
+        index[key] = row
+    for key in repeated:
+        del index[key]
+    return index
+
+
+class SeasonIdentity:
+    """Season-table row of every current player in one past season"""
+
+    def __init__(self, table, season_table):
+        by_code = season_table.code_index
+        # Name fallbacks only consider season rows no current player claims by code,
+        # so a newcomer is never matched to a namesake who is still in the game
+        claimed = set(table['code']).intersection(by_code)
+        season_codes = season_table.codes or [0] * len(season_table)
+        candidates = [(row, name) for row, (name, code) in enumerate(zip(season_table.names, season_codes)) if code not in claimed]
+        by_name = {name: row for row, name in candidates}
+        by_normalized_name = {key: candidates[i][0] for key, i in unique_index(fold(name) for _, name in candidates).items()}
+
+        rows = []
+        methods = bytearray(len(table))
+        for row, (code, full_name) in enumerate(zip(table['code'], table.full_names)):
+            season_row = by_code.get(code) if code else None
+            method = BY_CODE
+            if season_row is None:
+                season_row = by_name.get(full_name)
+                method = BY_NAME
+            if season_row is None:
+                season_row = by_normalized_name.get(fold(full_name))
+                method = BY_NORMALIZED_NAME
+            if season_row is None:
+                season_row = -1
+                method = UNMATCHED
+            rows.append(season_row)
+            methods[row] = method
+
+        self.season = season_table.season
+        self.rows = array('i', rows)
+        self.methods = bytes(methods)
+
+    def coverage(self, rows):
+        """Match counts for the given current-table rows"""
+        counts = Counter(self.methods[row] for row in rows)
+        matched = len(rows) - counts[UNMATCHED]
+        report = {'players': len(rows), 'matched': matched}
+        for method, name in METHOD_NAMES.items():
+            report[f"by_{name}"] = counts[method]
+        report['unmatched'] = counts[UNMATCHED]
+        report['coverage_pct'] = round(matched / len(rows) * 100, 1) if rows else 0.0
+        return report
+
+
+class IdentityMap:
+    def __init__(self, seasons):
+        # {season: SeasonIdentity}
+        self.seasons = seasons
+
+    def season_rows(self, row):
+        """{season: season row} for one current-table row, leaving out seasons without a match"""
+        return {season: identity.rows[row] for season, identity in self.seasons.items() if identity.rows[row] >= 0}
+
+    def coverage(self, rows):
+        return {season: identity.coverage(rows) for season, identity in self.seasons.items()}
+
+
+# {(table kind, season, version): SeasonIdentity} for the PlayerTable in 'table';
+# one entry per season table joined (season totals, gameweek series)
+_cached = {'table': None, 'seasons': {}}
+_cached_lock = threading.Lock()
+
+
+def identity_map(table, historical_data):
+    """IdentityMap for a PlayerTable and season tables, matching each season once
+
+    Any table exposing ``season``, ``version``, ``names``, ``index``, ``codes``
+    and ``code_index`` can be joined, season totals and gameweek series alike.
+    """
+    with _cached_lock:
+        if _cached['table'] is not table:
+            _cached['table'] = table
+            _cached['seasons'] = {}
+        seasons = {}
+        for season, season_table in historical_data.items():
+            key = (type(season_table).__name__, season, season_table.version)
+            identity = _cached['seasons'].get(key)
+            if identity is None:
+                identity = _cached['seasons'][key] = SeasonIdentity(table, season_table)
+            seasons[season] = identity
+        return IdentityMap(seasons)
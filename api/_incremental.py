@@ -0,0 +1,114 @@
+"""Incremental maintenance of per-player records and their rankings.
+
+Between two bootstrap-static pulls only a handful of players usually change
+(price, form, ownership). ``IncrementalIndex`` keeps the derived record of
+every player keyed by id together with a fingerprint of the inputs it was
+built from. ``refresh()`` diffs a new set of inputs against those
+fingerprints, rebuilds only the records that were added or changed, and
+repairs the overall ranking and the per-group rankings by bisecting the old
+entries out and the new ones in. The cost of a refresh grows with the number
+of changed players, not with the size of the pool.
+"""
+from bisect import bisect_left
+
+
+class SortedIndex:
+    """Items kept in ascending order of a unique key"""
+
+    def __init__(self):
+        self.keys = []
+        self.items = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def insert(self, key, item):
+        i = bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        self.items.insert(i, item)
+
+    def remove(self, key):
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            raise KeyError(key)
+        del self.keys[i]
+        del self.items[i]
+
+
+class IncrementalIndex:
+    """Records by id, rebuilt only when their fingerprint changes, with rankings kept sorted.
+
+    ``rank_key(record)`` orders the overall ranking and ``group_rank_key(record)``
+    orders each ``group_key(record)`` group; ties in both are broken by the
+    order value supplied with each input, so the result matches a stable
+    sort of a from-scratch rebuild.
+    """
+
+    def __init__(self, rank_key, group_key, group_rank_key):
+        self.rank_key = rank_key
+        self.group_key = group_key
+        self.group_rank_key = group_rank_key
+        self.records = {}
+        self.fingerprints = {}
+        self.orders = {}
+        self.ranking = SortedIndex()
+        self.groups = {}
+        self._keys = {}
+
+    def refresh(self, inputs, build):
+        """Apply ``{id: (order, fingerprint, source)}``; ``build(source)`` makes a record
+
+        Records whose fingerprint is unchanged but whose order moved (e.g. an
+        earlier player was removed) are only re-ranked, not rebuilt. Returns
+        the ids that were added, changed, moved and removed.
+        """
+        removed = [record_id for record_id in self.fingerprints if record_id not in inputs]
+        added = []
+        changed = []
+        moved = []
+        for record_id, (order, fingerprint, _) in inputs.items():
+            previous = self.fingerprints.get(record_id)
+            if previous is None:
+                added.append(record_id)
+            elif previous != fingerprint:
+                changed.append(record_id)
+            elif self.orders[record_id] != order:
+                moved.append(record_id)
+
+        for record_id in removed + changed + moved:
+            self._unrank(record_id)
+        for record_id in removed:
+            del self.records[record_id]
+            del self.fingerprints[record_id]
+            del self.orders[record_id]
+
+        for record_id in added + changed:
+            order, fingerprint, source = inputs[record_id]
+            self.records[record_id] = build(source)
+            self.fingerprints[record_id] = fingerprint
+        for record_id in added + changed + moved:
+            order = self.orders[record_id] = inputs[record_id][0]
+            self._rank(record_id, self.records[record_id], order)
+
+        return {'added': added, 'changed': changed, 'moved': moved, 'removed': removed}
+
+    def ranked(self):
+        """Snapshot of the overall ranking (a new list, safe to hand out)"""
+        return list(self.ranking.items)
+
+    def grouped(self):
+        """Snapshot of every group's ranking"""
+        return {group: list(index.items) for group, index in self.groups.items() if index}
+
+    def _rank(self, record_id, record, order):
+        rank_key = (self.rank_key(record), order)
+        group = self.group_key(record)
+        group_rank_key = (self.group_rank_key(record), order)
+        self.ranking.insert(rank_key, record)
+        self.groups.setdefault(group, SortedIndex()).insert(group_rank_key, record)
+        self._keys[record_id] = (rank_key, group, group_rank_key)
+
+    def _unrank(self, record_id):
+        rank_key, group, group_rank_key = self._keys.pop(record_id)
+        self.ranking.remove(rank_key)
+        self.groups[group].remove(group_rank_key)
@@ -0,0 +1,74 @@
+"""Ranked leaderboards over one analysis snapshot.
+
+Every top-N list the API returns (dashboard insights, ``/api/leaderboards``,
+the sorted player pages) is a prefix of one ranking per metric and
+position. ``Leaderboards`` builds each ranking the first time it is asked
+for and keeps it for the lifetime of the player list it was built from, so
+every later query is a slice: O(k) instead of a full sort of the pool.
+
+Rankings are stable sorts of the player list, so ties keep the list's order
+exactly as ``sorted(players, key=..., reverse=...)[:k]`` would. A position's
+ranking is filtered out of the overall one rather than sorted again.
+"""
+import threading
+
+ALL_POSITIONS = 'All'
+
+
+class Leaderboards:
+    """Per-metric rankings of a player list, overall and per position
+
+    ``metrics`` maps a metric name to ``(key, descending)``.
+    """
+
+    def __init__(self, players, metrics, position_key=lambda player: player['position']):
+        self.players = players
+        self.metrics = metrics
+        self.position_key = position_key
+        self._rankings = {}
+        self._positions = None
+        self._lock = threading.RLock()
+
+    def ranking(self, metric, position=ALL_POSITIONS):
+        """Every player of ``position`` (or all of them), best first by ``metric``"""
+        ranking = self._rankings.get((metric, position))
+        if ranking is not None:
+            return ranking
+
+        with self._lock:
+            ranking = self._rankings.get((metric, position))
+            if ranking is None:
+                if position == ALL_POSITIONS:
+                    key, descending = self.metrics[metric]
+                    ranking = sorted(self.players, key=key, reverse=descending)
+                else:
+                    ranking = [player for player in self.ranking(metric) if self.position_key(player) == position]
+                self._rankings[(metric, position)] = ranking
+        return ranking
+
+    def top(self, metric, k, position=ALL_POSITIONS):
+        """The first ``k`` players of a ranking"""
+        return self.ranking(metric, position)[:max(0, k)]
+
+    def positions(self):
+        """Players grouped by position, in list order"""
+        if self._positions is None:
+            grouped = {}
+            for player in self.players:
+                grouped.setdefault(self.position_key(player), []).append(player)
+            self._positions = grouped
+        return self._positions
+
+
+_cached = {'source': None, 'metrics': None, 'boards': None}
+_cached_lock = threading.Lock()
+
+
+def leaderboards(players, metrics):
+    """Leaderboards for a player list, built once per list object"""
+    with _cached_lock:
+        if _cached['source'] is not players or _cached['metrics'] is not metrics:
+            _cached['boards'] = Leaderboards(players, metrics)
+            _cached['source'] = players
+            _cached['metrics'] = metrics
+        return _cached['boards']
@@ -0,0 +1,269 @@
+"""Shared JSON response writer for the api/ handlers.
+
+Negotiates gzip (or brotli, when the ``brotli`` package is installed) from
+``Accept-Encoding``, sets ``Content-Length``, a strong ``ETag`` and
+``Cache-Control``, and answers ``If-None-Match`` with 304 Not Modified.
+
+When the caller knows the version of the data behind a response (e.g. the
+analysis snapshot key) the ETag is derived from that version and the
+request path, so a conditional request can be answered before anything is
+serialized. Otherwise the ETag is a hash of the encoded body.
+
+``stream_json`` writes large responses incrementally instead: the records
+of one list field are encoded in batches and sent as they are serialized
+(chunked on HTTP/1.1 connections, until close otherwise), either as one
+JSON document or as NDJSON. Only gzip is used for streams, flushed per
+chunk so the client can decode each one as it arrives.
+
+Inside a traced handler (see ``_trace``) every response carries a
+``Server-Timing`` header with the stages recorded before its headers went
+out; encoding and compression are stages of their own.
+"""
+import gzip
+import hashlib
+import json
+import zlib
+
+from _trace import current_trace, stage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+CACHE_CONTROL = 'public, max-age=60, s-maxage=300, stale-while-revalidate=600'
+NO_STORE = 'no-store'
+
+
+def negotiate_encoding(handler, candidates=None):
+    """Pick 'br', 'gzip' or 'identity' from the request's Accept-Encoding"""
+    offered = {}
+    for part in (handler.headers.get('Accept-Encoding') or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[coding.strip().lower()] = quality
+
+    if candidates is None:
+        candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    for coding in candidates:
+        if offered.get(coding, offered.get('*', 0)) > 0:
+            return coding
+    return 'identity'
+
+
+def make_etag(handler, version=None, body=None, encoding='identity'):
+    """Strong ETag per (data version, request path) or per body, and per encoding"""
+    if version is not None:
+        digest = hashlib.sha1(f"{version}|{handler.path}".encode('utf-8')).hexdigest()
+    else:
+        digest = hashlib.sha1(body).hexdigest()
+    suffix = '' if encoding == 'identity' else f"-{encoding}"
+    return f'"{digest[:32]}{suffix}"'
+
+
+def etag_matches(handler, etag):
+    header = handler.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    tags = [tag.strip() for tag in header.split(',')]
+    return etag in tags or f"W/{etag}" in tags
+
+
+def send_common_headers(handler):
+    handler.send_header('Access-Control-Allow-Origin', '*')
+    handler.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+    handler.send_header('Access-Control-Allow-Headers', 'Content-Type')
+    handler.send_header('Access-Control-Expose-Headers', 'ETag')
+    handler.send_header('Vary', 'Accept-Encoding')
+    trace = current_trace()
+    if trace is not None:
+        handler.send_header('Server-Timing', trace.server_timing())
+        handler.send_header('Timing-Allow-Origin', '*')
+
+
+def send_not_modified(handler, etag, cache_control=CACHE_CONTROL):
+    handler.send_response(304)
+    send_common_headers(handler)
+    handler.send_header('ETag', etag)
+    handler.send_header('Cache-Control', cache_control)
+    handler.end_headers()
+
+
+def encode_body(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def send_json(handler, payload, version=None, cacheable=True, status=200):
+    """Serialize, compress and write a JSON response with caching headers"""
+    encoding = negotiate_encoding(handler)
+    cache_control = CACHE_CONTROL if cacheable else NO_STORE
+    trace = current_trace()
+    if trace is not None and (status >= 400 or (isinstance(payload, dict) and 'error' in payload)):
+        trace.error = True
+
+    if cacheable and version is not None:
+        etag = make_etag(handler, version, encoding=encoding)
+        if etag_matches(handler, etag):
+            send_not_modified(handler, etag, cache_control)
+            return
+
+    with stage('json_encode') as current:
+        body = json.dumps(payload).encode()
+        current.bytes = len(body)
+    if len(body) < MIN_COMPRESS_BYTES:
+        encoding = 'identity'
+
+    if cacheable and version is None:
+        etag = make_etag(handler, body=body, encoding=encoding)
+        if etag_matches(handler, etag):
+            send_not_modified(handler, etag, cache_control)
+            return
+    elif version is not None:
+        etag = make_etag(handler, version, encoding=encoding)
+    else:
+        etag = None
+
+    if encoding != 'identity':
+        with stage('compress') as current:
+            body = encode_body(body, encoding)
+            current.bytes = len(body)
+
+    handler.send_response(status)
+    handler.send_header('Content-type', 'application/json')
+    send_common_headers(handler)
+    if encoding != 'identity':
+        handler.send_header('Content-Encoding', encoding)
+    handler.send_header('Content-Length', str(len(body)))
+    if etag:
+        handler.send_header('ETag', etag)
+    handler.send_header('Cache-Control', cache_control)
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class _StreamWriter:
+    """Buffers encoded text and writes it as (optionally gzip-flushed, chunked) pieces"""
+
+    def __init__(self, handler, chunked, encoding):
+        self.handler = handler
+        self.chunked = chunked
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if encoding == 'gzip' else None
+        self.parts = []
+        self.size = 0
+        self.sent = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= STREAM_CHUNK_BYTES:
+            self.flush()
+
+    def flush(self):
+        data = ''.join(self.parts).encode()
+        self.parts = []
+        self.size = 0
+        if self.compressor is not None:
+            data = self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        self._send(data)
+
+    def close(self):
+        data = ''.join(self.parts).encode()
+        if self.compressor is not None:
+            data = self.compressor.compress(data) + self.compressor.flush()
+        self._send(data)
+        if self.chunked:
+            self.handler.wfile.write(b'0\r\n\r\n')
+
+    def _send(self, data):
+        if not data:
+            return
+        self.sent += len(data)
+        if self.chunked:
+            self.handler.wfile.write(b'%x\r\n' % len(data) + data + b'\r\n')
+        else:
+            self.handler.wfile.write(data)
+
+
+def stream_json(handler, payload, stream_key, version=None, ndjson=False):
+    """Write ``payload`` with its ``stream_key`` records serialized and sent incrementally
+
+    As JSON the body is byte-for-byte what ``json.dumps(payload)`` would
+    produce. As NDJSON the first line holds every other field of the payload
+    and each following line is one record.
+    """
+    encoding = negotiate_encoding(handler, ['gzip'])
+    if version is not None:
+        etag = make_etag(handler, version, encoding=encoding)
+        if etag_matches(handler, etag):
+            send_not_modified(handler, etag)
+            return
+    else:
+        etag = None
+
+    chunked = handler.protocol_version >= 'HTTP/1.1' and handler.request_version >= 'HTTP/1.1'
+    handler.send_response(200)
+    handler.send_header('Content-type', 'application/x-ndjson' if ndjson else 'application/json')
+    send_common_headers(handler)
+    if encoding != 'identity':
+        handler.send_header('Content-Encoding', encoding)
+    if chunked:
+        handler.send_header('Transfer-Encoding', 'chunked')
+    else:
+        # Without chunking the end of the body is the end of the connection
+        handler.send_header('Connection', 'close')
+        handler.close_connection = True
+    if etag:
+        handler.send_header('ETag', etag)
+    handler.send_header('Cache-Control', CACHE_CONTROL)
+    handler.end_headers()
+
+    writer = _StreamWriter(handler, chunked, encoding)
+    # The headers are already out, so this stage only reaches /api/metrics
+    with stage('json_stream') as current:
+        try:
+            if ndjson:
+                writer.write(json.dumps({key: value for key, value in payload.items() if key != stream_key}))
+                for record in payload[stream_key]:
+                    writer.write('\n')
+                    writer.write(json.dumps(record))
+                writer.write('\n')
+            else:
+                separator = '{'
+                for key, value in payload.items():
+                    writer.write(separator)
+                    separator = ', '
+                    writer.write(json.dumps(key))
+                    if key != stream_key:
+                        writer.write(': ')
+                        writer.write(json.dumps(value))
+                        continue
+                    writer.write(': [')
+                    record_separator = ''
+                    for record in value:
+                        writer.write(record_separator)
+                        record_separator = ', '
+                        writer.write(json.dumps(record))
+                    writer.write(']')
+                writer.write('}' if separator == ', ' else '{}')
+            writer.close()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away mid-stream; nothing more can be sent on this connection
+            handler.close_connection = True
+        current.bytes = writer.sent
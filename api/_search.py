@@ -0,0 +1,107 @@
+"""Accent-folded player search index.
+
+Built once per analysis snapshot. Every searchable field is folded (accents
+stripped, "ø" -> "o", lower-cased) and split into tokens; the index keeps a
+posting list per token, the sorted token list for prefix lookups and a
+trigram -> tokens map for substring and typo-tolerant matches. A query only
+touches the tokens it can match, so cost grows with the number of matches
+rather than with the player pool.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+# Letters that NFKD does not decompose into a base letter + accent
+_SPECIAL_LETTERS = str.maketrans({
+    'ø': 'o', 'Ø': 'O', 'æ': 'ae', 'Æ': 'AE', 'œ': 'oe', 'Œ': 'OE', 'ß': 'ss',
+    'đ': 'd', 'Đ': 'D', 'ð': 'd', 'Ð': 'D', 'ł': 'l', 'Ł': 'L', 'þ': 'th', 'Þ': 'Th', 'ı': 'i',
+    "'": None, '’': None
+})
+
+# Relative quality of a token match for one query word
+EXACT, PREFIX, SUBSTRING, FUZZY = 1.0, 0.8, 0.6, 0.4
+FUZZY_MIN_SIMILARITY = 0.35
+
+DEFAULT_FIELDS = (('name', 3.0), ('full_name', 2.0), ('team', 1.0))
+
+
+def fold(text):
+    """Lower-case, strip accents and reduce to space separated [a-z0-9] words"""
+    text = unicodedata.normalize('NFKD', text.translate(_SPECIAL_LETTERS))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return re.sub(r'[^0-9a-z]+', ' ', text).strip()
+
+
+def trigrams(token):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, documents, fields=DEFAULT_FIELDS):
+        self.documents = documents
+        self.postings = {}
+        for doc_id, document in enumerate(documents):
+            for field, weight in fields:
+                for token in fold(str(document.get(field) or '')).split():
+                    posting = self.postings.setdefault(token, {})
+                    if posting.get(doc_id, 0) < weight:
+                        posting[doc_id] = weight
+
+        self.tokens = sorted(self.postings)
+        self.token_trigrams = {}
+        self.trigram_tokens = {}
+        for token in self.tokens:
+            grams = self.token_trigrams[token] = trigrams(token)
+            for gram in grams:
+                self.trigram_tokens.setdefault(gram, []).append(token)
+
+    def match_tokens(self, word):
+        """Indexed tokens matching one folded query word, with their match quality"""
+        matches = {}
+        if word in self.postings:
+            matches[word] = EXACT
+
+        i = bisect_left(self.tokens, word)
+        while i < len(self.tokens) and self.tokens[i].startswith(word):
+            matches.setdefault(self.tokens[i], PREFIX)
+            i += 1
+
+        if len(word) >= 3:
+            grams = trigrams(word)
+            inner = {gram for gram in grams if ' ' not in gram}
+            shared = Counter(token for gram in grams for token in self.trigram_tokens.get(gram, ()))
+            for token, count in shared.items():
+                if token in matches:
+                    continue
+                if word in token:
+                    matches[token] = SUBSTRING
+                elif len(word) >= 4 and count >= len(inner) // 2:
+                    similarity = count / (len(grams) + len(self.token_trigrams[token]) - count)
+                    if similarity >= FUZZY_MIN_SIMILARITY:
+                        matches[token] = FUZZY * similarity
+        return matches
+
+    def search(self, query):
+        """Ranked documents matching every word of the query: [(score, document)]"""
+        words = fold(query).split()
+        if not words:
+            return []
+
+        scores = None
+        for word in words:
+            word_scores = {}
+            for token, quality in self.match_tokens(word).items():
+                for doc_id, weight in self.postings[token].items():
+                    if word_scores.get(doc_id, 0) < quality * weight:
+                        word_scores[doc_id] = quality * weight
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {doc_id: score + word_scores[doc_id] for doc_id, score in scores.items() if doc_id in word_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, self.documents[doc_id]) for doc_id, score in ranked]
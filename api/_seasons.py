@@ -0,0 +1,61 @@
+"""Season names and the analysis window of a request.
+
+A window is the current season plus the historical seasons joined to it,
+chosen with ``?window=N`` (the N most recent seasons, current included) or
+``?seasons=2019-20,2021-22`` (those historical seasons plus the current
+one). Windows span 1 to ``MAX_WINDOW`` seasons; the default is the
+dashboard's original three. Seasons before ``FIRST_SEASON`` have no
+historical data, so windows reaching further back are cut off there.
+"""
+import re
+
+from _seed import CURRENT_SEASON
+
+# Earliest season in vaastav's historical data
+FIRST_SEASON = '2016-17'
+DEFAULT_WINDOW = 3
+MAX_WINDOW = 10
+
+SEASON_PATTERN = re.compile(r'^(\d{4})-(\d{2})$')
+
+
+def season_start(season):
+    """Starting year of a 'YYYY-YY' season name"""
+    match = SEASON_PATTERN.match(season)
+    if not match or (int(match.group(1)) + 1) % 100 != int(match.group(2)):
+        raise ValueError(f"Invalid season '{season}'. Use the YYYY-YY form, e.g. {CURRENT_SEASON}")
+    return int(match.group(1))
+
+
+def season_name(start_year):
+    return f"{start_year}-{(start_year + 1) % 100:02d}"
+
+
+def window_seasons(window):
+    """The ``window`` most recent historical seasons, oldest first (the current season is implied)"""
+    current = season_start(CURRENT_SEASON)
+    first = max(current - window + 1, season_start(FIRST_SEASON))
+    return tuple(season_name(start) for start in range(first, current))
+
+
+def parse_window(query_params):
+    """Historical seasons selected by a request's ``seasons=`` or ``window=`` parameter, oldest first"""
+    if query_params.get('seasons', [''])[0]:
+        current = season_start(CURRENT_SEASON)
+        starts = set()
+        for season in query_params['seasons'][0].split(','):
+            start = season_start(season.strip())
+            if start > current:
+                raise ValueError(f"Season {season.strip()} is after the current season {CURRENT_SEASON}")
+            if start < season_start(FIRST_SEASON):
+                raise ValueError(f"No historical data before {FIRST_SEASON}")
+            if start < current:
+                starts.add(start)
+        if len(starts) + 1 > MAX_WINDOW:
+            raise ValueError(f"At most {MAX_WINDOW} seasons (including {CURRENT_SEASON}) can be analyzed")
+        return tuple(season_name(start) for start in sorted(starts))
+
+    window = query_params.get('window', [DEFAULT_WINDOW])[0]
+    if not str(window).isdigit() or not 1 <= int(window) <= MAX_WINDOW:
+        raise ValueError(f"window must be between 1 and {MAX_WINDOW} seasons")
+    return window_seasons(int(window))
@@ -0,0 +1,24 @@
+"""Stable per-player seeds for the synthetic 3-year metrics.
+
+Python's built-in ``hash()`` of a string changes with every process
+(PYTHONHASHSEED), so seeding from it gave each serverless instance its own
+numbers for the same player. Seeds are instead a keyed BLAKE2b digest of
+the player id and season, identical in every process and on every machine
+that shares ``FPL_SEED_KEY``.
+"""
+import hashlib
+import os
+
+SEED_KEY = os.environ.get('FPL_SEED_KEY', 'fpl-dashboard').encode('utf-8')[:64]
+CURRENT_SEASON = '2024-25'
+
+
+def stable_seed(player_id, season=CURRENT_SEASON, modulus=1000):
+    """Deterministic seed in range(modulus) for one player and season"""
+    digest = hashlib.blake2b(f"{player_id}:{season}".encode('utf-8'), key=SEED_KEY, digest_size=8).digest()
+    return int.from_bytes(digest, 'little') % modulus
+
+
+def seed_scheme():
+    """Identifies the seeding, so cached derived metrics are dropped when it changes"""
+    return hashlib.blake2b(b'player-seed-v1', key=SEED_KEY, digest_size=8).hexdigest()
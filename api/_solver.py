@@ -0,0 +1,520 @@
+"""Exact squad selection by branch-and-bound.
+
+Selecting players to maximize a score under a budget, per-position counts
+and the FPL limit of three players per club is a small integer program.
+It is solved here in pure Python:
+
+* prices are handled in integer units of 0.1m, so budget checks are exact;
+* players that are provably never needed are pruned up front (a player is
+  dropped when enough cheaper-or-equal, higher-or-equal scoring players
+  from enough distinct clubs exist that one of them can always replace it);
+* the search is a depth-first enumeration of slot groups, bounded by a
+  Lagrangian relaxation of the budget constraint whose multiplier is tuned
+  once at the root.
+
+A time limit stops the search early; the best squad found is returned
+together with the relative gap to the root bound. ``solve_full_squad``
+searches its formation and captain problems best bound first against one
+shared incumbent, so most of them are pruned at the root.
+
+``budget_frontier`` answers the same question for a whole range of budgets
+at once with a knapsack dynamic programme over (slots x 0.1m budget units).
+The programme ignores the club limit; budgets whose squad breaks it are
+re-solved with the branch-and-bound.
+"""
+import time
+from operator import gt
+
+MAX_PER_TEAM = 3
+
+
+class _Timeout(Exception):
+    pass
+
+
+def to_units(amount):
+    """Convert a price in millions to integer 0.1m units"""
+    return int(round(amount * 10))
+
+
+def prune_dominated(candidates, need, full_teams):
+    """Drop candidates that can always be swapped for a dominating one.
+
+    ``candidates`` are (cost, score, team, index) tuples for one position.
+    A candidate is dominated when players that cost no more and score no
+    less come from at least ``need + full_teams`` distinct clubs: at most
+    ``need - 1`` of those clubs can be blocked by the other picks in the
+    position and at most ``full_teams`` by the club limit.
+    """
+    ordered = sorted(candidates, key=lambda c: (c[0], -c[1], c[3]))
+    required = need + full_teams
+    kept = []
+    for i, candidate in enumerate(ordered):
+        teams = set()
+        for other in ordered[:i]:
+            if other[1] >= candidate[1]:
+                teams.add(other[2])
+                if len(teams) >= required:
+                    break
+        if len(teams) < required:
+            kept.append(candidate)
+    return kept
+
+
+def _top_sum(values, k):
+    if len(values) < k:
+        return None
+    return sum(sorted(values, reverse=True)[:k])
+
+
+def relax(players, groups, budget, score, max_per_team=MAX_PER_TEAM):
+    """Prune the candidate pools and tune the Lagrangian budget multiplier for ``groups``.
+
+    Returns a dict with the pools, the multiplier ``lam`` and ``bound``, an
+    upper bound on the objective of any squad filling the groups; ``solve``
+    searches from it, and callers choosing between several problems can
+    compare their bounds before searching any of them.
+    """
+    budget_units = int(budget * 10 + 1e-6)
+    total_slots = sum(count for _, count, _ in groups)
+    full_teams = (total_slots - 1) // max_per_team
+
+    teams = {}
+    need = {}
+    for position, count, _ in groups:
+        need[position] = need.get(position, 0) + count
+
+    pools = {}
+    for index, player in enumerate(players):
+        position = player['position']
+        if position not in need:
+            continue
+        cost = to_units(player['price'])
+        if cost > budget_units:
+            continue
+        team = teams.setdefault(player['team'], len(teams))
+        pools.setdefault(position, []).append((cost, float(score(player)), team, index))
+
+    for position in need:
+        pools[position] = prune_dominated(pools.get(position, []), need[position], full_teams)
+        if len(pools[position]) < need[position]:
+            raise ValueError(f"Not enough affordable {position}s to fill the squad")
+
+    # Tune the budget multiplier at the root: UB(lam) is convex in lam.
+    def root_bound(lam):
+        total = lam * budget_units
+        for position, count, weight in groups:
+            total += _top_sum([weight * c[1] - lam * c[0] for c in pools[position]], count)
+        return total
+
+    low, high = 0.0, max(weight for _, _, weight in groups) * max(
+        c[1] / max(c[0], 1) for pool in pools.values() for c in pool
+    ) + 1.0
+    for _ in range(60):
+        a = low + (high - low) / 3
+        b = high - (high - low) / 3
+        if root_bound(a) <= root_bound(b):
+            high = b
+        else:
+            low = a
+    lam = (low + high) / 2
+    return {'budget_units': budget_units, 'teams': teams, 'pools': pools, 'lam': lam, 'bound': root_bound(lam)}
+
+
+def solve(players, groups, budget, score, max_per_team=MAX_PER_TEAM, time_limit=0.5, cutoff=None, relaxation=None):
+    """Pick players for each slot group maximizing the weighted score.
+
+    ``groups`` is a list of (position, count, weight) tuples. Groups for the
+    same position draw from the same pool without repeats, which is how
+    starters, bench and captain are modelled. ``score`` maps a player dict
+    to a number. Returns a dict with the chosen players per group, the
+    objective, the proven bound and the optimality gap.
+
+    With a ``cutoff`` only solutions scoring above it are searched for; when
+    none exists ``groups`` and ``objective`` are None. ``relaxation`` is the
+    result of ``relax`` for the same arguments, when the caller already has it.
+    """
+    started = time.perf_counter()
+    if relaxation is None:
+        relaxation = relax(players, groups, budget, score, max_per_team)
+    budget_units, teams, pools = relaxation['budget_units'], relaxation['teams'], relaxation['pools']
+    lam, bound = relaxation['lam'], relaxation['bound']
+
+    # Per group: candidates sorted by adjusted value, with prefix sums so the
+    # best r picks from any suffix can be read off in O(1).
+    layers = []
+    for position, count, weight in groups:
+        entries = sorted(
+            ((weight * c[1] - lam * c[0], weight * c[1], c[0], c[2], c[3]) for c in pools[position]),
+            key=lambda e: -e[0]
+        )
+        prefix = [0.0]
+        for entry in entries:
+            prefix.append(prefix[-1] + entry[0])
+        cheapest = sum(sorted(e[2] for e in entries)[:count])
+        layers.append((count, entries, prefix, cheapest))
+
+    # Groups of the same position are interchangeable up to their weights, so
+    # a later, lighter group never needs a player scoring above the ones
+    # already placed in the heavier groups of that position.
+    raw_score = {c[3]: c[1] for pool in pools.values() for c in pool}
+    parents = [
+        [h for h in range(g) if groups[h][0] == groups[g][0] and groups[h][2] >= groups[g][2]]
+        for g in range(len(groups))
+    ]
+
+    rest_bound = [0.0] * (len(layers) + 1)
+    rest_cost = [0] * (len(layers) + 1)
+    for g in range(len(layers) - 1, -1, -1):
+        count, _, prefix, cheapest = layers[g]
+        rest_bound[g] = rest_bound[g + 1] + prefix[count]
+        rest_cost[g] = rest_cost[g + 1] + cheapest
+
+    team_counts = [0] * len(teams)
+    chosen = set()
+    picks = [[] for _ in layers]
+    best = {'value': float('-inf') if cutoff is None else cutoff, 'picks': None}
+    state = {'nodes': 0, 'deadline': started + time_limit}
+
+    def search(g, start, remaining, value, budget_left, ceiling):
+        count, entries, prefix, _ = layers[g]
+        if remaining == 0:
+            if g + 1 == len(layers):
+                if value > best['value'] + 1e-9:
+                    best['value'] = value
+                    best['picks'] = [list(p) for p in picks]
+                return
+            next_ceiling = min(
+                (raw_score[index] for h in parents[g + 1] for index in picks[h]),
+                default=float('inf')
+            )
+            search(g + 1, 0, layers[g + 1][0], value, budget_left, next_ceiling)
+            return
+
+        state['nodes'] += 1
+        if state['nodes'] & 1023 == 0 and time.perf_counter() > state['deadline']:
+            raise _Timeout()
+
+        base = value + lam * budget_left + rest_bound[g + 1]
+        min_rest = rest_cost[g + 1]
+        last = len(entries) - remaining
+        for j in range(start, last + 1):
+            adjusted, weighted, cost, team, index = entries[j]
+            if base + adjusted + prefix[j + remaining] - prefix[j + 1] <= best['value'] + 1e-9:
+                break
+            if cost > budget_left - min_rest or team_counts[team] >= max_per_team or index in chosen:
+                continue
+            if raw_score[index] > ceiling:
+                continue
+            team_counts[team] += 1
+            chosen.add(index)
+            picks[g].append(index)
+            search(g, j + 1, remaining - 1, value + weighted, budget_left - cost, ceiling)
+            picks[g].pop()
+            chosen.discard(index)
+            team_counts[team] -= 1
+
+    optimal = True
+    try:
+        search(0, 0, layers[0][0], 0.0, budget_units, float('inf'))
+    except _Timeout:
+        optimal = False
+
+    if best['picks'] is None:
+        if cutoff is None:
+            if not optimal:
+                raise TimeoutError(f"No squad found within the {time_limit}s time limit")
+            raise ValueError('No squad satisfies the budget and club limits')
+        return {
+            'groups': None,
+            'objective': None,
+            'bound': cutoff if optimal else bound,
+            'gap': 0.0,
+            'optimal': optimal,
+            'nodes': state['nodes'],
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    objective = best['value']
+    if optimal:
+        bound = objective
+    gap = max(0.0, (bound - objective) / max(abs(objective), 1e-9))
+
+    return {
+        'groups': [[players[index] for index in group] for group in best['picks']],
+        'objective': objective,
+        'bound': bound,
+        'gap': gap,
+        'optimal': optimal,
+        'nodes': state['nodes'],
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def solve_squad(players, requirements, budget, score, max_per_team=MAX_PER_TEAM, time_limit=0.5):
+    """Exact counterpart of the greedy builders: fill ``requirements`` ({position: count})"""
+    groups = [(position, count, 1.0) for position, count in requirements.items() if count > 0]
+    result = solve(players, groups, budget, score, max_per_team=max_per_team, time_limit=time_limit)
+    squad = {position: [] for position in requirements}
+    for (position, _, _), selected in zip(groups, result.pop('groups')):
+        squad[position] = selected
+    result['squad'] = squad
+    return result
+
+
+SQUAD_SIZE = {'Goalkeeper': 2, 'Defender': 5, 'Midfielder': 5, 'Forward': 3}
+
+
+def valid_formations():
+    """Every legal FPL starting formation (at least 3 DEF, 2 MID, 1 FWD)"""
+    return [
+        f"{defenders}-{midfielders}-{forwards}"
+        for defenders in range(3, 6)
+        for midfielders in range(2, 6)
+        for forwards in range(1, 4)
+        if defenders + midfielders + forwards == 10
+    ]
+
+
+def solve_full_squad(players, budget, score, formations=None, bench_weight=0.1, captain_weight=2.0,
+                     max_per_team=MAX_PER_TEAM, time_limit=2.0):
+    """Choose the 15-man squad, starting XI and captain jointly across formations.
+
+    The objective is the XI's score with the captain counted
+    ``captain_weight`` times, plus ``bench_weight`` times the bench's score.
+    The captain is its own one-player slot group, so each (formation,
+    captain position) pair is a separate problem. Problems are searched in
+    order of their root bound with the best objective found so far, across
+    all formations, as the cutoff; a problem whose bound does not beat it is
+    pruned without a search. ``time_limit`` is shared by the whole call.
+
+    Returns ``{'optimal': ..., 'nodes': ..., 'elapsed_ms': ..., 'formations':
+    {formation: result}}``. ``optimal`` is False when any problem ran out of
+    time, so the best squad is not proven. A formation's squad is the best
+    one found that improved on the cutoff when it was searched; a formation
+    pruned outright has ``objective`` None and ``bound`` no better than the
+    best squad's objective.
+    """
+    started = time.perf_counter()
+    deadline = started + time_limit
+    top_score = {}
+    for player in players:
+        top_score[player['position']] = max(top_score.get(player['position'], float('-inf')), float(score(player)))
+
+    problems = []
+    for formation in formations or valid_formations():
+        defenders, midfielders, forwards = (int(part) for part in formation.split('-'))
+        starters = {'Goalkeeper': 1, 'Defender': defenders, 'Midfielder': midfielders, 'Forward': forwards}
+        for captain_position in sorted(starters, key=lambda position: -top_score.get(position, 0)):
+            groups = [('captain', captain_position, 1, captain_weight)]
+            groups += [('starter', position, count - (position == captain_position), 1.0) for position, count in starters.items()]
+            groups += [('bench', position, SQUAD_SIZE[position] - count, bench_weight) for position, count in starters.items()]
+            groups = [group for group in groups if group[2] > 0]
+            relaxation = relax(players, [group[1:] for group in groups], budget, score, max_per_team)
+            problems.append((formation, groups, relaxation))
+    # Most promising first, so the shared cutoff is strong early
+    problems.sort(key=lambda problem: -problem[2]['bound'])
+
+    results = {}
+    best_objective = None
+    all_optimal = True
+    total_nodes = 0
+    for formation, groups, relaxation in problems:
+        entry = results.setdefault(formation, {
+            'objective': None, 'bound': float('-inf'), 'optimal': True, 'nodes': 0, 'elapsed_ms': 0.0
+        })
+        if best_objective is not None and relaxation['bound'] <= best_objective + 1e-9:
+            entry['bound'] = max(entry['bound'], relaxation['bound'])
+            continue
+
+        result = solve(
+            players, [group[1:] for group in groups], budget, score,
+            max_per_team=max_per_team, time_limit=max(0.0, deadline - time.perf_counter()),
+            cutoff=best_objective, relaxation=relaxation
+        )
+        entry['optimal'] = entry['optimal'] and result['optimal']
+        entry['bound'] = max(entry['bound'], result['bound'])
+        entry['nodes'] += result['nodes']
+        entry['elapsed_ms'] += result['elapsed_ms']
+        all_optimal = all_optimal and result['optimal']
+        total_nodes += result['nodes']
+        if result['groups'] is None:
+            continue
+
+        picked = {'captain': None, 'starter': {}, 'bench': {}}
+        for (role, position, _, _), selected in zip(groups, result['groups']):
+            if role == 'captain':
+                picked['captain'] = selected[0]
+                picked['starter'].setdefault(position, []).insert(0, selected[0])
+            else:
+                picked[role].setdefault(position, []).extend(selected)
+        entry.update(picked)
+        entry['objective'] = result['objective']
+        best_objective = result['objective']
+
+    for entry in results.values():
+        if entry['objective'] is not None:
+            entry['bound'] = max(entry['bound'], entry['objective'])
+            entry['gap'] = max(0.0, (entry['bound'] - entry['objective']) / max(abs(entry['objective']), 1e-9))
+        entry['elapsed_ms'] = round(entry['elapsed_ms'], 1)
+    return {
+        'optimal': all_optimal,
+        'nodes': total_nodes,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'formations': results
+    }
+
+
+def _position_table(entries, count, max_units):
+    """Knapsack over one position: best[b] is the top score of ``count`` players costing <= b.
+
+    ``history`` keeps, per entry and per count, a bitmap of the budgets the
+    entry improved, which is enough to recover the chosen players later.
+    """
+    tables = [[0.0] * (max_units + 1)] + [[float('-inf')] * (max_units + 1) for _ in range(count)]
+    history = []
+    for cost, value, _ in entries:
+        steps = {}
+        for c in range(count, 0, -1):
+            current, previous = tables[c], tables[c - 1]
+            tail = current[cost:]
+            candidate = [v + value for v in previous[:len(tail)]]
+            steps[c] = bytes(map(gt, candidate, tail))
+            current[cost:] = map(max, tail, candidate)
+        history.append(steps)
+    return tables[count], history
+
+
+def _position_picks(entries, history, count, units):
+    picks = []
+    for i in range(len(entries) - 1, -1, -1):
+        if count == 0:
+            break
+        cost, _, index = entries[i]
+        if units >= cost and history[i][count][units - cost]:
+            picks.append(index)
+            count -= 1
+            units -= cost
+    return picks
+
+
+def _breakpoints(table):
+    """Budgets at which a monotone best-score table improves"""
+    points = []
+    last = float('-inf')
+    for units, value in enumerate(table):
+        if value > last:
+            points.append(units)
+            last = value
+    return points
+
+
+def budget_frontier(players, requirements, min_budget, max_budget, step, score,
+                    max_per_team=MAX_PER_TEAM, time_limit=2.0):
+    """Best squad for every budget in [min_budget, max_budget] plus the cost/score Pareto frontier.
+
+    One pass builds a best-score table per position and merges them with a
+    max-plus convolution, so every budget up to ``max_budget`` is answered
+    by a table lookup and a short backtrack. Budgets whose squad breaks the
+    club limit are re-solved by branch-and-bound under one ``time_limit``
+    shared by the whole frontier. Each entry says whether it is proven
+    ``optimal``; budgets for which no squad was found in time are listed in
+    ``unsolved_budgets``, and the top-level ``optimal`` is False when any
+    entry is unproven or missing.
+    """
+    started = time.perf_counter()
+    deadline = started + time_limit
+    max_units = int(max_budget * 10 + 1e-6)
+
+    positions = [(position, count) for position, count in requirements.items() if count > 0]
+    layers = []
+    for position, count in positions:
+        pool = [
+            (to_units(player['price']), float(score(player)), player['team'], index)
+            for index, player in enumerate(players)
+            if player['position'] == position and to_units(player['price']) <= max_units
+        ]
+        if len(pool) < count:
+            raise ValueError(f"Not enough affordable {position}s to fill the squad")
+        entries = [(cost, value, index) for cost, value, _, index in prune_dominated(pool, count, 0)]
+        table, history = _position_table(entries, count, max_units)
+        layers.append((count, entries, table, history, _breakpoints(table)))
+
+    # combined[g][b]: best score for the first g + 1 positions costing <= b
+    combined = [layers[0][2]]
+    for _, _, table, _, breakpoints in layers[1:]:
+        previous = combined[-1]
+        merged = [float('-inf')] * (max_units + 1)
+        for units in breakpoints:
+            value = table[units]
+            merged[units:] = map(max, merged[units:], [v + value for v in previous[:max_units + 1 - units]])
+        combined.append(merged)
+
+    def squad_for(units):
+        if combined[-1][units] == float('-inf'):
+            return None
+        picks = []
+        for g in range(len(layers) - 1, -1, -1):
+            count, entries, table, history, breakpoints = layers[g]
+            if g == 0:
+                spend = units
+            else:
+                target = combined[g][units]
+                spend = next(
+                    c for c in breakpoints
+                    if c <= units and combined[g - 1][units - c] + table[c] == target
+                )
+            picks.extend(_position_picks(entries, history, count, spend))
+            units -= spend
+        return picks
+
+    results = []
+    unsolved = []
+    budget_units = int(min_budget * 10 + 1e-6)
+    step_units = max(1, to_units(step))
+    while budget_units <= max_units:
+        picks = squad_for(budget_units)
+        method = 'dynamic-programming'
+        optimal = True
+        if picks is not None:
+            selected = [players[index] for index in picks]
+            club_counts = {}
+            for player in selected:
+                club_counts[player['team']] = club_counts.get(player['team'], 0) + 1
+            if max(club_counts.values()) > max_per_team:
+                method = 'branch-and-bound'
+                try:
+                    exact = solve_squad(players, requirements, budget_units / 10, score, max_per_team=max_per_team,
+                                        time_limit=max(0.0, deadline - time.perf_counter()))
+                    selected = [player for group in exact['squad'].values() for player in group]
+                    optimal = exact['optimal']
+                except TimeoutError:
+                    selected = None
+                    unsolved.append(budget_units / 10)
+                except ValueError:
+                    selected = None
+            if selected is not None:
+                results.append({
+                    'budget': budget_units / 10,
+                    'players': selected,
+                    'cost': sum(to_units(player['price']) for player in selected) / 10,
+                    'objective': sum(float(score(player)) for player in selected),
+                    'method': method,
+                    'optimal': optimal
+                })
+        budget_units += step_units
+
+    frontier = []
+    for result in sorted(results, key=lambda r: (r['cost'], -r['objective'])):
+        if not frontier or result['objective'] > frontier[-1]['objective'] + 1e-9:
+            if frontier and frontier[-1]['cost'] == result['cost']:
+                frontier.pop()
+            frontier.append(result)
+
+    return {
+        'budgets': results,
+        'frontier': frontier,
+        'optimal': not unsolved and all(result['optimal'] for result in results),
+        'unsolved_budgets': unsolved,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
@@ -0,0 +1,112 @@
+"""Columnar view of the bootstrap-static ``elements`` list.
+
+Each numeric field becomes one typed ``array`` (strings stay in plain lists),
+parsed once per bootstrap payload: ``points_per_game``, ``form`` and
+``selected_by_percent`` arrive as strings and are converted a single time
+instead of on every comparison. Reductions then run over whole columns with
+``sum``/``max``/``Counter`` on ``itertools.compress`` masks rather than
+re-walking the player dicts once per statistic.
+
+The analysis handlers read their per-player inputs from the same columns
+(found through the id -> row index) and write each
+output record exactly once, instead of building an intermediate dict per
+player and spread-merging it into the response.
+"""
+import threading
+from array import array
+from itertools import compress, repeat
+from operator import ge, itemgetter
+
+# (column name, array typecode, element field, converter)
+COLUMNS = (
+    ('id', 'i', 'id', int),
+    ('code', 'i', 'code', int),
+    ('team', 'i', 'team', int),
+    ('element_type', 'i', 'element_type', int),
+    ('now_cost', 'i', 'now_cost', int),
+    ('total_points', 'i', 'total_points', int),
+    ('minutes', 'i', 'minutes', int),
+    ('goals_scored', 'i', 'goals_scored', int),
+    ('assists', 'i', 'assists', int),
+    ('clean_sheets', 'i', 'clean_sheets', int),
+    ('points_per_game', 'd', 'points_per_game', float),
+    ('form', 'd', 'form', float),
+    ('selected_by_percent', 'd', 'selected_by_percent', float),
+)
+TEXT_COLUMNS = ('web_name', 'first_name', 'second_name')
+
+
+def column_values(elements, field):
+    """One field of every element; ``None`` where an element lacks it"""
+    try:
+        return list(map(itemgetter(field), elements))
+    except KeyError:
+        return [element.get(field) for element in elements]
+
+
+def typed_column(typecode, values, convert):
+    """``array`` of converted values (empty and missing values become 0)
+
+    Tries the bulk conversions first: values the array already accepts,
+    then ``convert`` mapped over all of them, and only falls back to
+    checking each value when some are empty or missing.
+    """
+    try:
+        return array(typecode, values)
+    except TypeError:
+        pass
+    try:
+        return array(typecode, map(convert, values))
+    except (TypeError, ValueError):
+        return array(typecode, [convert(value) if value else 0 for value in values])
+
+
+class PlayerTable:
+    def __init__(self, elements):
+        self.columns = {}
+        for name, typecode, field, convert in COLUMNS:
+            self.columns[name] = typed_column(typecode, column_values(elements, field), convert)
+        self.text = {name: [element.get(name) or '' for element in elements] for name in TEXT_COLUMNS}
+
+        self.price = array('d', (cost / 10 for cost in self.columns['now_cost']))
+        self.full_names = [f"{first} {second}".strip() for first, second in zip(self.text['first_name'], self.text['second_name'])]
+
+        # id -> row
+        self.index = {player_id: row for row, player_id in enumerate(self.columns['id'])}
+
+    def __len__(self):
+        return len(self.columns['id'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def mask(self, column, minimum):
+        """Row mask of ``column >= minimum``, usable with ``itertools.compress``"""
+        return bytes(map(ge, self.columns[column], repeat(minimum)))
+
+    def active_rows(self, min_minutes=90):
+        """Rows of players with at least ``min_minutes`` played, in payload order"""
+        return list(compress(range(len(self)), self.mask('minutes', min_minutes)))
+
+    def select(self, column, mask):
+        """Values of one column for the masked rows, in row order"""
+        source = self.price if column == 'price' else self.columns.get(column)
+        if source is None:
+            source = self.text[column]
+        return list(compress(source, mask))
+
+    def full_name(self, row):
+        return self.full_names[row]
+
+
+_cached = {'source': None, 'table': None}
+_cached_lock = threading.Lock()
+
+
+def player_table(fpl_data):
+    """PlayerTable for a bootstrap payload, built once per payload object"""
+    with _cached_lock:
+        if _cached['source'] is not fpl_data:
+            _cached['table'] = PlayerTable(fpl_data.get('elements', []))
+            _cached['source'] = fpl_data
+        return _cached['table']
@@ -0,0 +1,187 @@
+"""Per-gameweek history from vaastav's ``gws/merged_gw.csv``.
+
+A season's merged file has one row per player per fixture (tens of
+thousands of rows). It is parsed once, row by row with ``csv.reader`` into
+typed column arrays (no dict per row), re-ordered so every player's
+fixtures are contiguous and in round order, and written to
+``FPL_CACHE_DIR`` in the same header + packed-column layout as the season
+totals. ``GameweekTable`` memory-maps it: a player's series is a zero-copy
+slice of a column, and a round range is two bisects on the ``round`` slice.
+
+Players are keyed by their FPL ``code`` (joined through the season's
+``players_raw.csv``) and full name, so ``_identity`` can match them to the
+current season just like the season-total tables.
+"""
+import csv
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+
+from _history import CACHE_DIR, INDEX_BYTES_PER_ROW, MEMORY_BUDGET, VAASTAV_DATA_URL, VAASTAV_RAW_URL, HistoryStore, map_columns_file, parse_csv_body, write_columns_file
+
+MERGED_GW_URL = VAASTAV_DATA_URL + '/{season}/gws/merged_gw.csv'
+
+MAGIC = b'FPLT1\n'
+
+# (column name, array typecode, CSV fields tried in order)
+COLUMNS = (
+    ('round', 'i', ('round', 'GW')),
+    ('minutes', 'i', ('minutes',)),
+    ('total_points', 'i', ('total_points',)),
+    ('goals', 'i', ('goals_scored',)),
+    ('assists', 'i', ('assists',)),
+    ('clean_sheets', 'i', ('clean_sheets',)),
+    ('bonus', 'i', ('bonus',)),
+    ('value', 'i', ('value',)),
+)
+
+
+def parse_merged_gw(lines):
+    """Stream-parse merged_gw.csv lines into (elements, names, kickoffs, columns), one entry per row"""
+    reader = csv.reader(lines)
+    header = next(reader, [])
+    positions = {field: i for i, field in enumerate(header)}
+    fields = []
+    for _, _, candidates in COLUMNS:
+        found = [positions[candidate] for candidate in candidates if candidate in positions]
+        fields.append(found[0] if found else None)
+    element_at = positions.get('element')
+    name_at = positions.get('name')
+    kickoff_at = positions.get('kickoff_time')
+    if element_at is None:
+        raise ValueError('merged_gw.csv has no element column')
+
+    elements = array('i')
+    names = []
+    kickoffs = []
+    columns = {name: array(typecode) for name, typecode, _ in COLUMNS}
+    targets = [columns[name] for name, _, _ in COLUMNS]
+    for row in reader:
+        try:
+            element = int(row[element_at])
+            values = [int(float(row[i])) if i is not None and row[i] else 0 for i in fields]
+        except (ValueError, IndexError):
+            continue
+        elements.append(element)
+        names.append(row[name_at] if name_at is not None else '')
+        kickoffs.append(row[kickoff_at] if kickoff_at is not None else '')
+        for target, value in zip(targets, values):
+            target.append(value)
+    return elements, names, kickoffs, columns
+
+
+def parse_player_ids(lines):
+    """{element id: (full name, code)} from players_raw.csv lines"""
+    players = {}
+    for row in csv.DictReader(lines):
+        try:
+            element = int(row.get('id') or 0)
+            code = int(row.get('code') or 0)
+        except ValueError:
+            continue
+        players[element] = (f"{row.get('first_name', '').strip()} {row.get('second_name', '').strip()}".strip(), code)
+    return players
+
+
+def clean_name(name):
+    """Older merged files name players 'First_Second_123'; keep just 'First Second'"""
+    parts = name.split('_')
+    if len(parts) > 1 and parts[-1].isdigit():
+        parts = parts[:-1]
+    return ' '.join(parts).strip()
+
+
+def write_gameweek_file(path, season, version, elements, names, kickoffs, columns, player_ids):
+    """Group rows by player (round, then kickoff order) and write them with per-player offsets"""
+    order = sorted(range(len(elements)), key=lambda i: (elements[i], columns['round'][i], kickoffs[i]))
+    columns = {name: array(values.typecode, [values[i] for i in order]) for name, values in columns.items()}
+
+    player_elements = []
+    player_names = []
+    codes = array('i')
+    starts = array('i')
+    previous = None
+    for position, i in enumerate(order):
+        element = elements[i]
+        if element != previous:
+            name, code = player_ids.get(element, (clean_name(names[i]), 0))
+            player_elements.append(element)
+            player_names.append(name)
+            codes.append(code)
+            starts.append(position)
+            previous = element
+    starts.append(len(order))
+    columns['code'] = codes
+    columns['start'] = starts
+
+    header = {
+        'season': season,
+        'version': version,
+        'rows': len(order),
+        'elements': player_elements,
+        'names': player_names,
+    }
+    write_columns_file(path, MAGIC, header, columns)
+
+
+class GameweekTable:
+    """Memory-mapped per-gameweek series of one season; players are addressed by row"""
+
+    def __init__(self, path):
+        self._mmap, header, self.columns = map_columns_file(path, MAGIC)
+        self.season = header['season']
+        self.version = header['version']
+        self.rows = header['rows']
+        self.elements = header['elements']
+        self.names = header['names']
+        self.index = {name: row for row, name in enumerate(self.names)}
+        self.codes = self.columns['code']
+        self.code_index = {code: row for row, code in enumerate(self.codes) if code}
+        self.starts = self.columns['start']
+        self.nbytes = len(self._mmap) + INDEX_BYTES_PER_ROW * len(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def span(self, player_row, first_round=None, last_round=None):
+        """(start, stop) of a player's fixtures, optionally limited to a round range"""
+        start, stop = self.starts[player_row], self.starts[player_row + 1]
+        if first_round is not None or last_round is not None:
+            rounds = self.columns['round']
+            if first_round is not None:
+                start = bisect_left(rounds, first_round, start, stop)
+            if last_round is not None:
+                stop = bisect_right(rounds, last_round, start, stop)
+        return start, stop
+
+    def series(self, player_row, column, first_round=None, last_round=None):
+        """One column of a player's fixtures in round order, as a zero-copy view"""
+        start, stop = self.span(player_row, first_round, last_round)
+        return self.columns[column][start:stop]
+
+
+class GameweekStore(HistoryStore):
+    """Season gameweek tables, downloaded and converted once like the season totals"""
+
+    table_class = GameweekTable
+    stage_prefix = 'gameweeks'
+    description = 'gameweek data'
+
+    def __init__(self, cache_dir=CACHE_DIR, url_template=MERGED_GW_URL, raw_url_template=VAASTAV_RAW_URL, timeout=60, memory_budget=MEMORY_BUDGET):
+        super().__init__(cache_dir, url_template, raw_url_template, timeout, memory_budget)
+
+    def path_for(self, season):
+        return os.path.join(self.cache_dir, f"{season}.fplt")
+
+    def _convert(self, path, season, version, raw, players_raw):
+        elements, names, kickoffs, columns = parse_csv_body(parse_merged_gw, raw)
+        write_gameweek_file(path, season, version, elements, names, kickoffs, columns, parse_csv_body(parse_player_ids, players_raw))
+        return f"{len(elements)} gameweek rows"
+
+
+_store = GameweekStore()
+
+
+def load_gameweeks(season):
+    """Get a season's gameweek table from the shared store"""
+    return _store.load(season)
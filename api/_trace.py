@@ -0,0 +1,210 @@
+"""Lightweight per-request stage tracing and process-wide stage metrics.
+
+Code marks the parts of a request worth timing as stages::
+
+    with stage('history_fetch') as current:
+        body = fetch(url).body
+        current.bytes += len(body)
+
+A stage records its duration and, when set, the bytes it handled and
+whether it was served from a cache (``current.cache = 'hit'``, ``'miss'``
+or ``'stale'``). Every stage feeds the process-wide counters and latency
+histograms rendered by ``render_prometheus()`` for ``/api/metrics``.
+Inside a handler method wrapped with ``traced(route)`` the stages are also
+collected for that request and sent back as a ``Server-Timing`` header by
+``_response``.
+
+Stages started in worker threads join the request's trace when the task was
+submitted with ``in_context``. Those run concurrently, so the durations in
+one header can add up to more than the request took.
+"""
+import contextvars
+import functools
+from contextlib import contextmanager
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current = contextvars.ContextVar('fpl_trace', default=None)
+
+
+class Stage:
+    __slots__ = ('name', 'started', 'seconds', 'bytes', 'cache')
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        self.bytes = 0
+        self.cache = None
+
+
+class Trace:
+    """Stages recorded while serving one request"""
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.stages = []
+        # Set by _response when the response is an error payload
+        self.error = False
+        self._lock = threading.Lock()
+
+    def add(self, current):
+        with self._lock:
+            self.stages.append(current)
+
+    def server_timing(self):
+        """``Server-Timing`` header value: one entry per stage name (repeats summed), then the total"""
+        with self._lock:
+            stages = list(self.stages)
+        merged = {}
+        for current in stages:
+            entry = merged.setdefault(current.name, {'seconds': 0.0, 'count': 0, 'bytes': 0, 'cache': {}})
+            entry['seconds'] += current.seconds
+            entry['count'] += 1
+            entry['bytes'] += current.bytes
+            if current.cache:
+                entry['cache'][current.cache] = entry['cache'].get(current.cache, 0) + 1
+
+        metrics = []
+        for name, entry in merged.items():
+            details = []
+            if entry['count'] > 1:
+                details.append(f"{entry['count']}x")
+            for result, count in entry['cache'].items():
+                details.append(result if entry['count'] == 1 else f"{count} {result}")
+            if entry['bytes']:
+                details.append(f"{entry['bytes']} bytes")
+            description = f';desc="{", ".join(details)}"' if details else ''
+            metrics.append(f"{name};dur={entry['seconds'] * 1000:.1f}{description}")
+        metrics.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ', '.join(metrics)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        self.counts[i] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Metrics:
+    """Process-wide stage and request counters and latency histograms"""
+
+    def __init__(self):
+        self.stage_seconds = {}
+        self.stage_bytes = {}
+        self.stage_cache = {}
+        self.request_seconds = {}
+        self.request_errors = {}
+        self._lock = threading.Lock()
+
+    def observe_stage(self, current):
+        with self._lock:
+            self.stage_seconds.setdefault(current.name, Histogram()).observe(current.seconds)
+            if current.bytes:
+                self.stage_bytes[current.name] = self.stage_bytes.get(current.name, 0) + current.bytes
+            if current.cache:
+                key = (current.name, current.cache)
+                self.stage_cache[key] = self.stage_cache.get(key, 0) + 1
+
+    def observe_request(self, route, seconds, failed):
+        with self._lock:
+            self.request_seconds.setdefault(route, Histogram()).observe(seconds)
+            if failed:
+                self.request_errors[route] = self.request_errors.get(route, 0) + 1
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            lines = []
+            histogram_lines(lines, 'fpl_request_duration_seconds', 'Time to serve a request, by route', 'route', self.request_seconds)
+            lines.append('# HELP fpl_request_errors_total Requests answered with an error, by route')
+            lines.append('# TYPE fpl_request_errors_total counter')
+            for route, count in sorted(self.request_errors.items()):
+                lines.append(f'fpl_request_errors_total{{route="{route}"}} {count}')
+            histogram_lines(lines, 'fpl_stage_duration_seconds', 'Time spent in a request stage', 'stage', self.stage_seconds)
+            lines.append('# HELP fpl_stage_bytes_total Bytes fetched, parsed or encoded by a stage')
+            lines.append('# TYPE fpl_stage_bytes_total counter')
+            for name, total in sorted(self.stage_bytes.items()):
+                lines.append(f'fpl_stage_bytes_total{{stage="{name}"}} {total}')
+            lines.append('# HELP fpl_stage_cache_total Stage cache lookups by result (hit, miss or stale)')
+            lines.append('# TYPE fpl_stage_cache_total counter')
+            for (name, result), count in sorted(self.stage_cache.items()):
+                lines.append(f'fpl_stage_cache_total{{stage="{name}",result="{result}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def histogram_lines(lines, metric, help_text, label, histograms):
+    lines.append(f'# HELP {metric} {help_text}')
+    lines.append(f'# TYPE {metric} histogram')
+    for name, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{label}="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.sum:.6f}')
+        lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+
+
+_metrics = Metrics()
+
+
+@contextmanager
+def stage(name):
+    """Time the body as one stage; yields the Stage so bytes and cache can be set"""
+    current = Stage(name)
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - current.started
+        _metrics.observe_stage(current)
+        trace = _current.get()
+        if trace is not None:
+            trace.add(current)
+
+
+def current_trace():
+    """Trace of the request being served, or None outside a traced handler"""
+    return _current.get()
+
+
+def in_context(fn):
+    """Wrap fn so it runs in the caller's context (and request trace) on another thread"""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def traced(route):
+    """Decorator for a handler method: collect its stages and record the request under ``route``"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            trace = Trace(route)
+            token = _current.set(trace)
+            raised = True
+            try:
+                result = method(self, *args, **kwargs)
+                raised = False
+                return result
+            finally:
+                _current.reset(token)
+                _metrics.observe_request(route, time.perf_counter() - trace.started, raised or trace.error)
+        return wrapper
+    return decorate
+
+
+def render_prometheus():
+    return _metrics.render()
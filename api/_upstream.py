@@ -0,0 +1,186 @@
+"""Shared HTTP client for upstream fetches (FPL API, GitHub raw content).
+
+Connections are ``http.client`` keep-alive connections pooled per
+(scheme, host, port) and created with one process-wide SSL context, so
+repeated fetches skip the TCP and TLS handshakes. Transient failures
+(connection errors, 429 and 5xx responses) are retried with exponential
+backoff and full jitter, honouring ``Retry-After``. Bodies are requested
+gzip-compressed and capped at ``max_bytes`` after decompression.
+
+Errors are raised as ``urllib.error.HTTPError`` / ``URLError`` so callers
+written against ``urllib.request.urlopen`` keep working. A 304 Not Modified
+is returned as a normal response for the caller to handle.
+"""
+import gzip
+import http.client
+import io
+import os
+import random
+import ssl
+import threading
+import time
+import urllib.error
+from email.message import Message
+from urllib.parse import urljoin, urlsplit
+
+MAX_RESPONSE_BYTES = int(os.environ.get('FPL_UPSTREAM_MAX_BYTES', str(64 * 1024 * 1024)))
+RETRIES = int(os.environ.get('FPL_UPSTREAM_RETRIES', '3'))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+
+class Response:
+    def __init__(self, url, status, reason, headers, body):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+
+class UpstreamClient:
+    def __init__(self, retries=RETRIES, backoff=0.5, max_backoff=8.0, max_bytes=MAX_RESPONSE_BYTES, max_idle_per_host=4):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_bytes = max_bytes
+        self.max_idle_per_host = max_idle_per_host
+        self.ssl_context = ssl.create_default_context()
+        self.stats = {'requests': 0, 'connections': 0, 'reused': 0, 'retries': 0}
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=30, max_bytes=None):
+        """GET a URL, following redirects and retrying transient failures"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._get_with_retries(url, headers or {}, timeout, max_bytes)
+            location = response.headers.get('Location')
+            if response.status not in REDIRECT_STATUSES or not location:
+                break
+            url = urljoin(url, location)
+
+        if response.status >= 400:
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        return response
+
+    def _get_with_retries(self, url, headers, timeout, max_bytes):
+        attempt = 0
+        while True:
+            try:
+                response = self._request(url, headers, timeout, max_bytes)
+            except urllib.error.URLError:
+                # Raised by the size limits; a retry would download the same body
+                raise
+            except (OSError, http.client.HTTPException) as e:
+                if attempt >= self.retries:
+                    raise urllib.error.URLError(e)
+                delay = self._backoff_delay(attempt)
+            else:
+                if response.status not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                delay = self._backoff_delay(attempt, response.headers.get('Retry-After'))
+
+            attempt += 1
+            with self._lock:
+                self.stats['retries'] += 1
+            print(f"Retrying {url} in {delay:.2f}s (attempt {attempt + 1} of {self.retries + 1})")
+            time.sleep(delay)
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(self.max_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _request(self, url, headers, timeout, max_bytes):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        headers = {'Accept-Encoding': 'gzip', **headers}
+
+        connection, reused = self._acquire(key, timeout)
+        try:
+            try:
+                connection.request('GET', path, headers=headers)
+                raw = connection.getresponse()
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.BadStatusLine):
+                if not reused:
+                    raise
+                # The server closed an idle pooled connection; retry once on a fresh one
+                connection.close()
+                connection, reused = self._acquire(key, timeout, fresh=True)
+                connection.request('GET', path, headers=headers)
+                raw = connection.getresponse()
+
+            body = self._read_body(raw, max_bytes)
+            response_headers = Message()
+            for name, value in raw.getheaders():
+                response_headers[name] = value
+        except BaseException:
+            connection.close()
+            raise
+
+        if raw.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+
+        with self._lock:
+            self.stats['requests'] += 1
+        return Response(url, raw.status, raw.reason, response_headers, body)
+
+    def _read_body(self, raw, max_bytes):
+        length = raw.getheader('Content-Length')
+        if length is not None and length.isdigit() and int(length) > max_bytes:
+            raise urllib.error.URLError(f"Upstream response of {length} bytes exceeds the {max_bytes} byte limit")
+
+        body = raw.read(max_bytes + 1)
+        if len(body) > max_bytes:
+            raise urllib.error.URLError(f"Upstream response exceeds the {max_bytes} byte limit")
+
+        if (raw.getheader('Content-Encoding') or '').lower() == 'gzip':
+            body = gzip.GzipFile(fileobj=io.BytesIO(body)).read(max_bytes + 1)
+            if len(body) > max_bytes:
+                raise urllib.error.URLError(f"Decompressed upstream response exceeds the {max_bytes} byte limit")
+        return body
+
+    def _acquire(self, key, timeout, fresh=False):
+        if not fresh:
+            with self._lock:
+                idle = self._idle.get(key)
+                if idle:
+                    connection = idle.pop()
+                    self.stats['reused'] += 1
+                    connection.sock.settimeout(timeout)
+                    return connection, True
+
+        scheme, host, port = key
+        if scheme == 'https':
+            connection = http.client.HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context)
+        else:
+            connection = http.client.HTTPConnection(host, port, timeout=timeout)
+        with self._lock:
+            self.stats['connections'] += 1
+        return connection, False
+
+    def _release(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+
+_client = UpstreamClient()
+
+
+def fetch(url, headers=None, timeout=30, max_bytes=None):
+    """GET a URL through the shared pooled client"""
+    return _client.get(url, headers=headers, timeout=timeout, max_bytes=max_bytes)
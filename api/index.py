@@ -1,15 +1,12 @@
 from http.server import BaseHTTPRequestHandler
-import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _response import send_json
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        
         response = {
             'status': 'FPL 3-Year Analysis API is running',
             'version': '3.0.0',
@@ -22,9 +19,19 @@ class handler(BaseHTTPRequestHandler):
             'endpoints': [
                 '/api/ - API status and information',
                 '/api/players - 3-year player analysis and squad building',
+                '/api/players?position=Midfielder&max_price=8&min_consistency=60&min_seasons=2&search=&sort=consistency_score&order=desc&limit=50&offset=0&fields=name,price,three_year_metrics.consistency_score - Filtered, paginated player analysis',
                 '/api/players?optimal-squad&budget=100&formation=3-5-2 - Optimal squad generation',
+                '/api/players?optimal-squad&solver=exact&objective=points - Exact optimal squad (budget, formation, 3 per club)',
+                '/api/players?squad-frontier&formation=3-5-2&min_budget=80&max_budget=105&step=0.1 - Best squad for every budget + Pareto frontier',
+                '/api/players?full-squad&budget=100 - Best 15-man squad with XI, bench order and captain across formations',
                 '/api/players?player-search&q=player_name - Player history search',
-                '/api/stats - Summary statistics'
+                '/api/players?format=ndjson - Player analysis as newline-delimited JSON (summary line, then one player per line)',
+                '/api/3year-analysis?format=ndjson - Synthetic 3-year analysis as newline-delimited JSON',
+                '/api/leaderboards?metric=consistency_score&position=Midfielder&k=10 - Top players by one metric, overall or per position',
+                '/api/players?window=5 - Player analysis over the 5 most recent seasons (1-10, current season included); also /api/leaderboards',
+                '/api/players?seasons=2019-20,2021-22 - Player analysis over chosen past seasons plus the current one; also /api/leaderboards',
+                '/api/stats - Summary statistics',
+                '/api/metrics - Prometheus counters and latency histograms per route and stage (responses also carry Server-Timing headers)'
             ],
             'data_sources': [
                 'Fantasy Premier League Official API (current season)',
@@ -35,11 +42,12 @@ class handler(BaseHTTPRequestHandler):
             'last_updated': '2024-12-19T12:00:00Z'
         }
         
-        self.wfile.write(json.dumps(response).encode())
+        send_json(self, response)
     
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
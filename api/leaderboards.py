@@ -0,0 +1,96 @@
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bootstrap import bootstrap_age
+from _leaderboards import ALL_POSITIONS
+from _response import send_json
+from _seasons import parse_window
+from _trace import stage, traced
+from players import handler as PlayersHandler, LEADERBOARD_METRICS, SORT_KEYS, UpstreamTimeout
+
+DEFAULT_K = 10
+MAX_K = 100
+
+
+def parse_k(query_params):
+    """Leaderboard length from ``k=``, clamped to 1..MAX_K; raises ValueError when it is not an integer"""
+    value = query_params.get('k', [DEFAULT_K])[0]
+    try:
+        return min(MAX_K, max(1, int(value)))
+    except ValueError:
+        raise ValueError(f"k must be an integer, got '{value}'") from None
+
+
+class handler(BaseHTTPRequestHandler):
+    @traced('leaderboards')
+    def do_GET(self):
+        query_params = parse_qs(urlparse(self.path).query)
+        try:
+            k = parse_k(query_params)
+            seasons = parse_window(query_params)
+        except ValueError as e:
+            send_json(self, {'error': str(e), 'leaders': [], 'count': 0}, cacheable=False, status=400)
+            return
+
+        try:
+            metric = query_params.get('metric', ['total_3year_points'])[0]
+            position = query_params.get('position', [ALL_POSITIONS])[0]
+
+            if metric not in LEADERBOARD_METRICS:
+                send_json(self, {
+                    'error': f"Unknown metric '{metric}'. Use one of: {', '.join(LEADERBOARD_METRICS)}",
+                    'metrics': list(LEADERBOARD_METRICS)
+                }, cacheable=False, status=400)
+                return
+
+            # Same analysis snapshot (and its leaderboards) as /api/players
+            analysis = PlayersHandler.__new__(PlayersHandler)
+            analysis.analysis_seasons = seasons
+            snapshot = analysis.get_analysis_snapshot()
+            with stage('sort'):
+                boards = analysis.get_leaderboards(snapshot)
+                ranking = boards.ranking(metric, position)
+
+            value_of = SORT_KEYS[metric]
+            leaders = [{
+                'rank': rank,
+                'id': player['id'],
+                'name': player['name'],
+                'team': player['team'],
+                'position': player['position'],
+                'price': player['price'],
+                'value': value_of(player)
+            } for rank, player in enumerate(ranking[:k], 1)]
+
+            response = {
+                'metric': metric,
+                'position': position,
+                'k': k,
+                'leaders': leaders,
+                'count': len(leaders),
+                'total': len(ranking),
+                'metrics': list(LEADERBOARD_METRICS),
+                'data_age_seconds': bootstrap_age(analysis.data_updated_at)
+            }
+            send_json(self, response, version=analysis.data_version)
+
+        except Exception as e:
+            print(f"Error in leaderboards: {e}")
+            error_response = {
+                'error': str(e),
+                'leaders': [],
+                'count': 0,
+                'message': 'Failed to build leaderboard'
+            }
+            send_json(self, error_response, cacheable=False, status=504 if isinstance(e, UpstreamTimeout) else 200)
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
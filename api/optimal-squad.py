@@ -1,41 +1,54 @@
 from http.server import BaseHTTPRequestHandler
-import json
-import urllib.request
-import urllib.error
-import ssl
 from urllib.parse import urlparse, parse_qs
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bootstrap import load_bootstrap_versioned, bootstrap_age
+from _derived import derived_table
+from _response import send_json
+from _seed import stable_seed
+from _table import player_table
+from _trace import stage, traced
+from _solver import solve_squad
+
+# Position-based performance modifiers of the synthetic 3-year metrics
+POSITION_MODIFIERS = {
+    'Forward': {'base_points': 180, 'variance': 0.3, 'consistency_base': 60},
+    'Midfielder': {'base_points': 150, 'variance': 0.25, 'consistency_base': 70},
+    'Defender': {'base_points': 120, 'variance': 0.2, 'consistency_base': 75},
+    'Goalkeeper': {'base_points': 130, 'variance': 0.15, 'consistency_base': 80}
+}
 
 class handler(BaseHTTPRequestHandler):
+    @traced('optimal-squad')
     def do_GET(self):
         try:
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             # Parse query parameters
             query_params = parse_qs(urlparse(self.path).query)
             budget = float(query_params.get('budget', [100])[0])
             formation = query_params.get('formation', ['3-5-2'])[0]
             prioritize_consistency = query_params.get('consistency', ['true'])[0].lower() == 'true'
+            solver = query_params.get('solver', ['greedy'])[0]
             
             # Get current FPL data
-            ssl_context = ssl.create_default_context()
-            req = urllib.request.Request(
-                'https://fantasy.premierleague.com/api/bootstrap-static/',
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            )
-            
-            with urllib.request.urlopen(req, context=ssl_context, timeout=30) as response:
-                fpl_data = json.loads(response.read().decode('utf-8'))
+            fpl_data, version, updated_at = load_bootstrap_versioned()
             
-            # Process and enhance player data with 3-year metrics
-            enhanced_players = self.enhance_players_with_3year_data(fpl_data)
+            # Process and enhance player data with 3-year metrics (shared per bootstrap version)
+            with stage('metrics'):
+                enhanced_players = derived_table('optimal-squad', version, lambda: self.enhance_players_with_3year_data(fpl_data))
             
             # Generate optimal squad
-            optimal_squad = self.generate_optimal_squad(enhanced_players, budget, formation, prioritize_consistency)
+            solver_report = None
+            with stage('solve'):
+                if solver == 'exact':
+                    optimal_squad, solver_report = self.generate_exact_squad(
+                        enhanced_players, budget, formation, prioritize_consistency,
+                        objective=query_params.get('objective', ['points'])[0],
+                        time_limit=float(query_params.get('time_limit', [0.5])[0])
+                    )
+                else:
+                    optimal_squad = self.generate_optimal_squad(enhanced_players, budget, formation, prioritize_consistency)
             
             response_data = {
                 'success': True,
@@ -49,10 +62,13 @@ class handler(BaseHTTPRequestHandler):
                     sum(p.get('consistency_score', 50) for p in optimal_squad['all_players']) / 
                     len(optimal_squad['all_players']), 1
                 ),
-                'analysis_summary': self.generate_squad_analysis(optimal_squad['all_players'])
+                'analysis_summary': self.generate_squad_analysis(optimal_squad['all_players']),
+                'data_age_seconds': bootstrap_age(updated_at)
             }
+            if solver_report:
+                response_data['solver'] = solver_report
             
-            self.wfile.write(json.dumps(response_data).encode())
+            send_json(self, response_data, version=version)
             
         except Exception as e:
             print(f"Error in optimal-squad: {e}")
@@ -61,96 +77,83 @@ class handler(BaseHTTPRequestHandler):
                 'error': str(e),
                 'message': 'Failed to generate optimal squad'
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            send_json(self, error_response, cacheable=False)
 
     def enhance_players_with_3year_data(self, fpl_data):
         """Enhance current player data with simulated 3-year analysis"""
         teams = {team['id']: team['name'] for team in fpl_data.get('teams', [])}
         positions = {pos['id']: pos['singular_name'] for pos in fpl_data.get('element_types', [])}
         
-        enhanced_players = []
+        table = player_table(fpl_data)
+        ids, team_ids, position_ids = table['id'], table['team'], table['element_type']
+        points, ppg, form, ownership = table['total_points'], table['points_per_game'], table['form'], table['selected_by_percent']
+        web_names = table.text['web_name']
         
-        for player in fpl_data.get('elements', []):
-            if player.get('minutes', 0) >= 90:  # Only active players
-                # Base player data
-                base_data = {
-                    'id': player.get('id', 0),
-                    'name': player.get('web_name', 'Unknown'),
-                    'full_name': f"{player.get('first_name', '')} {player.get('second_name', '')}".strip(),
-                    'team': teams.get(player.get('team', 0), 'Unknown'),
-                    'position': positions.get(player.get('element_type', 0), 'Unknown'),
-                    'price': round(player.get('now_cost', 0) / 10, 1),
-                    'current_points': player.get('total_points', 0),
-                    'current_ppg': float(player.get('points_per_game', 0)) if player.get('points_per_game') else 0,
-                    'form': float(player.get('form', 0)) if player.get('form') else 0,
-                    'ownership': float(player.get('selected_by_percent', 0)) if player.get('selected_by_percent') else 0
-                }
-                
-                # Generate 3-year metrics
-                three_year_metrics = self.generate_3year_metrics(player, base_data)
-                
-                # Combine data
-                enhanced_player = {
-                    **base_data,
-                    **three_year_metrics,
-                    'value_score': self.calculate_comprehensive_value_score(base_data, three_year_metrics)
-                }
-                
-                enhanced_players.append(enhanced_player)
+        rows = table.active_rows()  # Only active players
         
-        return enhanced_players
-
-    def generate_3year_metrics(self, player_data, base_data):
-        """Generate realistic 3-year performance metrics"""
-        current_points = player_data.get('total_points', 0)
-        current_price = base_data['price']
-        position = base_data['position']
+        # Base player data, extended in place with the 3-year metrics
+        enhanced_players = [{
+            'id': ids[row],
+            'name': web_names[row] or 'Unknown',
+            'full_name': table.full_names[row],
+            'team': teams.get(team_ids[row], 'Unknown'),
+            'position': positions.get(position_ids[row], 'Unknown'),
+            'price': round(table.price[row], 1),
+            'current_points': points[row],
+            'current_ppg': ppg[row],
+            'form': form[row],
+            'ownership': ownership[row]
+        } for row in rows]
         
-        # Position-based performance modifiers
-        position_modifiers = {
-            'Forward': {'base_points': 180, 'variance': 0.3, 'consistency_base': 60},
-            'Midfielder': {'base_points': 150, 'variance': 0.25, 'consistency_base': 70},
-            'Defender': {'base_points': 120, 'variance': 0.2, 'consistency_base': 75},
-            'Goalkeeper': {'base_points': 130, 'variance': 0.15, 'consistency_base': 80}
-        }
-        
-        modifier = position_modifiers.get(position, position_modifiers['Midfielder'])
-        
-        # Generate variance based on player name hash for consistency
-        player_hash = hash(base_data['name']) % 100
-        variance_factor = 1 + ((player_hash - 50) / 100) * modifier['variance']
-        
-        # Calculate 3-year averages
-        avg_points_per_season = max(50, min(300, current_points * variance_factor))
-        
-        # Consistency score (higher for defenders/goalkeepers, more variable for forwards)
-        consistency_base = modifier['consistency_base']
-        consistency_variance = abs((player_hash % 30) - 15)
-        consistency_score = max(20, min(95, consistency_base + consistency_variance))
-        
-        # Injury risk (lower is better)
-        injury_base = 1.5 if position in ['Defender', 'Goalkeeper'] else 2.0
-        injury_risk = max(0, min(5, injury_base + ((player_hash % 20) - 10) / 5))
+        metrics = self.generate_3year_metrics_batch(
+            [points[row] for row in rows],
+            [player['position'] for player in enhanced_players],
+            [stable_seed(player['id'], modulus=100) for player in enhanced_players]
+        )
+        for player, three_year_metrics in zip(enhanced_players, metrics):
+            player.update(three_year_metrics)
+            player['value_score'] = self.calculate_comprehensive_value_score(player, player)
         
-        # Value trend (price appreciation/depreciation)
-        value_trend = ((player_hash % 40) - 20) / 20  # -1 to +1 range
-        
-        # Reliability (games played consistency)
-        reliability_base = 32 if position in ['Defender', 'Midfielder'] else 28
-        avg_games_per_season = max(15, min(38, reliability_base + ((player_hash % 10) - 5)))
-        reliable_starter = avg_games_per_season >= 30
+        return enhanced_players
+
+    def generate_3year_metrics_batch(self, current_points, positions, seeds):
+        """Synthetic 3-year metrics for whole columns of current points, positions and seeds (stable_seed % 100)"""
+        # Everything except the points projection depends only on (position, seed),
+        # so it is computed once per distinct pair and shared by reference
+        seeded = {}
+        for key in set(zip(positions, seeds)):
+            position, player_hash = key
+            modifier = POSITION_MODIFIERS.get(position, POSITION_MODIFIERS['Midfielder'])
+            injury_base = 1.5 if position in ['Defender', 'Goalkeeper'] else 2.0
+            reliability_base = 32 if position in ['Defender', 'Midfielder'] else 28
+            avg_games_per_season = max(15, min(38, reliability_base + ((player_hash % 10) - 5)))
+            seeded[key] = (
+                1 + ((player_hash - 50) / 100) * modifier['variance'],
+                {
+                    'consistency_score': round(max(20, min(95, modifier['consistency_base'] + abs((player_hash % 30) - 15))), 1),
+                    'injury_risk': round(max(0, min(5, injury_base + ((player_hash % 20) - 10) / 5)), 1),
+                    'value_trend': round(((player_hash % 40) - 20) / 20, 2),
+                    'avg_games_per_season': round(avg_games_per_season, 1),
+                    'reliable_starter': avg_games_per_season >= 30
+                }
+            )
         
-        return {
-            'predicted_points': round(avg_points_per_season, 1),
-            'consistency_score': round(consistency_score, 1),
-            'injury_risk': round(injury_risk, 1),
-            'value_trend': round(value_trend, 2),
-            'avg_games_per_season': round(avg_games_per_season, 1),
-            'reliable_starter': reliable_starter,
-            'three_year_total': round(avg_points_per_season * 3, 0),
-            'peak_season': round(avg_points_per_season * 1.2, 0),
-            'worst_season': round(avg_points_per_season * 0.8, 0)
-        }
+        metrics = []
+        for points, key in zip(current_points, zip(positions, seeds)):
+            variance_factor, fixed = seeded[key]
+            avg_points_per_season = max(50, min(300, points * variance_factor))
+            metrics.append({
+                'predicted_points': round(avg_points_per_season, 1),
+                'consistency_score': fixed['consistency_score'],
+                'injury_risk': fixed['injury_risk'],
+                'value_trend': fixed['value_trend'],
+                'avg_games_per_season': fixed['avg_games_per_season'],
+                'reliable_starter': fixed['reliable_starter'],
+                'three_year_total': round(avg_points_per_season * 3, 0),
+                'peak_season': round(avg_points_per_season * 1.2, 0),
+                'worst_season': round(avg_points_per_season * 0.8, 0)
+            })
+        return metrics
 
     def calculate_comprehensive_value_score(self, base_data, metrics):
         """Calculate comprehensive value score for player selection"""
@@ -165,13 +168,7 @@ class handler(BaseHTTPRequestHandler):
     def generate_optimal_squad(self, players, budget, formation, prioritize_consistency):
         """Generate optimal squad using advanced algorithm"""
         # Parse formation
-        formation_parts = formation.split('-')
-        required_positions = {
-            'Goalkeeper': 1,
-            'Defender': int(formation_parts[0]) if len(formation_parts) > 0 else 3,
-            'Midfielder': int(formation_parts[1]) if len(formation_parts) > 1 else 5,
-            'Forward': int(formation_parts[2]) if len(formation_parts) > 2 else 2
-        }
+        required_positions = self.parse_formation(formation)
         
         # Group players by position and sort by value score
         players_by_position = {}
@@ -228,6 +225,44 @@ class handler(BaseHTTPRequestHandler):
         
         return squad
 
+    def parse_formation(self, formation):
+        """Parse a 'DEF-MID-FWD' formation string into position requirements"""
+        formation_parts = formation.split('-')
+        return {
+            'Goalkeeper': 1,
+            'Defender': int(formation_parts[0]) if len(formation_parts) > 0 else 3,
+            'Midfielder': int(formation_parts[1]) if len(formation_parts) > 1 else 5,
+            'Forward': int(formation_parts[2]) if len(formation_parts) > 2 else 2
+        }
+
+    def generate_exact_squad(self, players, budget, formation, prioritize_consistency, objective='points', time_limit=0.5):
+        """Generate the squad that maximizes the objective under budget, formation and 3-per-club rule"""
+        if objective == 'value':
+            if prioritize_consistency:
+                score = lambda x: x['value_score'] * (x['consistency_score'] / 100)
+            else:
+                score = lambda x: x['value_score']
+        else:
+            objective = 'points'
+            score = lambda x: x['predicted_points']
+        
+        result = solve_squad(players, self.parse_formation(formation), budget, score, time_limit=time_limit)
+        
+        squad = {**result['squad'], 'all_players': []}
+        for position in ['Goalkeeper', 'Defender', 'Midfielder', 'Forward']:
+            squad['all_players'].extend(squad.get(position, []))
+        
+        return squad, {
+            'method': 'branch-and-bound',
+            'objective': objective,
+            'objective_value': round(result['objective'], 2),
+            'upper_bound': round(result['bound'], 2),
+            'optimal': result['optimal'],
+            'optimality_gap': round(result['gap'], 4),
+            'nodes': result['nodes'],
+            'elapsed_ms': result['elapsed_ms']
+        }
+
     def generate_squad_analysis(self, squad_players):
         """Generate analysis summary for the selected squad"""
         if not squad_players:
@@ -265,5 +300,6 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
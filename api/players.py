@@ -1,35 +1,163 @@
 from http.server import BaseHTTPRequestHandler
-import json
-import urllib.request
-import urllib.error
-import ssl
-import csv
+import hashlib
 from urllib.parse import urlparse, parse_qs
-from io import StringIO
 import statistics
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bootstrap import load_bootstrap, load_bootstrap_versioned, bootstrap_age
+from _history import load_season
+from _identity import identity_map
+from _incremental import IncrementalIndex
+from _leaderboards import Leaderboards
+from _search import SearchIndex
+from _seasons import DEFAULT_WINDOW, parse_window, window_seasons
+from _seed import CURRENT_SEASON
+from _timeseries import load_gameweeks
+from _table import player_table
+from _trace import in_context, stage, traced
+from _response import send_json, stream_json
+from _solver import solve_squad, budget_frontier, solve_full_squad
+
+# Upstream sources are fetched concurrently; each one gets its own deadline
+# measured from the start of the analysis, so the slowest single source
+# bounds the total latency. Late historical seasons are left out of the
+# response (and keep loading in the background for the next request);
+# the current season is required.
+HISTORICAL_SEASONS = list(window_seasons(DEFAULT_WINDOW))
+CURRENT_SEASON_TIMEOUT = 30
+HISTORICAL_SEASON_TIMEOUT = 15
+_fetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='fpl-fetch')
+# The bootstrap fetch gets its own worker so slow season loads queued on
+# _fetch_pool cannot hold up the one source every response needs
+_bootstrap_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='fpl-bootstrap')
+
+
+class UpstreamTimeout(Exception):
+    """The current-season data did not arrive within CURRENT_SEASON_TIMEOUT; answered with a 504"""
+
+# The analysis is materialized once per upstream data version (bootstrap
+# content hash + historical season versions) and season window, and shared
+# by every route. Snapshots of the most recently used windows are kept.
+MAX_ANALYSIS_WINDOWS = int(os.environ.get('FPL_ANALYSIS_WINDOWS', 4))
+_snapshots = OrderedDict()
+_snapshot_lock = threading.Lock()
+
+# /api/players query parameters that switch to the filtered, paginated view
+PAGE_PARAMS = ('limit', 'offset', 'fields', 'position', 'max_price', 'min_price', 'min_consistency', 'min_seasons', 'search', 'sort', 'order')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# Fields of a current-season player record; their values double as the
+# fingerprint the incremental analysis diffs between bootstrap refreshes
+CURRENT_FIELDS = ('id', 'name', 'full_name', 'team', 'position', 'price', 'total_points', 'ppg', 'goals', 'assists', 'clean_sheets', 'minutes', 'form', 'ownership')
+SORT_KEYS = {
+    'total_3year_points': lambda p: p['three_year_metrics']['total_3year_points'],
+    'avg_points_per_season': lambda p: p['three_year_metrics']['avg_points_per_season'],
+    'consistency_score': lambda p: p['three_year_metrics']['consistency_score'],
+    'availability_score': lambda p: p['three_year_metrics']['availability_score'],
+    'price': lambda p: p['price'],
+    'form': lambda p: p['form'],
+    'ownership': lambda p: p['ownership'],
+    'total_points': lambda p: p['total_points']
+}
+# Per-match form is the average over a player's last this-many appearances
+GAMEWEEK_FORM_MATCHES = 5
+# Leaderboard metrics, ranked highest first
+LEADERBOARD_METRICS = {name: (key, True) for name, key in SORT_KEYS.items()}
+# Paged view orderings, (sort key, descending) -> ranking; ties go to the lower player id in either direction
+PAGE_ORDERINGS = {
+    (name, descending): ((lambda p, key=key: (key(p), -p['id'])) if descending else (lambda p, key=key: (key(p), p['id'])), descending)
+    for name, key in SORT_KEYS.items() for descending in (True, False)
+}
+
+
+def parse_page_query(query_params):
+    """Filters, ordering and page of a paged /api/players request; raises ValueError on bad values"""
+    def number(name, default, parse=float):
+        value = query_params.get(name, [default])[0]
+        kind = 'an integer' if parse is int else 'a number'
+        try:
+            parsed = parse(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be {kind}, got '{value}'") from None
+        if parsed != parsed:
+            raise ValueError(f"{name} must be {kind}, got '{value}'")
+        return parsed
+
+    sort = query_params.get('sort', ['total_3year_points'])[0]
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort}'. Use one of: {', '.join(SORT_KEYS)}")
+    order = query_params.get('order', ['desc'])[0]
+    if order not in ('asc', 'desc'):
+        raise ValueError(f"order must be 'asc' or 'desc', got '{order}'")
+
+    return {
+        'position': query_params.get('position', ['All'])[0],
+        'max_price': number('max_price', 'inf'),
+        'min_price': number('min_price', 0),
+        'min_consistency': number('min_consistency', 0),
+        'min_seasons': number('min_seasons', 0, int),
+        'search': query_params.get('search', [''])[0].lower(),
+        'sort': sort,
+        'descending': order == 'desc',
+        'offset': max(0, number('offset', 0, int)),
+        # At least one player per page, so following next_offset always ends
+        'limit': min(MAX_PAGE_SIZE, max(1, number('limit', DEFAULT_PAGE_SIZE, int))),
+        'fields': [f for f in query_params.get('fields', [''])[0].split(',') if f],
+    }
+
 
 class handler(BaseHTTPRequestHandler):
+    @traced('players')
     def do_GET(self):
         try:
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
+            self.data_version = None
+            self.data_updated_at = None
+            self.error_status = 200
             
             # Parse URL to determine endpoint
             url_path = urlparse(self.path).path
             query_params = parse_qs(urlparse(self.path).query)
+            try:
+                self.analysis_seasons = parse_window(query_params)
+            except ValueError as e:
+                send_json(self, {'error': str(e), 'players': [], 'count': 0}, cacheable=False, status=400)
+                return
+            ndjson = query_params.get('format', ['json'])[0] == 'ndjson'
+            streamed = ndjson
             
             if 'optimal-squad' in self.path:
                 response = self.get_optimal_squad(query_params)
+            elif 'squad-frontier' in self.path:
+                response = self.get_squad_frontier(query_params)
+            elif 'full-squad' in self.path:
+                response = self.get_full_squad(query_params)
             elif 'player-search' in self.path:
                 response = self.search_player_history(query_params)
+            elif any(param in query_params for param in PAGE_PARAMS):
+                try:
+                    page_query = parse_page_query(query_params)
+                except ValueError as e:
+                    send_json(self, {'error': str(e), 'players': [], 'count': 0}, cacheable=False, status=400)
+                    return
+                response = self.get_players_page(page_query)
             else:
                 response = self.get_3year_analysis()
+                # The full analysis is the largest response; always stream it
+                streamed = True
             
-            self.wfile.write(json.dumps(response).encode())
+            if 'error' not in response:
+                response = {**response, 'data_age_seconds': bootstrap_age(self.data_updated_at)}
+            if streamed and 'error' not in response and isinstance(response.get('players'), list):
+                stream_json(self, response, 'players', version=self.data_version, ndjson=ndjson)
+            else:
+                send_json(self, response, version=self.data_version, cacheable='error' not in response,
+                          status=self.error_status if 'error' in response else 200)
             
         except Exception as e:
             print(f"Error: {e}")
@@ -39,159 +167,333 @@ class handler(BaseHTTPRequestHandler):
                 'count': 0,
                 'message': 'Failed to fetch player data'
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            send_json(self, error_response, cacheable=False, status=504 if isinstance(e, UpstreamTimeout) else 200)
 
-    def get_current_season_data(self):
+    def get_current_season_data(self, fpl_data=None):
         """Get current season data from FPL API"""
-        ssl_context = ssl.create_default_context()
-        req = urllib.request.Request(
-            'https://fantasy.premierleague.com/api/bootstrap-static/',
-            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-        )
-        
-        with urllib.request.urlopen(req, context=ssl_context, timeout=30) as response:
-            fpl_data = json.loads(response.read().decode('utf-8'))
+        if fpl_data is None:
+            fpl_data = load_bootstrap()
         
+        return {full_name: dict(zip(CURRENT_FIELDS, values)) for full_name, values in self.current_season_values(fpl_data).items()}
+
+    def current_season_values(self, fpl_data):
+        """Current-season field values (in CURRENT_FIELDS order) of every active player, keyed by full name"""
         teams = {team['id']: team['name'] for team in fpl_data.get('teams', [])}
         positions = {pos['id']: pos['singular_name'] for pos in fpl_data.get('element_types', [])}
         
-        current_players = {}
-        for player in fpl_data.get('elements', []):
-            if player.get('minutes', 0) >= 90:
-                full_name = f"{player.get('first_name', '')} {player.get('second_name', '')}".strip()
-                current_players[full_name] = {
-                    'id': player.get('id', 0),
-                    'name': player.get('web_name', 'Unknown'),
-                    'full_name': full_name,
-                    'team': teams.get(player.get('team', 0), 'Unknown'),
-                    'position': positions.get(player.get('element_type', 0), 'Unknown'),
-                    'price': round(player.get('now_cost', 0) / 10, 1),
-                    'total_points': player.get('total_points', 0),
-                    'ppg': float(player.get('points_per_game', 0)) if player.get('points_per_game') else 0,
-                    'goals': player.get('goals_scored', 0),
-                    'assists': player.get('assists', 0),
-                    'clean_sheets': player.get('clean_sheets', 0),
-                    'minutes': player.get('minutes', 0),
-                    'form': float(player.get('form', 0)) if player.get('form') else 0,
-                    'ownership': float(player.get('selected_by_percent', 0)) if player.get('selected_by_percent') else 0
-                }
+        table = player_table(fpl_data)
+        ids, team_ids, position_ids = table['id'], table['team'], table['element_type']
+        points, ppg, form, ownership = table['total_points'], table['points_per_game'], table['form'], table['selected_by_percent']
+        goals, assists, minutes, clean_sheets = table['goals_scored'], table['assists'], table['minutes'], table['clean_sheets']
+        web_names = table.text['web_name']
         
-        return current_players
+        current_values = {}
+        for row in table.active_rows():
+            full_name = table.full_names[row]
+            current_values[full_name] = (
+                ids[row], web_names[row] or 'Unknown', full_name,
+                teams.get(team_ids[row], 'Unknown'), positions.get(position_ids[row], 'Unknown'),
+                round(table.price[row], 1), points[row], ppg[row], goals[row], assists[row],
+                clean_sheets[row], minutes[row], form[row], ownership[row]
+            )
+        
+        return current_values
+
+    def get_historical_data(self, seasons=HISTORICAL_SEASONS, timeout=HISTORICAL_SEASON_TIMEOUT):
+        """Get real historical data from the on-disk season store, loading seasons concurrently"""
+        return self.load_seasons([(load_season, 'players')], seasons, timeout)[0]
 
-    def get_historical_data(self, seasons=['2022-23', '2023-24']):
-        """Get real historical data from GitHub"""
-        historical_data = {}
+    def load_seasons(self, sources, seasons=HISTORICAL_SEASONS, timeout=HISTORICAL_SEASON_TIMEOUT):
+        """Load every season from each (loader, label) source concurrently under one deadline"""
+        deadline = time.monotonic() + timeout
+        pending = [(label, {season: _fetch_pool.submit(in_context(loader), season) for season in seasons}) for loader, label in sources]
+        loaded_sources = []
         
-        for season in seasons:
-            try:
-                print(f"Fetching real data for {season}...")
-                url = f"https://raw.githubusercontent.com/vaastav/Fantasy-Premier-League/master/data/{season}/cleaned_players.csv"
-                
-                req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-                with urllib.request.urlopen(req, timeout=30) as response:
-                    csv_content = response.read().decode('utf-8')
-                
-                season_data = {}
-                csv_reader = csv.DictReader(StringIO(csv_content))
-                
-                for row in csv_reader:
-                    try:
-                        first_name = row.get('first_name', '').strip()
-                        second_name = row.get('second_name', '').strip()
-                        full_name = f"{first_name} {second_name}".strip()
-                        
-                        if not full_name:
-                            continue
-                        
-                        position_map = {'1': 'Goalkeeper', '2': 'Defender', '3': 'Midfielder', '4': 'Forward'}
-                        position = position_map.get(str(row.get('element_type', '0')), 'Unknown')
-                        
-                        season_data[full_name] = {
-                            'season': season,
-                            'total_points': int(row.get('total_points', 0)),
-                            'goals': int(row.get('goals_scored', 0)),
-                            'assists': int(row.get('assists', 0)),
-                            'clean_sheets': int(row.get('clean_sheets', 0)),
-                            'minutes': int(row.get('minutes', 0)),
-                            'games_played': max(1, int(row.get('minutes', 0)) // 90),
-                            'start_cost': float(row.get('start_cost', 0)) / 10 if row.get('start_cost') else 0,
-                            'end_cost': float(row.get('end_cost', 0)) / 10 if row.get('end_cost') else 0,
-                            'position': position,
-                            'team': row.get('team', 'Unknown'),
-                            'ppg': float(row.get('points_per_game', 0)) if row.get('points_per_game') else 0
-                        }
-                    except (ValueError, TypeError):
-                        continue
-                
-                historical_data[season] = season_data
-                print(f"Loaded {len(season_data)} players for {season}")
-                
-            except Exception as e:
-                print(f"Failed to load {season}: {e}")
-                continue
+        for label, futures in pending:
+            loaded = {}
+            for season, future in futures.items():
+                try:
+                    loaded[season] = future.result(timeout=max(0, deadline - time.monotonic()))
+                    print(f"Loaded {len(loaded[season])} {label} for {season}")
+                    
+                except FutureTimeout:
+                    print(f"Timed out loading {label} for {season} after {timeout}s")
+                except Exception as e:
+                    print(f"Failed to load {label} for {season}: {e}")
+            loaded_sources.append(loaded)
+        
+        return loaded_sources
+
+    def get_analysis_snapshot(self):
+        """Get the analysis of the request's season window, building it only when upstream data changed
         
-        return historical_data
+        Seasons are loaded on first use; each window keeps its own snapshot (and
+        incremental engine), so switching between windows rebuilds nothing.
+        """
+        seasons = getattr(self, 'analysis_seasons', None)
+        if seasons is None:
+            seasons = tuple(HISTORICAL_SEASONS)
+        started = time.monotonic()
+        bootstrap_future = _bootstrap_pool.submit(in_context(load_bootstrap_versioned))
+        historical_data, gameweek_data = self.load_seasons([(load_season, 'players'), (load_gameweeks, 'gameweek players')], seasons)
+        try:
+            fpl_data, bootstrap_version, updated_at = bootstrap_future.result(timeout=max(0, started + CURRENT_SEASON_TIMEOUT - time.monotonic()))
+        except FutureTimeout:
+            # The route handlers turn this into an error dict; do_GET sends it as a 504
+            self.error_status = 504
+            raise UpstreamTimeout(f"Timed out after {CURRENT_SEASON_TIMEOUT}s waiting for current-season data from the FPL API")
+        key = (bootstrap_version, tuple((season, table.version) for season, table in historical_data.items()) + tuple((f"{season} gameweeks", table.version) for season, table in gameweek_data.items()))
+        
+        with stage('analysis') as current, _snapshot_lock:
+            current.cache = 'hit'
+            snapshot = _snapshots.get(seasons)
+            if snapshot is None:
+                snapshot = _snapshots[seasons] = {'key': None}
+                while len(_snapshots) > MAX_ANALYSIS_WINDOWS:
+                    _snapshots.popitem(last=False)
+            _snapshots.move_to_end(seasons)
+            
+            if snapshot['key'] != key:
+                current.cache = 'miss'
+                # Same historical seasons as the previous snapshot: only players whose
+                # current-season data changed are rebuilt; otherwise start from scratch
+                engine = snapshot.get('engine')
+                if engine is None or snapshot['key'][1] != key[1]:
+                    engine = snapshot['engine'] = self.new_analysis_engine()
+                try:
+                    analysis = self.build_3year_analysis(fpl_data, historical_data, engine, gameweek_data, seasons)
+                except Exception:
+                    snapshot['engine'] = None
+                    raise
+                snapshot.update(self.index_analysis(engine))
+                snapshot['analysis'] = analysis
+                snapshot['version'] = hashlib.sha1(repr((seasons, key)).encode('utf-8')).hexdigest()
+                snapshot['key'] = key
+            self.data_version = snapshot['version']
+            # A matching key means the same payload version, so its confirmation time applies
+            self.data_updated_at = updated_at
+            return dict(snapshot)
+
+    def new_analysis_engine(self):
+        """Incremental index of (value_score, player) entries ranked like a full rebuild"""
+        return IncrementalIndex(
+            rank_key=lambda entry: -entry[1]['three_year_metrics']['total_3year_points'],
+            group_key=lambda entry: entry[1]['position'],
+            group_rank_key=lambda entry: (-entry[0], -entry[1]['three_year_metrics']['total_3year_points'])
+        )
+
+    def index_analysis(self, engine):
+        """Per-route lookup structures for an analysis snapshot (search index and leaderboards are built on first use)"""
+        return {
+            'players_by_position': engine.grouped(),
+            'value_scores': {player_id: entry[0] for player_id, entry in engine.records.items()},
+            'search': {},
+            'leaderboards': {},
+            'frontiers': {},
+            'full_squads': {}
+        }
+
+    def calculate_value_score(self, player):
+        """Value score (3-year points per current price) used to rank squad candidates"""
+        metrics = player['three_year_metrics']
+        value_score = metrics['avg_points_per_season'] / max(player['price'], 0.1)
+        consistency_bonus = metrics['consistency_score'] / 100
+        reliability_bonus = 1.2 if metrics['reliable_starter'] else 1.0
+        return value_score * consistency_bonus * reliability_bonus
+
+    def get_search_index(self, snapshot):
+        search_index = snapshot['search'].get('index')
+        if search_index is None:
+            search_index = snapshot['search']['index'] = SearchIndex(snapshot['analysis']['players'])
+        return search_index
+
+    def get_leaderboards(self, snapshot):
+        boards = snapshot['leaderboards'].get('boards')
+        if boards is None:
+            boards = snapshot['leaderboards']['boards'] = Leaderboards(snapshot['analysis']['players'], {**LEADERBOARD_METRICS, **PAGE_ORDERINGS})
+        return boards
 
     def get_3year_analysis(self):
         """Get complete 3-year analysis"""
         try:
-            current_data = self.get_current_season_data()
-            historical_data = self.get_historical_data()
-            
-            three_year_players = []
-            
-            for player_name, current_stats in current_data.items():
-                # Build 3-year profile
-                player_profile = {
-                    **current_stats,
-                    'season_data': {
-                        '2024-25': {
-                            'season': '2024-25',
-                            'total_points': current_stats['total_points'],
-                            'goals': current_stats['goals'],
-                            'assists': current_stats['assists'],
-                            'clean_sheets': current_stats['clean_sheets'],
-                            'minutes': current_stats['minutes'],
-                            'games_played': max(1, current_stats['minutes'] // 90),
-                            'ppg': current_stats['ppg'],
-                            'price_start': current_stats['price'],
-                            'price_end': current_stats['price']
-                        }
-                    },
-                    'seasons_found': 1
-                }
-                
-                # Add historical seasons
-                for season in ['2023-24', '2022-23']:
-                    if season in historical_data and player_name in historical_data[season]:
-                        player_profile['season_data'][season] = historical_data[season][player_name]
-                        player_profile['seasons_found'] += 1
-                
-                # Calculate 3-year metrics
-                metrics = self.calculate_3year_metrics(player_profile['season_data'])
-                player_profile['three_year_metrics'] = metrics
-                
-                three_year_players.append(player_profile)
+            return self.get_analysis_snapshot()['analysis']
             
-            # Sort by 3-year total points
-            three_year_players.sort(key=lambda x: x['three_year_metrics']['total_3year_points'], reverse=True)
+        except Exception as e:
+            print(f"Error in 3-year analysis: {e}")
+            return {
+                'error': str(e),
+                'players': [],
+                'count': 0
+            }
+
+    def get_players_page(self, query):
+        """Filtered, sorted, paginated and field-projected view of the 3-year analysis (``query`` from parse_page_query)"""
+        try:
+            snapshot = self.get_analysis_snapshot()
+            analysis = snapshot['analysis']
+            
+            position, search = query['position'], query['search']
+            min_price, max_price, min_consistency = query['min_price'], query['max_price'], query['min_consistency']
+            min_seasons = query['min_seasons']
+            offset, limit, fields = query['offset'], query['limit'], query['fields']
+            
+            # Rankings are kept per snapshot by its leaderboards
+            with stage('sort'):
+                ordering = self.get_leaderboards(snapshot).ranking((query['sort'], query['descending']))
+            
+            # Same filters as the dashboard's position / max price / min consistency / search controls
+            with stage('filter'):
+                matches = [
+                    player for player in ordering
+                    if (position == 'All' or player['position'] == position)
+                    and min_price <= player['price'] <= max_price
+                    and player['three_year_metrics'].get('consistency_score', 0) >= min_consistency
+                    and player['seasons_found'] >= min_seasons
+                    and (not search or search in player['name'].lower() or search in player['team'].lower())
+                ]
+                
+                page = matches[offset:offset + limit]
+                if fields:
+                    page = [self.project_fields(player, fields) for player in page]
             
+            total = len(matches)
+            window = len(analysis['seasons_analyzed']) + len(analysis['seasons_missing'])
+            full_3year_data = sum(1 for p in matches if p['seasons_found'] == window)
             return {
-                'players': three_year_players,
-                'count': len(three_year_players),
-                'data_source': 'Real 3-Year Historical Data',
-                'seasons_analyzed': ['2022-23', '2023-24', '2024-25'],
-                'last_updated': '2024-12-19T12:00:00Z'
+                'players': page,
+                'count': len(page),
+                'total': total,
+                'offset': offset,
+                'limit': limit,
+                'next_offset': offset + limit if offset + limit < total else None,
+                'summary': {
+                    'total_analyzed': total,
+                    'full_3year_data': full_3year_data,
+                    'avg_consistency': round(sum(p['three_year_metrics'].get('consistency_score', 0) for p in matches) / total, 1) if total else 0,
+                    'reliable_starters': sum(1 for p in matches if p['three_year_metrics'].get('reliable_starter')),
+                    'data_quality': round(full_3year_data / total * 100, 1) if total else 0
+                },
+                'data_source': analysis['data_source'],
+                'seasons_analyzed': analysis['seasons_analyzed'],
+                'seasons_missing': analysis['seasons_missing'],
+                'last_updated': analysis['last_updated']
             }
             
         except Exception as e:
-            print(f"Error in 3-year analysis: {e}")
+            print(f"Error in players page: {e}")
             return {
                 'error': str(e),
                 'players': [],
                 'count': 0
             }
 
+    def project_fields(self, player, fields):
+        """Keep only the requested fields; 'a.b' selects a nested field"""
+        projected = {}
+        for field in fields:
+            key, _, nested = field.partition('.')
+            if key not in player:
+                continue
+            if nested and isinstance(player[key], dict):
+                if nested in player[key]:
+                    projected.setdefault(key, {})[nested] = player[key][nested]
+            else:
+                projected[key] = player[key]
+        return projected
+
+    def build_3year_analysis(self, fpl_data, historical_data, engine=None, gameweek_data=None, seasons=HISTORICAL_SEASONS):
+        """Build the multi-season profile of every active player
+        
+        With the engine of the previous build, only players whose current-season
+        values changed are rebuilt and the rankings are repaired in place. With
+        ``gameweek_data`` ({season: GameweekTable}) each profile also gets
+        per-match metrics. ``seasons`` are the historical seasons requested;
+        those missing from ``historical_data`` are reported as such.
+        """
+        if engine is None:
+            engine = self.new_analysis_engine()
+        
+        # Past seasons are joined on the stable player code (name as fallback);
+        # the matched rows are part of each player's fingerprint
+        with stage('identity'):
+            table = player_table(fpl_data)
+            identity = identity_map(table, historical_data)
+            gameweek_identity = identity_map(table, gameweek_data) if gameweek_data is not None else None
+            inputs = {}
+            current_rows = []
+            for order, (player_name, values) in enumerate(self.current_season_values(fpl_data).items()):
+                row = table.index[values[0]]
+                season_rows = identity.season_rows(row)
+                gameweek_rows = gameweek_identity.season_rows(row) if gameweek_identity else {}
+                current_rows.append(row)
+                fingerprint = (values, tuple(season_rows.items()), tuple(gameweek_rows.items()))
+                inputs[values[0]] = (order, fingerprint, (player_name, values, season_rows, gameweek_rows))
+        
+        def build(source):
+            player_profile = self.build_player_profile(source[0], dict(zip(CURRENT_FIELDS, source[1])), historical_data, source[2])
+            if gameweek_data is not None:
+                player_profile['gameweek_metrics'] = self.calculate_gameweek_metrics(gameweek_data, source[3])
+            return (self.calculate_value_score(player_profile), player_profile)
+        
+        with stage('metrics'):
+            changes = engine.refresh(inputs, build)
+        print(f"Analysis refreshed: {len(changes['added'])} added, {len(changes['changed'])} changed, {len(changes['moved'])} re-ranked, {len(changes['removed'])} removed")
+        
+        # Ranked by 3-year total points
+        with stage('sort'):
+            three_year_players = [entry[1] for entry in engine.ranked()]
+        
+        analysis = {
+            'players': three_year_players,
+            'count': len(three_year_players),
+            'data_source': 'Real 3-Year Historical Data',
+            'seasons_analyzed': sorted(list(historical_data) + [CURRENT_SEASON]),
+            'seasons_missing': [s for s in seasons if s not in historical_data],
+            'identity_coverage': identity.coverage(current_rows),
+            'last_updated': '2024-12-19T12:00:00Z'
+        }
+        if gameweek_identity is not None:
+            analysis['gameweek_coverage'] = gameweek_identity.coverage(current_rows)
+        return analysis
+
+    def build_player_profile(self, player_name, player_profile, historical_data, season_rows=None):
+        """Extend a current season record in place into its 3-year profile
+        
+        ``season_rows`` ({season: row}, from the identity map) locates the player
+        in each past season; without it the seasons are searched by full name.
+        """
+        player_profile['season_data'] = {
+            CURRENT_SEASON: {
+                'season': CURRENT_SEASON,
+                'total_points': player_profile['total_points'],
+                'goals': player_profile['goals'],
+                'assists': player_profile['assists'],
+                'clean_sheets': player_profile['clean_sheets'],
+                'minutes': player_profile['minutes'],
+                'games_played': max(1, player_profile['minutes'] // 90),
+                'ppg': player_profile['ppg'],
+                'price_start': player_profile['price'],
+                'price_end': player_profile['price']
+            }
+        }
+        player_profile['seasons_found'] = 1
+        
+        # Add historical seasons, most recent first
+        for season in sorted(historical_data, reverse=True):
+            if season_rows is not None:
+                if season not in season_rows:
+                    continue
+                player_profile['season_data'][season] = historical_data[season].row(season_rows[season])
+            elif player_name in historical_data[season]:
+                player_profile['season_data'][season] = historical_data[season][player_name]
+            else:
+                continue
+            player_profile['seasons_found'] += 1
+        
+        # Calculate 3-year metrics
+        player_profile['three_year_metrics'] = self.calculate_3year_metrics(player_profile['season_data'])
+        return player_profile
+
     def calculate_3year_metrics(self, season_data):
         """Calculate metrics from real 3-year data"""
         seasons = list(season_data.values())
@@ -243,63 +545,83 @@ class handler(BaseHTTPRequestHandler):
             'seasons_analyzed': len(seasons)
         }
 
+    def calculate_gameweek_metrics(self, gameweek_data, gameweek_rows):
+        """Consistency, form and availability from a player's per-match history"""
+        points = []
+        minutes = []
+        for season in sorted(gameweek_rows):
+            table = gameweek_data[season]
+            points.extend(table.series(gameweek_rows[season], 'total_points'))
+            minutes.extend(table.series(gameweek_rows[season], 'minutes'))
+        
+        if not points:
+            return None
+        
+        played = [p for p, m in zip(points, minutes) if m > 0]
+        appearances = len(played)
+        
+        # Consistency from match-to-match variation of points when playing
+        if appearances > 1:
+            cv = statistics.pstdev(played) / max(statistics.mean(played), 1)
+            consistency_score = max(0, min(100, 100 - (cv * 50)))
+        else:
+            consistency_score = 50
+        
+        recent = played[-GAMEWEEK_FORM_MATCHES:]
+        
+        return {
+            'matches': len(points),
+            'appearances': appearances,
+            'starts': sum(1 for m in minutes if m >= 60),
+            'points_per_appearance': round(sum(played) / appearances, 2) if appearances else 0,
+            'consistency_score': round(consistency_score, 1),
+            'form': round(sum(recent) / len(recent), 1) if recent else 0,
+            'availability_score': round(sum(minutes) / (len(minutes) * 90) * 100, 1),
+            'blank_rate': round(sum(1 for p in played if p <= 2) / appearances * 100, 1) if appearances else 0,
+            'seasons': sorted(gameweek_rows)
+        }
+
     def get_optimal_squad(self, query_params):
         """Generate optimal squad based on 3-year data"""
         try:
             budget = float(query_params.get('budget', [100])[0])
             formation = query_params.get('formation', ['3-5-2'])[0]
+            solver = query_params.get('solver', ['greedy'])[0]
             
-            # Get 3-year analysis
-            analysis = self.get_3year_analysis()
-            players = analysis['players']
-            
-            # Parse formation
-            parts = formation.split('-')
-            requirements = {
-                'Goalkeeper': 1,
-                'Defender': int(parts[0]) if len(parts) > 0 else 3,
-                'Midfielder': int(parts[1]) if len(parts) > 1 else 5,
-                'Forward': int(parts[2]) if len(parts) > 2 else 2
-            }
+            # Players grouped by position and presorted by value score
+            snapshot = self.get_analysis_snapshot()
+            players_by_position = snapshot['players_by_position']
             
-            # Group by position and sort by value
-            players_by_position = {}
-            for player in players:
-                position = player['position']
-                if position not in players_by_position:
-                    players_by_position[position] = []
-                
-                # Calculate value score (3-year points per current price)
-                value_score = player['three_year_metrics']['avg_points_per_season'] / max(player['price'], 0.1)
-                consistency_bonus = player['three_year_metrics']['consistency_score'] / 100
-                reliability_bonus = 1.2 if player['three_year_metrics']['reliable_starter'] else 1.0
-                
-                player['value_score'] = value_score * consistency_bonus * reliability_bonus
-                players_by_position[position].append(player)
-            
-            # Sort each position by value score
-            for position in players_by_position:
-                players_by_position[position].sort(key=lambda x: x['value_score'], reverse=True)
+            requirements = self.parse_formation(formation)
             
             # Select optimal squad
             squad = {position: [] for position in requirements.keys()}
             squad['all_players'] = []
             remaining_budget = budget
+            solver_report = None
             
-            for position, required_count in requirements.items():
-                if position in players_by_position:
-                    selected = 0
-                    for player in players_by_position[position]:
-                        if selected < required_count and player['price'] <= remaining_budget:
-                            squad[position].append(player)
-                            squad['all_players'].append(player)
-                            remaining_budget -= player['price']
-                            selected += 1
+            if solver == 'exact':
+                with stage('solve'):
+                    squad, solver_report = self.select_exact_squad(snapshot, requirements, budget, query_params)
+                remaining_budget = budget - sum(p['price'] for p in squad['all_players'])
+            else:
+                for position, required_count in requirements.items():
+                    if position in players_by_position:
+                        selected = 0
+                        for value_score, player in players_by_position[position]:
+                            if selected >= required_count:
+                                break
+                            if player['price'] <= remaining_budget:
+                                player = {**player, 'value_score': value_score}
+                                squad[position].append(player)
+                                squad['all_players'].append(player)
+                                remaining_budget -= player['price']
+                                selected += 1
             
             total_cost = budget - remaining_budget
             predicted_points = sum(p['three_year_metrics']['avg_points_per_season'] for p in squad['all_players'])
             
-            return {
+            response = {
                 'success': True,
                 'formation': formation,
                 'budget': budget,
@@ -307,12 +629,201 @@ class handler(BaseHTTPRequestHandler):
                 'total_cost': round(total_cost, 1),
                 'remaining_budget': round(remaining_budget, 1),
                 'predicted_total_points': round(predicted_points, 1),
-                'squad_analysis': {
-                    'avg_consistency': round(sum(p['three_year_metrics']['consistency_score'] for p in squad['all_players']) / len(squad['all_players']), 1),
-                    'reliable_starters': sum(1 for p in squad['all_players'] if p['three_year_metrics']['reliable_starter']),
-                    'data_quality': f"{len(squad['all_players'])} players with 3-year analysis"
+                'squad_analysis': self.summarize_squad(squad['all_players'])
+            }
+            if solver_report:
+                response['solver'] = solver_report
+            return response
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def parse_formation(self, formation):
+        """Parse a 'DEF-MID-FWD' formation string into position requirements"""
+        parts = formation.split('-')
+        return {
+            'Goalkeeper': 1,
+            'Defender': int(parts[0]) if len(parts) > 0 else 3,
+            'Midfielder': int(parts[1]) if len(parts) > 1 else 5,
+            'Forward': int(parts[2]) if len(parts) > 2 else 2
+        }
+
+    def summarize_squad(self, squad_players):
+        """Squad-level consistency and reliability summary"""
+        return {
+            'avg_consistency': round(sum(p['three_year_metrics']['consistency_score'] for p in squad_players) / len(squad_players), 1),
+            'reliable_starters': sum(1 for p in squad_players if p['three_year_metrics']['reliable_starter']),
+            'data_quality': f"{len(squad_players)} players with 3-year analysis"
+        }
+
+    def get_squad_frontier(self, query_params):
+        """Best squad for every budget in a range, plus the cost vs predicted points Pareto frontier"""
+        try:
+            formation = query_params.get('formation', ['3-5-2'])[0]
+            min_budget = float(query_params.get('min_budget', [80])[0])
+            max_budget = float(query_params.get('max_budget', [105])[0])
+            step = float(query_params.get('step', [0.1])[0])
+            time_limit = float(query_params.get('time_limit', [2.0])[0])
+            
+            snapshot = self.get_analysis_snapshot()
+            cache_key = (formation, min_budget, max_budget, step, time_limit)
+            cached = snapshot['frontiers'].get(cache_key)
+            if cached is not None:
+                return cached
+            
+            result = budget_frontier(
+                snapshot['analysis']['players'], self.parse_formation(formation),
+                min_budget, max_budget, step,
+                lambda p: p['three_year_metrics']['avg_points_per_season'],
+                time_limit=time_limit
+            )
+            
+            value_scores = snapshot['value_scores']
+            players = {}
+            
+            def entry(option):
+                for player in option['players']:
+                    players.setdefault(player['id'], {**player, 'value_score': value_scores[player['id']]})
+                return {
+                    'budget': option['budget'],
+                    'player_ids': [player['id'] for player in option['players']],
+                    'total_cost': round(option['cost'], 1),
+                    'remaining_budget': round(option['budget'] - option['cost'], 1),
+                    'predicted_total_points': round(option['objective'], 1),
+                    'squad_analysis': self.summarize_squad(option['players']),
+                    'method': option['method'],
+                    'optimal': option['optimal']
+                }
+            
+            response = {
+                'success': True,
+                'formation': formation,
+                'budgets': [entry(option) for option in result['budgets']],
+                'frontier': [
+                    {
+                        'total_cost': round(option['cost'], 1),
+                        'predicted_total_points': round(option['objective'], 1),
+                        'player_ids': [player['id'] for player in option['players']]
+                    }
+                    for option in result['frontier']
+                ],
+                'players': players,
+                # False when the shared time limit left a budget unproven or unsolved
+                'optimal': result['optimal'],
+                'unsolved_budgets': result['unsolved_budgets'],
+                'elapsed_ms': result['elapsed_ms']
+            }
+            snapshot['frontiers'][cache_key] = response
+            return response
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def get_full_squad(self, query_params):
+        """Best 15-man squad with starting XI, bench order and captaincy across the valid formations
+
+        Formations are searched against a shared incumbent, so ``formations``
+        holds the squads found on the way and ``pruned_formations`` those
+        proven unable to beat the best one.
+        """
+        try:
+            budget = float(query_params.get('budget', [100])[0])
+            bench_weight = float(query_params.get('bench_weight', [0.1])[0])
+            time_limit = float(query_params.get('time_limit', [2.0])[0])
+            
+            snapshot = self.get_analysis_snapshot()
+            cache_key = (budget, bench_weight, time_limit)
+            cached = snapshot['full_squads'].get(cache_key)
+            if cached is not None:
+                return cached
+            
+            value_scores = snapshot['value_scores']
+            points = lambda p: p['three_year_metrics']['avg_points_per_season']
+            results = solve_full_squad(
+                snapshot['analysis']['players'], budget, points,
+                bench_weight=bench_weight, time_limit=time_limit
+            )
+            
+            formations = {}
+            # Formations pruned because their bound could not beat the best squad found
+            pruned = {}
+            for formation, result in results['formations'].items():
+                if result['objective'] is None:
+                    pruned[formation] = {'upper_bound': round(result['bound'], 2), 'optimal': result['optimal']}
+                    continue
+                tag = lambda p: {**p, 'value_score': value_scores[p['id']]}
+                starting_xi = {position: [tag(p) for p in result['starter'].get(position, [])]
+                               for position in ['Goalkeeper', 'Defender', 'Midfielder', 'Forward']}
+                xi_players = [p for position in starting_xi.values() for p in position]
+                
+                # FPL bench: reserve goalkeeper first, then outfielders by expected points
+                bench = [tag(p) for p in result['bench'].get('Goalkeeper', [])]
+                bench += sorted(
+                    (tag(p) for position in ['Defender', 'Midfielder', 'Forward'] for p in result['bench'].get(position, [])),
+                    key=points, reverse=True
+                )
+                
+                by_points = sorted(xi_players, key=points, reverse=True)
+                captain = next(p for p in xi_players if p['id'] == result['captain']['id'])
+                vice_captain = next(p for p in by_points if p['id'] != captain['id'])
+                
+                squad = {position: list(starting_xi[position]) for position in starting_xi}
+                for player in bench:
+                    squad[player['position']].append(player)
+                total_cost = sum(p['price'] for p in xi_players + bench)
+                
+                formations[formation] = {
+                    'formation': formation,
+                    'starting_xi': starting_xi,
+                    'bench': bench,
+                    'captain': captain,
+                    'vice_captain': vice_captain,
+                    'squad': squad,
+                    'total_cost': round(total_cost, 1),
+                    'remaining_budget': round(budget - total_cost, 1),
+                    'predicted_total_points': round(sum(points(p) for p in xi_players) + points(captain), 1),
+                    'bench_points': round(sum(points(p) for p in bench), 1),
+                    'squad_analysis': self.summarize_squad(xi_players),
+                    'solver': {
+                        'method': 'branch-and-bound',
+                        'objective_value': round(result['objective'], 2),
+                        'upper_bound': round(result['bound'], 2),
+                        'optimal': result['optimal'],
+                        'optimality_gap': round(result['gap'], 4),
+                        'nodes': result['nodes'],
+                        'elapsed_ms': result['elapsed_ms']
+                    }
+                }
+            
+            if not formations:
+                raise ValueError('No 15-man squad fits the budget')
+            best_formation = max(formations, key=lambda f: formations[f]['solver']['objective_value'])
+            
+            response = {
+                'success': True,
+                'budget': budget,
+                'bench_weight': bench_weight,
+                'best_formation': best_formation,
+                'best': formations[best_formation],
+                'formations': formations,
+                'pruned_formations': pruned,
+                # False when the time limit cut off any search, so the best squad is unproven
+                'optimal': results['optimal'],
+                'solver': {
+                    'method': 'branch-and-bound',
+                    'time_limit': time_limit,
+                    'nodes': results['nodes'],
+                    'elapsed_ms': results['elapsed_ms']
                 }
             }
+            snapshot['full_squads'][cache_key] = response
+            return response
             
         except Exception as e:
             return {
@@ -320,6 +831,39 @@ class handler(BaseHTTPRequestHandler):
                 'error': str(e)
             }
 
+    def select_exact_squad(self, snapshot, requirements, budget, query_params):
+        """Solve the squad exactly (budget, formation and 3-per-club rule) instead of greedily"""
+        objective = query_params.get('objective', ['points'])[0]
+        time_limit = float(query_params.get('time_limit', [0.5])[0])
+        value_scores = snapshot['value_scores']
+        
+        if objective == 'value':
+            score = lambda p: value_scores[p['id']]
+        else:
+            objective = 'points'
+            score = lambda p: p['three_year_metrics']['avg_points_per_season']
+        
+        result = solve_squad(snapshot['analysis']['players'], requirements, budget, score, time_limit=time_limit)
+        
+        squad = {position: [] for position in requirements.keys()}
+        squad['all_players'] = []
+        for position, selected in result['squad'].items():
+            for player in selected:
+                player = {**player, 'value_score': value_scores[player['id']]}
+                squad[position].append(player)
+                squad['all_players'].append(player)
+        
+        return squad, {
+            'method': 'branch-and-bound',
+            'objective': objective,
+            'objective_value': round(result['objective'], 2),
+            'upper_bound': round(result['bound'], 2),
+            'optimal': result['optimal'],
+            'optimality_gap': round(result['gap'], 4),
+            'nodes': result['nodes'],
+            'elapsed_ms': result['elapsed_ms']
+        }
+
     def search_player_history(self, query_params):
         """Search for specific player's 3-year history"""
         try:
@@ -328,47 +872,47 @@ class handler(BaseHTTPRequestHandler):
             if not search_term:
                 return {'players': [], 'message': 'No search term provided'}
             
-            analysis = self.get_3year_analysis()
-            players = analysis['players']
+            # Ranked, accent-folded and typo-tolerant match on name, full name and team
+            snapshot = self.get_analysis_snapshot()
+            with stage('search') as current:
+                current.cache = 'hit' if 'index' in snapshot['search'] else 'miss'
+                search_index = self.get_search_index(snapshot)
+                matches = [player for _, player in search_index.search(search_term)]
             
-            # Filter players by search term
+            # Only the returned page needs its season data formatted
             matching_players = []
-            for player in players:
-                if (search_term in player['name'].lower() or 
-                    search_term in player['full_name'].lower() or 
-                    search_term in player['team'].lower()):
-                    
-                    # Format season data for display
-                    seasons_display = []
-                    for season, data in player['season_data'].items():
-                        seasons_display.append({
-                            'season': season,
-                            'total_points': data['total_points'],
-                            'goals': data['goals'],
-                            'assists': data['assists'],
-                            'clean_sheets': data['clean_sheets'],
-                            'games_played': data['games_played'],
-                            'ppg': round(data['total_points'] / max(data['games_played'], 1), 2),
-                            'minutes': data['minutes'],
-                            'price_start': data.get('price_start', player['price']),
-                            'price_end': data.get('price_end', player['price'])
-                        })
-                    
-                    matching_players.append({
-                        'id': player['id'],
-                        'name': player['name'],
-                        'full_name': player['full_name'],
-                        'team': player['team'],
-                        'position': player['position'],
-                        'current_price': player['price'],
-                        'seasons_data': sorted(seasons_display, key=lambda x: x['season'], reverse=True),
-                        'three_year_summary': player['three_year_metrics'],
-                        'seasons_found': player['seasons_found']
+            for player in matches[:20]:
+                # Format season data for display
+                seasons_display = []
+                for season, data in player['season_data'].items():
+                    seasons_display.append({
+                        'season': season,
+                        'total_points': data['total_points'],
+                        'goals': data['goals'],
+                        'assists': data['assists'],
+                        'clean_sheets': data['clean_sheets'],
+                        'games_played': data['games_played'],
+                        'ppg': round(data['total_points'] / max(data['games_played'], 1), 2),
+                        'minutes': data['minutes'],
+                        'price_start': data.get('price_start', player['price']),
+                        'price_end': data.get('price_end', player['price'])
                     })
+                
+                matching_players.append({
+                    'id': player['id'],
+                    'name': player['name'],
+                    'full_name': player['full_name'],
+                    'team': player['team'],
+                    'position': player['position'],
+                    'current_price': player['price'],
+                    'seasons_data': sorted(seasons_display, key=lambda x: x['season'], reverse=True),
+                    'three_year_summary': player['three_year_metrics'],
+                    'seasons_found': player['seasons_found']
+                })
             
             return {
-                'players': matching_players[:20],  # Limit results
-                'count': len(matching_players),
+                'players': matching_players,
+                'count': len(matches),
                 'search_term': search_term
             }
             
@@ -383,4 +927,5 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
@@ -1,145 +1,32 @@
 from http.server import BaseHTTPRequestHandler
-import json
-import urllib.request
 import urllib.error
-import ssl
+from collections import Counter
+from itertools import compress, repeat
+from operator import truediv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bootstrap import load_bootstrap_versioned, bootstrap_age
+from _response import send_json
+from _table import player_table
+from _trace import stage, traced
 
 class handler(BaseHTTPRequestHandler):
+    @traced('stats')
     def do_GET(self):
         try:
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             print("Fetching FPL data for statistics...")
             
-            # Create SSL context
-            ssl_context = ssl.create_default_context()
-            
-            # Fetch real FPL data using urllib
-            req = urllib.request.Request(
-                'https://fantasy.premierleague.com/api/bootstrap-static/',
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-            )
-            
-            with urllib.request.urlopen(req, context=ssl_context, timeout=30) as response:
-                if response.status != 200:
-                    raise Exception(f"FPL API returned status {response.status}")
-                
-                fpl_data = json.loads(response.read().decode('utf-8'))
-            
-            # Process active players only
-            active_players = [p for p in fpl_data.get('elements', []) if p.get('minutes', 0) >= 90]
-            
-            if not active_players:
-                raise Exception("No active players found")
-            
-            print(f"Calculating statistics for {len(active_players)} active players")
-            
-            # Calculate comprehensive statistics safely
-            total_points_list = [p.get('total_points', 0) for p in active_players]
-            prices_list = [p.get('now_cost', 0) / 10 for p in active_players]
-            ppg_list = [float(p.get('points_per_game', 0)) if p.get('points_per_game') else 0 for p in active_players]
-            
-            # Find top performers safely
-            top_scorer = max(active_players, key=lambda x: x.get('total_points', 0))
-            best_value_player = max(active_players, key=lambda x: x.get('total_points', 0) / max(x.get('now_cost', 1) / 10, 0.1))
-            highest_ppg = max(active_players, key=lambda x: float(x.get('points_per_game', 0)) if x.get('points_per_game') else 0)
-            most_owned = max(active_players, key=lambda x: float(x.get('selected_by_percent', 0)) if x.get('selected_by_percent') else 0)
+            # Shared, cached bootstrap-static payload
+            fpl_data, version, updated_at = load_bootstrap_versioned()
             
-            # Calculate averages
-            avg_points = sum(total_points_list) / len(total_points_list) if total_points_list else 0
-            avg_price = sum(prices_list) / len(prices_list) if prices_list else 0
-            avg_ppg = sum(ppg_list) / len(ppg_list) if ppg_list else 0
-            
-            # Process teams and positions
-            teams = {team['id']: team['name'] for team in fpl_data.get('teams', [])}
-            positions = {pos['id']: pos['singular_name'] for pos in fpl_data.get('element_types', [])}
-            
-            # Position breakdown
-            position_counts = {}
-            position_avg_points = {}
-            
-            for pos_id, pos_name in positions.items():
-                pos_players = [p for p in active_players if p.get('element_type') == pos_id]
-                if pos_players:
-                    position_counts[pos_name] = len(pos_players)
-                    position_avg_points[pos_name] = sum(p.get('total_points', 0) for p in pos_players) / len(pos_players)
-            
-            # Team breakdown
-            team_counts = {}
-            for team_id, team_name in teams.items():
-                team_players = [p for p in active_players if p.get('team') == team_id]
-                if team_players:
-                    team_counts[team_name] = len(team_players)
-            
-            stats = {
-                'totalPlayers': len(active_players),
-                'avgPoints': round(avg_points, 1),
-                'avgPrice': round(avg_price, 1),
-                'avgPointsPerGame': round(avg_ppg, 2),
-                
-                'topScorer': {
-                    'name': top_scorer.get('web_name', 'Unknown'),
-                    'fullName': f"{top_scorer.get('first_name', '')} {top_scorer.get('second_name', '')}".strip(),
-                    'points': top_scorer.get('total_points', 0),
-                    'totalPoints': top_scorer.get('total_points', 0),
-                    'team': teams.get(top_scorer.get('team', 0), 'Unknown'),
-                    'position': positions.get(top_scorer.get('element_type', 0), 'Unknown')
-                },
-                
-                'bestValue': {
-                    'name': best_value_player.get('web_name', 'Unknown'),
-                    'fullName': f"{best_value_player.get('first_name', '')} {best_value_player.get('second_name', '')}".strip(),
-                    'pointsPerMillion': round(best_value_player.get('total_points', 0) / max(best_value_player.get('now_cost', 1) / 10, 0.1), 1),
-                    'points': best_value_player.get('total_points', 0),
-                    'price': round(best_value_player.get('now_cost', 0) / 10, 1),
-                    'team': teams.get(best_value_player.get('team', 0), 'Unknown'),
-                    'position': positions.get(best_value_player.get('element_type', 0), 'Unknown')
-                },
-                
-                'mostConsistent': {
-                    'name': highest_ppg.get('web_name', 'Unknown'),
-                    'fullName': f"{highest_ppg.get('first_name', '')} {highest_ppg.get('second_name', '')}".strip(),
-                    'pointsPerGame': float(highest_ppg.get('points_per_game', 0)) if highest_ppg.get('points_per_game') else 0,
-                    'totalPoints': highest_ppg.get('total_points', 0),
-                    'team': teams.get(highest_ppg.get('team', 0), 'Unknown'),
-                    'position': positions.get(highest_ppg.get('element_type', 0), 'Unknown')
-                },
-                
-                'mostOwned': {
-                    'name': most_owned.get('web_name', 'Unknown'),
-                    'fullName': f"{most_owned.get('first_name', '')} {most_owned.get('second_name', '')}".strip(),
-                    'ownership': float(most_owned.get('selected_by_percent', 0)) if most_owned.get('selected_by_percent') else 0,
-                    'totalPoints': most_owned.get('total_points', 0),
-                    'team': teams.get(most_owned.get('team', 0), 'Unknown'),
-                    'position': positions.get(most_owned.get('element_type', 0), 'Unknown')
-                },
-                
-                'positionBreakdown': position_counts,
-                'positionAverages': {k: round(v, 1) for k, v in position_avg_points.items()},
-                'teamBreakdown': team_counts,
-                
-                'dataRange': 'Current season (Real FPL API data)',
-                'lastUpdated': '2024-12-19T12:00:00Z',
-                'source': 'Fantasy Premier League Official API',
-                
-                'insights': {
-                    'highestScoringPosition': max(position_avg_points.items(), key=lambda x: x[1])[0] if position_avg_points else 'Unknown',
-                    'totalGoalsScored': sum(p.get('goals_scored', 0) for p in active_players),
-                    'totalAssists': sum(p.get('assists', 0) for p in active_players),
-                    'totalCleanSheets': sum(p.get('clean_sheets', 0) for p in active_players),
-                    'averageOwnership': round(sum(float(p.get('selected_by_percent', 0)) if p.get('selected_by_percent') else 0 for p in active_players) / len(active_players), 1)
-                }
-            }
+            with stage('statistics'):
+                stats = self.calculate_statistics(fpl_data)
+            stats['data_age_seconds'] = bootstrap_age(updated_at)
             
             print("Statistics calculated successfully")
-            self.wfile.write(json.dumps(stats).encode())
+            send_json(self, stats, version=version)
             
         except urllib.error.HTTPError as e:
             print(f"HTTP Error: {e.code} - {e.reason}")
@@ -152,7 +39,7 @@ class handler(BaseHTTPRequestHandler):
                 'bestValue': {'name': 'N/A', 'pointsPerMillion': 0},
                 'message': 'The Fantasy Premier League API may be temporarily unavailable'
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            send_json(self, error_response, cacheable=False)
             
         except urllib.error.URLError as e:
             print(f"URL Error: {e.reason}")
@@ -165,7 +52,7 @@ class handler(BaseHTTPRequestHandler):
                 'bestValue': {'name': 'N/A', 'pointsPerMillion': 0},
                 'message': 'Network connection issue - please try again'
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            send_json(self, error_response, cacheable=False)
             
         except Exception as e:
             print(f"General error: {e}")
@@ -178,11 +65,130 @@ class handler(BaseHTTPRequestHandler):
                 'bestValue': {'name': 'N/A', 'pointsPerMillion': 0},
                 'message': 'An error occurred while calculating statistics'
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            send_json(self, error_response, cacheable=False)
+    
+    def calculate_statistics(self, fpl_data):
+        """Aggregate league statistics from the columnar player table in one pass per column"""
+        table = player_table(fpl_data)
+        
+        # Process active players only
+        active = table.mask('minutes', 90)
+        rows = list(compress(range(len(table)), active))
+        
+        if not rows:
+            raise Exception("No active players found")
+        
+        print(f"Calculating statistics for {len(rows)} active players")
+        
+        total_points_list = table.select('total_points', active)
+        prices_list = table.select('price', active)
+        ppg_list = table.select('points_per_game', active)
+        ownership_list = table.select('selected_by_percent', active)
+        position_ids = table.select('element_type', active)
+        team_ids = table.select('team', active)
+        value_list = list(map(truediv, total_points_list, map(max, prices_list, repeat(0.1))))
+        
+        # Find top performers (first row wins ties, as max() does)
+        active_range = range(len(rows))
+        top_scorer = rows[max(active_range, key=total_points_list.__getitem__)]
+        best_value_player = rows[max(active_range, key=value_list.__getitem__)]
+        highest_ppg = rows[max(active_range, key=ppg_list.__getitem__)]
+        most_owned = rows[max(active_range, key=ownership_list.__getitem__)]
+        
+        # Calculate averages
+        avg_points = sum(total_points_list) / len(rows)
+        avg_price = sum(prices_list) / len(rows)
+        avg_ppg = sum(ppg_list) / len(rows)
+        
+        # Process teams and positions
+        teams = {team['id']: team['name'] for team in fpl_data.get('teams', [])}
+        positions = {pos['id']: pos['singular_name'] for pos in fpl_data.get('element_types', [])}
+        
+        # Position and team breakdowns as grouped reductions, one pass over the rows each
+        players_per_position = Counter(position_ids)
+        points_per_position = dict.fromkeys(players_per_position, 0)
+        for pos_id, points in zip(position_ids, total_points_list):
+            points_per_position[pos_id] += points
+        players_per_team = Counter(team_ids)
+        
+        position_counts = {}
+        position_avg_points = {}
+        for pos_id, pos_name in positions.items():
+            if players_per_position.get(pos_id):
+                position_counts[pos_name] = players_per_position[pos_id]
+                position_avg_points[pos_name] = points_per_position[pos_id] / players_per_position[pos_id]
+        
+        team_counts = {team_name: players_per_team[team_id] for team_id, team_name in teams.items() if players_per_team.get(team_id)}
+        
+        text = table.text
+        total_points = table['total_points']
+        team_of = lambda row: teams.get(table['team'][row], 'Unknown')
+        position_of = lambda row: positions.get(table['element_type'][row], 'Unknown')
+        
+        return {
+            'totalPlayers': len(rows),
+            'avgPoints': round(avg_points, 1),
+            'avgPrice': round(avg_price, 1),
+            'avgPointsPerGame': round(avg_ppg, 2),
+            
+            'topScorer': {
+                'name': text['web_name'][top_scorer] or 'Unknown',
+                'fullName': table.full_name(top_scorer),
+                'points': total_points[top_scorer],
+                'totalPoints': total_points[top_scorer],
+                'team': team_of(top_scorer),
+                'position': position_of(top_scorer)
+            },
+            
+            'bestValue': {
+                'name': text['web_name'][best_value_player] or 'Unknown',
+                'fullName': table.full_name(best_value_player),
+                'pointsPerMillion': round(total_points[best_value_player] / max(table.price[best_value_player], 0.1), 1),
+                'points': total_points[best_value_player],
+                'price': round(table.price[best_value_player], 1),
+                'team': team_of(best_value_player),
+                'position': position_of(best_value_player)
+            },
+            
+            'mostConsistent': {
+                'name': text['web_name'][highest_ppg] or 'Unknown',
+                'fullName': table.full_name(highest_ppg),
+                'pointsPerGame': table['points_per_game'][highest_ppg],
+                'totalPoints': total_points[highest_ppg],
+                'team': team_of(highest_ppg),
+                'position': position_of(highest_ppg)
+            },
+            
+            'mostOwned': {
+                'name': text['web_name'][most_owned] or 'Unknown',
+                'fullName': table.full_name(most_owned),
+                'ownership': table['selected_by_percent'][most_owned],
+                'totalPoints': total_points[most_owned],
+                'team': team_of(most_owned),
+                'position': position_of(most_owned)
+            },
+            
+            'positionBreakdown': position_counts,
+            'positionAverages': {k: round(v, 1) for k, v in position_avg_points.items()},
+            'teamBreakdown': team_counts,
+            
+            'dataRange': 'Current season (Real FPL API data)',
+            'lastUpdated': '2024-12-19T12:00:00Z',
+            'source': 'Fantasy Premier League Official API',
+            
+            'insights': {
+                'highestScoringPosition': max(position_avg_points.items(), key=lambda x: x[1])[0] if position_avg_points else 'Unknown',
+                'totalGoalsScored': sum(table.select('goals_scored', active)),
+                'totalAssists': sum(table.select('assists', active)),
+                'totalCleanSheets': sum(table.select('clean_sheets', active)),
+                'averageOwnership': round(sum(ownership_list) / len(rows), 1)
+            }
+        }
     
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
@@ -0,0 +1,309 @@
+"""Benchmark the API hot paths against local fixtures, as JSON.
+
+    python bench/api_hot_paths.py [--scales 1,10,100] [--repeat 5] [--output results.json]
+
+For every scale of the player pool the upstream data (bench/recorded/, or
+synthetic; see fixtures.py) is served from a local HTTP server standing in
+for the FPL API and GitHub, so nothing touches the network. Each scale is
+measured twice:
+
+- "function": the handler methods called in-process, cold (fresh caches,
+  including the fetch from the fixture server) and warm (caches filled);
+- "http": every endpoint end-to-end through server.py, the first request
+  (cold) and then ``--repeat`` requests on one keep-alive connection.
+
+Timings are milliseconds (min / median / max over the repeats). Keep the
+JSON output of each run to track regressions over time. The output's
+``fixtures`` field says whether recorded or synthetic data was used; the
+repository ships without a recording, so compare only runs with the same
+source.
+"""
+import argparse
+import contextlib
+import http.client
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fixtures import BENCH_DIR, has_recording, write_fixtures, use_api_modules
+
+# Scaled-up merged_gw.csv files outgrow the upstream client's default size
+# cap; raised here and, through the environment, for server.py
+os.environ.setdefault('FPL_UPSTREAM_MAX_BYTES', str(1024 * 1024 * 1024))
+use_api_modules()
+import _bootstrap
+import _history
+import _leaderboards
+import _table
+import _timeseries
+import players
+import stats
+from _seasons import DEFAULT_WINDOW, window_seasons
+
+REPO_DIR = os.path.dirname(BENCH_DIR)
+SEASONS = window_seasons(DEFAULT_WINDOW)
+ENDPOINTS = (
+    '/api/players',
+    '/api/players?limit=50&sort=consistency_score',
+    '/api/players?optimal-squad&budget=100&formation=3-5-2',
+    '/api/players?optimal-squad&solver=exact&budget=100&formation=3-5-2',
+    '/api/players?player-search&q={search}',
+    '/api/leaderboards?metric=consistency_score&k=10',
+    '/api/stats',
+    '/api/3year-analysis',
+    '/api/optimal-squad',
+)
+
+
+def load_api_module(name):
+    """Import an api/ module whose file name is not a valid identifier (3year-analysis)"""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), os.path.join(REPO_DIR, 'api', f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+three_year = load_api_module('3year-analysis')
+
+
+def fixture_server(directory):
+    """Serve a fixtures directory: /bootstrap-static/ and /data/<season>/<file>"""
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            path = self.path.split('?')[0].strip('/')
+            path = 'bootstrap-static.json' if path == 'bootstrap-static' else path
+            full_path = os.path.realpath(os.path.join(directory, *path.split('/')))
+            if not full_path.startswith(os.path.realpath(directory)) or not os.path.isfile(full_path):
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            with open(full_path, 'rb') as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def point_api_at(base_url, cache_dir):
+    """Replace the shared upstream caches with fresh ones reading from the fixture server"""
+    _bootstrap._cache = _bootstrap.BootstrapCache(url=f"{base_url}/bootstrap-static/", cache_dir=cache_dir)
+    _history._store = _history.HistoryStore(cache_dir, f"{base_url}/data/{{season}}/cleaned_players.csv", f"{base_url}/data/{{season}}/players_raw.csv")
+    _timeseries._store = _timeseries.GameweekStore(cache_dir, f"{base_url}/data/{{season}}/gws/merged_gw.csv", f"{base_url}/data/{{season}}/players_raw.csv")
+    players._snapshots.clear()
+    _table._cached['source'] = None
+
+
+def measure(fn, repeat, setup=None):
+    """Milliseconds of ``repeat`` calls of fn, each after an untimed setup()"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(timings):
+    return {
+        'repeat': len(timings),
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'max_ms': round(max(timings), 3)
+    }
+
+
+def search_term(fpl_data):
+    return fpl_data['elements'][0]['second_name'][:4].lower()
+
+
+def function_benchmarks(fpl_data, base_url, repeat):
+    """{name: timings} of the handler methods called in-process"""
+    handler = players.handler.__new__(players.handler)
+    calculator = stats.handler.__new__(stats.handler)
+    insights = three_year.handler.__new__(three_year.handler)
+    results = {}
+    scratch = []
+
+    def fresh_dir():
+        scratch.append(tempfile.mkdtemp(prefix='fpl-bench-'))
+        return scratch[-1]
+
+    def cold_bootstrap():
+        point_api_at(base_url, fresh_dir())
+
+    def cold_history():
+        _history._store = _history.HistoryStore(fresh_dir(), _history._store.url_template, _history._store.raw_url_template)
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            results['get_current_season_data (cold)'] = measure(handler.get_current_season_data, repeat, cold_bootstrap)
+            results['get_current_season_data (warm)'] = measure(handler.get_current_season_data, repeat)
+
+            results['get_historical_data (cold)'] = measure(lambda: handler.get_historical_data(SEASONS), repeat, cold_history)
+            historical_data = handler.get_historical_data(SEASONS)
+            results['get_historical_data (warm)'] = measure(lambda: handler.get_historical_data(SEASONS), repeat)
+
+            gameweek_data = handler.load_seasons([(_timeseries.load_gameweeks, 'gameweek players')], SEASONS, timeout=600)[0]
+            results['build_3year_analysis'] = measure(lambda: handler.build_3year_analysis(fpl_data, historical_data, None, gameweek_data, SEASONS), repeat)
+
+            snapshot = handler.get_analysis_snapshot()
+            season_data = [player['season_data'] for player in snapshot['analysis']['players']]
+            results['calculate_3year_metrics (all players)'] = measure(lambda: [handler.calculate_3year_metrics(data) for data in season_data], repeat)
+
+            greedy = {'budget': ['100'], 'formation': ['3-5-2']}
+            exact = {**greedy, 'solver': ['exact']}
+            results['get_optimal_squad (greedy)'] = measure(lambda: handler.get_optimal_squad(greedy), repeat)
+            results['get_optimal_squad (exact)'] = measure(lambda: handler.get_optimal_squad(exact), repeat)
+
+            search = {'q': [search_term(fpl_data)]}
+            results['search_player_history (cold)'] = measure(lambda: handler.search_player_history(search), 1, lambda: snapshot['search'].clear())
+            results['search_player_history (warm)'] = measure(lambda: handler.search_player_history(search), repeat)
+
+            results['stats.calculate_statistics (cold)'] = measure(lambda: calculator.calculate_statistics(fpl_data), repeat, lambda: _table._cached.update(source=None))
+            results['stats.calculate_statistics (warm)'] = measure(lambda: calculator.calculate_statistics(fpl_data), repeat)
+
+            analyzed_players = insights.perform_3year_analysis(fpl_data)
+            results['3year-analysis.calculate_league_insights'] = measure(lambda: insights.calculate_league_insights(analyzed_players), repeat, lambda: _leaderboards._cached.update(source=None))
+    finally:
+        for directory in scratch:
+            shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request(connection, path):
+    connection.request('GET', path)
+    response = connection.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{path} answered {response.status}: {body[:200]!r}")
+    return len(body)
+
+
+def http_benchmarks(fpl_data, base_url, repeat):
+    """{path: (cold timing, warm timings, response bytes)} through server.py"""
+    cache_dir = tempfile.mkdtemp(prefix='fpl-bench-')
+    port = free_port()
+    env = dict(os.environ, FPL_BOOTSTRAP_URL=f"{base_url}/bootstrap-static/", FPL_VAASTAV_URL=f"{base_url}/data", FPL_CACHE_DIR=cache_dir)
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, 'server.py'), '--port', str(port), '--no-preload'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    results = {}
+    try:
+        for _ in range(100):
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=1):
+                    break
+            except OSError:
+                time.sleep(0.1)
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+        for path in ENDPOINTS:
+            path = path.format(search=search_term(fpl_data))
+            sizes = []
+            cold = measure(lambda: sizes.append(request(connection, path)), 1)
+            warm = measure(lambda: request(connection, path), repeat)
+            results[path] = (cold, warm, sizes[0])
+        connection.close()
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', '-C', REPO_DIR, 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='1,10,100', help='comma-separated multiples of a ~650 player pool')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-http', action='store_true', help='skip the end-to-end server.py runs')
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    args = parser.parse_args()
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'fixtures': 'recorded' if has_recording(SEASONS) else 'synthetic',
+        'seasons': list(SEASONS),
+        'repeat': args.repeat,
+        'results': []
+    }
+    for scale in [int(scale) for scale in args.scales.split(',')]:
+        directory = tempfile.mkdtemp(prefix='fpl-fixtures-')
+        cache_dir = tempfile.mkdtemp(prefix='fpl-bench-')
+        server = None
+        try:
+            print(f"scale {scale}x: writing fixtures", file=sys.stderr)
+            fpl_data = write_fixtures(directory, scale, SEASONS)
+            server, base_url = fixture_server(directory)
+            entry = {'scale': scale, 'players': len(fpl_data['elements'])}
+
+            print(f"scale {scale}x: {entry['players']} players, in-process", file=sys.stderr)
+            point_api_at(base_url, cache_dir)
+            for name, timings in function_benchmarks(fpl_data, base_url, args.repeat).items():
+                report['results'].append({**entry, 'kind': 'function', 'name': name, **summarize(timings)})
+
+            if not args.no_http:
+                print(f"scale {scale}x: end-to-end through server.py", file=sys.stderr)
+                for path, (cold, warm, size) in http_benchmarks(fpl_data, base_url, args.repeat).items():
+                    report['results'].append({**entry, 'kind': 'http', 'name': f"GET {path} (cold)", 'bytes': size, **summarize(cold)})
+                    report['results'].append({**entry, 'kind': 'http', 'name': f"GET {path} (warm)", 'bytes': size, **summarize(warm)})
+        finally:
+            if server is not None:
+                server.shutdown()
+            shutil.rmtree(directory, ignore_errors=True)
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
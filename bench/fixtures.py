@@ -0,0 +1,196 @@
+"""Bootstrap-static payloads and vaastav season files for the benchmark scripts.
+
+``synthetic_bootstrap(scale)`` returns a payload shaped like the real FPL
+``bootstrap-static`` response with ``scale`` times the usual ~650 players,
+generated from a fixed seed so runs are comparable.
+
+``write_fixtures(directory, scale, seasons)`` lays out everything the API
+fetches upstream (bootstrap-static plus each season's cleaned_players,
+players_raw and merged_gw files) so a local server can stand in for the
+FPL API and GitHub. Data recorded with ``bench/record.py`` into
+``bench/recorded/`` is used when present, scaled up by cloning every player
+under a new id, code and name; otherwise it is generated from
+``synthetic_bootstrap``.
+
+No recording is committed with the repository, so out of the box every
+benchmark runs on the synthetic data. It has the columns and row counts of
+the real files but not their value distributions (points against price,
+minutes, duplicate names), so its timings are comparable between runs
+rather than with production. Run ``bench/record.py`` where the network is
+reachable to benchmark on real data.
+"""
+import csv
+import io
+import json
+import os
+import random
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(os.path.dirname(BENCH_DIR), 'api')
+RECORDED_DIR = os.path.join(BENCH_DIR, 'recorded')
+BASE_PLAYERS = 650
+# Season files served for each season, relative to the season directory
+SEASON_FILES = ('cleaned_players.csv', 'players_raw.csv', 'gws/merged_gw.csv')
+# Clone k of a recorded player gets id + k * ID_STRIDE and code + k * CODE_STRIDE
+ID_STRIDE = 10000
+CODE_STRIDE = 10000000
+
+POSITIONS = [
+    {'id': 1, 'singular_name': 'Goalkeeper'},
+    {'id': 2, 'singular_name': 'Defender'},
+    {'id': 3, 'singular_name': 'Midfielder'},
+    {'id': 4, 'singular_name': 'Forward'}
+]
+
+
+def synthetic_bootstrap(scale=1, seed=2024):
+    rng = random.Random(seed)
+    teams = [{'id': team_id, 'name': f"Team {team_id}"} for team_id in range(1, 21)]
+    elements = []
+    for player_id in range(1, BASE_PLAYERS * scale + 1):
+        element_type = rng.choices([1, 2, 3, 4], [1, 3, 3.5, 1.5])[0]
+        now_cost = rng.randint(40, 130 if element_type > 2 else 65)
+        total_points = max(0, int(rng.gauss(now_cost * 1.2, 25)))
+        elements.append({
+            'id': player_id,
+            'code': 100000 + player_id,
+            'web_name': f"Player{player_id}",
+            'first_name': f"First{player_id}",
+            'second_name': f"Second{player_id}",
+            'team': rng.randint(1, 20),
+            'element_type': element_type,
+            'now_cost': now_cost,
+            'total_points': total_points,
+            'points_per_game': f"{total_points / 30:.1f}",
+            'goals_scored': rng.randint(0, 20),
+            'assists': rng.randint(0, 15),
+            'clean_sheets': rng.randint(0, 15),
+            'minutes': rng.randint(0, 3000),
+            'form': f"{rng.random() * 8:.1f}",
+            'selected_by_percent': f"{rng.random() * 40:.1f}"
+        })
+    return {'elements': elements, 'teams': teams, 'element_types': POSITIONS, 'events': []}
+
+
+def recorded_path(*parts):
+    return os.path.join(RECORDED_DIR, *parts)
+
+
+def has_recording(seasons):
+    return os.path.exists(recorded_path('bootstrap-static.json')) and all(
+        os.path.exists(recorded_path(season, name)) for season in seasons for name in SEASON_FILES)
+
+
+def clone_suffix(clone):
+    return f" {clone}" if clone else ''
+
+
+def scale_bootstrap(fpl_data, scale):
+    """A recorded payload with every player repeated ``scale`` times under new ids, codes and names"""
+    elements = []
+    for clone in range(scale):
+        for element in fpl_data['elements']:
+            elements.append({
+                **element,
+                'id': element['id'] + clone * ID_STRIDE,
+                'code': element['code'] + clone * CODE_STRIDE,
+                'second_name': element['second_name'] + clone_suffix(clone)
+            })
+    return {**fpl_data, 'elements': elements}
+
+
+def scale_csv(content, scale, renames):
+    """Repeat every row of a vaastav CSV ``scale`` times, renaming the clones like scale_bootstrap
+
+    ``renames`` maps a column to how a clone's value is derived from it:
+    'name' appends the clone suffix, 'id' / 'code' add the clone's offset.
+    """
+    rows = list(csv.reader(io.StringIO(content)))
+    if not rows:
+        return content
+    header, rows = rows[0], rows[1:]
+    columns = [(header.index(column), rule) for column, rule in renames.items() if column in header]
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(header)
+    for clone in range(scale):
+        for row in rows:
+            row = list(row)
+            for i, rule in columns:
+                if i >= len(row):
+                    continue
+                if rule == 'name':
+                    row[i] += clone_suffix(clone)
+                elif row[i].lstrip('-').isdigit():
+                    row[i] = str(int(row[i]) + clone * (ID_STRIDE if rule == 'id' else CODE_STRIDE))
+            writer.writerow(row)
+    return out.getvalue()
+
+
+def recorded_fixtures(scale, seasons):
+    """{relative path: bytes} from bench/recorded/, scaled up ``scale`` times"""
+    with open(recorded_path('bootstrap-static.json'), 'rb') as f:
+        files = {'bootstrap-static.json': json.dumps(scale_bootstrap(json.load(f), scale)).encode('utf-8')}
+    renames = {
+        'cleaned_players.csv': {'second_name': 'name'},
+        'players_raw.csv': {'second_name': 'name', 'id': 'id', 'code': 'code'},
+        'gws/merged_gw.csv': {'name': 'name', 'element': 'id'},
+    }
+    for season in seasons:
+        for name in SEASON_FILES:
+            with open(recorded_path(season, name), 'r', encoding='utf-8') as f:
+                files[f"data/{season}/{name}"] = scale_csv(f.read(), scale, renames[name]).encode('utf-8')
+    return files
+
+
+def synthetic_seasons(fpl_data, seasons, seed=2024):
+    """{relative path: bytes} of vaastav season files for the players of a synthetic payload
+
+    Each season has about 80% of the players, with one row per gameweek in
+    merged_gw.csv.
+    """
+    files = {}
+    for offset, season in enumerate(seasons):
+        rng = random.Random(seed + offset)
+        players = [element for element in fpl_data['elements'] if rng.random() < 0.8]
+        cleaned = ['first_name,second_name,goals_scored,assists,total_points,minutes,clean_sheets,start_cost,end_cost,points_per_game,element_type']
+        raw = ['id,code,first_name,second_name']
+        merged = ['name,element,kickoff_time,GW,minutes,total_points,goals_scored,assists,clean_sheets,bonus,value']
+        for element in players:
+            full_name = f"{element['first_name']} {element['second_name']}"
+            total_points = 0
+            minutes = 0
+            for gameweek in range(1, 39):
+                played = rng.choice((0, 0, 30, 65, 90, 90, 90))
+                points = rng.randint(1, 12) if played else 0
+                total_points += points
+                minutes += played
+                merged.append(f"{full_name},{element['id']},2023-08-{gameweek:02d}T15:00:00Z,{gameweek},{played},{points},{rng.randint(0, 1)},{rng.randint(0, 1)},{rng.randint(0, 1)},{rng.randint(0, 3)},{element['now_cost']}")
+            cleaned.append(f"{element['first_name']},{element['second_name']},{rng.randint(0, 20)},{rng.randint(0, 15)},{total_points},{minutes},{rng.randint(0, 18)},{element['now_cost']},{element['now_cost']},{total_points / 38:.1f},{element['element_type']}")
+            raw.append(f"{element['id']},{element['code']},{element['first_name']},{element['second_name']}")
+        for name, lines in zip(SEASON_FILES, (cleaned, raw, merged)):
+            files[f"data/{season}/{name}"] = '\n'.join(lines).encode('utf-8')
+    return files
+
+
+def write_fixtures(directory, scale, seasons):
+    """Write the upstream files for one scale into ``directory``; returns the bootstrap payload"""
+    if has_recording(seasons):
+        files = recorded_fixtures(scale, seasons)
+        fpl_data = json.loads(files['bootstrap-static.json'])
+    else:
+        fpl_data = synthetic_bootstrap(scale)
+        files = {'bootstrap-static.json': json.dumps(fpl_data).encode('utf-8'), **synthetic_seasons(fpl_data, seasons)}
+    for path, content in files.items():
+        full_path = os.path.join(directory, *path.split('/'))
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(content)
+    return fpl_data
+
+
+def use_api_modules():
+    """Make the api/ helper modules importable from a benchmark script"""
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
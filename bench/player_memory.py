@@ -0,0 +1,82 @@
+"""Peak memory of the per-player analysis pipelines, measured with tracemalloc.
+
+    python bench/player_memory.py [--scale 10] [--baseline REV]
+
+Runs the optimal-squad, 3year-analysis and players pipelines on a synthetic
+bootstrap payload. With ``--baseline`` the same pipelines are also loaded
+from that git revision (e.g. the commit before the columnar player table)
+and measured side by side.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import subprocess
+import tempfile
+import tracemalloc
+
+from fixtures import API_DIR, synthetic_bootstrap, use_api_modules
+
+use_api_modules()
+import _table
+
+PIPELINES = {
+    'optimal-squad': lambda h, data: h.enhance_players_with_3year_data(data),
+    '3year-analysis': lambda h, data: h.perform_3year_analysis(data),
+    'players': lambda h, data: h.build_3year_analysis(data, {}),
+}
+
+
+def load_handler(name, source=None):
+    """Instantiate a handler class from api/<name>.py, or from given source text"""
+    path = os.path.join(API_DIR, f"{name}.py")
+    if source is not None:
+        fd, path = tempfile.mkstemp(suffix='.py')
+        with os.fdopen(fd, 'w') as f:
+            f.write(source)
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.handler.__new__(module.handler)
+
+
+def baseline_source(revision, name):
+    root = os.path.dirname(API_DIR)
+    source = subprocess.check_output(['git', '-C', root, 'show', f"{revision}:api/{name}.py"]).decode('utf-8')
+    return source.replace('os.path.dirname(os.path.abspath(__file__))', repr(API_DIR))
+
+
+def measure(pipeline, handler, data, cold):
+    if cold:
+        _table._cached['source'] = None
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = pipeline(handler, data)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 1024 / 1024, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10, help='multiple of a ~650 player pool')
+    parser.add_argument('--baseline', help='git revision to compare against')
+    args = parser.parse_args()
+
+    data = synthetic_bootstrap(args.scale)
+    print(f"players: {len(data['elements'])}  (MiB: retained / peak)")
+    for name, pipeline in PIPELINES.items():
+        handler = load_handler(name)
+        cold = measure(pipeline, handler, data, cold=True)
+        warm = measure(pipeline, handler, data, cold=False)
+        line = f"{name:15} table cold {cold[0]:6.2f} / {cold[1]:6.2f}   warm {warm[0]:6.2f} / {warm[1]:6.2f}"
+        if args.baseline:
+            legacy = measure(pipeline, load_handler(name, baseline_source(args.baseline, name)), data, cold=False)
+            line += f"   {args.baseline} {legacy[0]:6.2f} / {legacy[1]:6.2f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Record the upstream data the API fetches, for the benchmark fixtures.
+
+    python bench/record.py [--seasons 2022-23,2023-24]
+
+Saves the live bootstrap-static payload and each season's vaastav
+cleaned_players, players_raw and merged_gw files under bench/recorded/,
+where ``fixtures.write_fixtures`` picks them up instead of generating
+synthetic data. Re-record to benchmark against a newer season.
+
+bench/recorded/ is not part of the repository (the files are large and
+change every season); until this has been run the benchmarks use the
+synthetic data from ``fixtures.synthetic_bootstrap``.
+"""
+import argparse
+import os
+
+from fixtures import SEASON_FILES, recorded_path, use_api_modules
+
+use_api_modules()
+from _bootstrap import BOOTSTRAP_URL, USER_AGENT
+from _history import VAASTAV_DATA_URL
+from _seasons import DEFAULT_WINDOW, window_seasons
+from _upstream import fetch
+
+
+def record(url, path):
+    body = fetch(url, headers={'User-Agent': USER_AGENT}, timeout=60).body
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(body)
+    print(f"{url} -> {path} ({len(body)} bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seasons', default=','.join(window_seasons(DEFAULT_WINDOW)), help='comma-separated historical seasons')
+    args = parser.parse_args()
+
+    record(BOOTSTRAP_URL, recorded_path('bootstrap-static.json'))
+    for season in args.seasons.split(','):
+        for name in SEASON_FILES:
+            record(f"{VAASTAV_DATA_URL}/{season}/{name}", recorded_path(season, *name.split('/')))
+
+
+if __name__ == '__main__':
+    main()
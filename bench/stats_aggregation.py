@@ -0,0 +1,88 @@
+"""Benchmark /api/stats aggregation: the former multi-pass dict walk vs the columnar table.
+
+    python bench/stats_aggregation.py [--scale 10] [--repeat 20]
+
+"cold" includes building the PlayerTable for a new bootstrap payload,
+"warm" reuses the table cached for the payload, as later requests do.
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from fixtures import synthetic_bootstrap, use_api_modules
+
+use_api_modules()
+import _table
+import stats
+
+
+def legacy_statistics(fpl_data):
+    """The per-statistic list comprehensions /api/stats used before the columnar table"""
+    active_players = [p for p in fpl_data.get('elements', []) if p.get('minutes', 0) >= 90]
+    total_points_list = [p.get('total_points', 0) for p in active_players]
+    prices_list = [p.get('now_cost', 0) / 10 for p in active_players]
+    ppg_list = [float(p.get('points_per_game', 0)) if p.get('points_per_game') else 0 for p in active_players]
+    top_scorer = max(active_players, key=lambda x: x.get('total_points', 0))
+    best_value_player = max(active_players, key=lambda x: x.get('total_points', 0) / max(x.get('now_cost', 1) / 10, 0.1))
+    highest_ppg = max(active_players, key=lambda x: float(x.get('points_per_game', 0)) if x.get('points_per_game') else 0)
+    most_owned = max(active_players, key=lambda x: float(x.get('selected_by_percent', 0)) if x.get('selected_by_percent') else 0)
+    averages = (sum(total_points_list) / len(total_points_list), sum(prices_list) / len(prices_list), sum(ppg_list) / len(ppg_list))
+    teams = {team['id']: team['name'] for team in fpl_data.get('teams', [])}
+    positions = {pos['id']: pos['singular_name'] for pos in fpl_data.get('element_types', [])}
+    position_counts = {}
+    position_avg_points = {}
+    for pos_id, pos_name in positions.items():
+        pos_players = [p for p in active_players if p.get('element_type') == pos_id]
+        if pos_players:
+            position_counts[pos_name] = len(pos_players)
+            position_avg_points[pos_name] = sum(p.get('total_points', 0) for p in pos_players) / len(pos_players)
+    team_counts = {}
+    for team_id, team_name in teams.items():
+        team_players = [p for p in active_players if p.get('team') == team_id]
+        if team_players:
+            team_counts[team_name] = len(team_players)
+    insights = (
+        sum(p.get('goals_scored', 0) for p in active_players),
+        sum(p.get('assists', 0) for p in active_players),
+        sum(p.get('clean_sheets', 0) for p in active_players),
+        sum(float(p.get('selected_by_percent', 0)) if p.get('selected_by_percent') else 0 for p in active_players) / len(active_players)
+    )
+    return top_scorer, best_value_player, highest_ppg, most_owned, averages, position_counts, position_avg_points, team_counts, insights
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10, help='multiple of a ~650 player pool')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    fpl_data = synthetic_bootstrap(args.scale)
+    calculator = stats.handler.__new__(stats.handler)
+
+    def columnar_cold():
+        _table._cached['source'] = None
+        calculator.calculate_statistics(fpl_data)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy = best_of(lambda: legacy_statistics(fpl_data), args.repeat)
+        cold = best_of(columnar_cold, args.repeat)
+        warm = best_of(lambda: calculator.calculate_statistics(fpl_data), args.repeat)
+
+    print(f"players: {len(fpl_data['elements'])}")
+    print(f"legacy multi-pass: {legacy:8.2f} ms")
+    print(f"columnar (cold):   {cold:8.2f} ms  ({legacy / cold:.1f}x)")
+    print(f"columnar (warm):   {warm:8.2f} ms  ({legacy / warm:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Long-running server for the api/ handlers.
+
+Each file in api/ is a serverless function that only defines a
+``BaseHTTPRequestHandler`` subclass. This entry point mounts all of them
+in one process, so the bootstrap cache, the historical season store, the
+analysis snapshot and the derived tables stay warm between requests:
+
+    python server.py --port 5000 --workers 16
+
+Connections are HTTP/1.1 keep-alive and served by a fixed pool of worker
+threads; an idle connection is closed after ``--keepalive`` seconds so it
+does not hold a worker. Port 5000 is where vite.config.js proxies /api.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api')
+sys.path.insert(0, API_DIR)
+from _bootstrap import start_refresher
+from _response import send_json
+
+# /api/<route> -> api/<module>.py, as the serverless runtime maps them
+ROUTES = {
+    '': 'index',
+    'index': 'index',
+    'players': 'players',
+    'optimal-squad': 'optimal-squad',
+    '3year-analysis': '3year-analysis',
+    'stats': 'stats',
+    'leaderboards': 'leaderboards',
+    'metrics': 'metrics',
+}
+
+
+def load_handlers():
+    """Import every routed api/ module once and return {route: handler class}"""
+    modules = {}
+    handlers = {}
+    for route, name in ROUTES.items():
+        if name not in modules:
+            module_name = name.replace('-', '_')
+            module = sys.modules.get(module_name)
+            if module is None:
+                # Registered under its import name so a handler importing another
+                # (leaderboards -> players) shares that module's caches
+                spec = importlib.util.spec_from_file_location(module_name, os.path.join(API_DIR, f"{name}.py"))
+                module = sys.modules[module_name] = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+            modules[name] = module
+        handlers[route] = modules[name].handler
+    return handlers
+
+
+class Router(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # keep-alive response can stall on Nagle + delayed ACK
+    disable_nagle_algorithm = True
+    handlers = {}
+
+    def do_GET(self):
+        self.delegate('do_GET')
+
+    def do_OPTIONS(self):
+        self.delegate('do_OPTIONS')
+
+    def delegate(self, method):
+        """Run the matching api/ handler's method on this connection"""
+        path = urlparse(self.path).path.rstrip('/')
+        route = path[len('/api/'):] if path.startswith('/api/') else ('' if path == '/api' else None)
+        handler_class = self.handlers.get(route)
+
+        if handler_class is None:
+            send_json(self, {'error': f"No API route for {path or '/'}", 'routes': sorted(f"/api/{r}".rstrip('/') for r in ROUTES)}, cacheable=False, status=404)
+            return
+
+        # The handler shares this request's state (rfile, wfile, headers, path, ...)
+        # without re-running BaseHTTPRequestHandler's per-connection setup
+        target = handler_class.__new__(handler_class)
+        target.__dict__ = self.__dict__
+        # protocol_version is a class attribute; the api/ handlers default to HTTP/1.0
+        target.protocol_version = self.protocol_version
+        getattr(target, method)()
+
+
+class WorkerPoolServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that serves connections on a fixed-size thread pool"""
+
+    def __init__(self, address, handler_class, workers):
+        super().__init__(address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api-worker')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the FPL dashboard API from one long-running process')
+    parser.add_argument('--host', default=os.environ.get('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '5000')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('API_WORKERS', '16')), help='worker threads serving connections')
+    parser.add_argument('--keepalive', type=float, default=float(os.environ.get('API_KEEPALIVE', '5')), help='idle keep-alive timeout in seconds')
+    parser.add_argument('--no-preload', action='store_true', help='do not fetch the bootstrap data at startup or refresh it in the background')
+    args = parser.parse_args()
+
+    Router.handlers = load_handlers()
+    Router.timeout = args.keepalive
+    server = WorkerPoolServer((args.host, args.port), Router, args.workers)
+
+    if not args.no_preload:
+        # Loads the bootstrap data now and keeps it refreshed ahead of requests
+        start_refresher()
+
+    print(f"Serving /api on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,18 @@
-import React, { useState, useEffect, useMemo } from 'react';
+import React, { useState, useEffect, useMemo, useRef } from 'react';
 import { ScatterChart, Scatter, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, 
          BarChart, Bar, LineChart, Line, PieChart, Pie, Cell, Legend } from 'recharts';
 import { TrendingUp, DollarSign, Users, Award, Target, Star, Shield, Activity, Database,
          Filter, Search, RefreshCw, AlertCircle, CheckCircle, Clock, Zap, Trophy, 
          BarChart3, Settings, Info, ExternalLink, User } from 'lucide-react';
 
+// Players shown in the analysis table; filtering, sorting and paging run on the server
+const PAGE_SIZE = 50;
+
 const CompleteFPLDashboard = () => {
-  const [threeYearData, setThreeYearData] = useState([]);
+  const [playersPage, setPlayersPage] = useState(null);
+  const [consistencyLeaders, setConsistencyLeaders] = useState([]);
   const [optimalSquad, setOptimalSquad] = useState(null);
+  const [squadFrontier, setSquadFrontier] = useState(null);
   const [playerSearchResults, setPlayerSearchResults] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -23,46 +28,72 @@ const CompleteFPLDashboard = () => {
   // Squad builder settings
   const [budget, setBudget] = useState(100);
   const [formation, setFormation] = useState('3-5-2');
+  
+  // Only the response to the latest filter change is applied
+  const latestRequest = useRef(0);
+
+  // Query string of the current filters plus page-specific parameters
+  const playerQuery = (params) => new URLSearchParams({
+    position: selectedPosition,
+    max_price: maxPrice,
+    min_consistency: minConsistency,
+    search: searchTerm,
+    ...params
+  }).toString();
+
+  const fetchPage = async (params) => {
+    const response = await fetch(`/api/players?${playerQuery(params)}`);
+    const data = await response.json();
+    if (!response.ok || data.error) {
+      throw new Error(data.error || `Players API error! status: ${response.status}`);
+    }
+    return data;
+  };
 
-  // Fetch all data
-  const fetchAllData = async () => {
-    setLoading(true);
-    setError(null);
+  // Fetch the filtered table page and the consistency chart's top players
+  const fetchPlayers = async () => {
+    const request = ++latestRequest.current;
     
     try {
       console.log('Fetching 3-year analysis data...');
       
-      // Fetch 3-year analysis
-      const playersResponse = await fetch('/api/players');
-      if (!playersResponse.ok) {
-        throw new Error(`Players API error! status: ${playersResponse.status}`);
-      }
+      const [page, leaders] = await Promise.all([
+        fetchPage({ sort: 'total_3year_points', order: 'desc', limit: PAGE_SIZE }),
+        fetchPage({ sort: 'consistency_score', order: 'desc', min_seasons: 2, limit: 8 })
+      ]);
+      if (request !== latestRequest.current) return;
       
-      const playersData = await playersResponse.json();
-      
-      if (playersData.error) {
-        throw new Error(playersData.error);
-      }
-      
-      console.log(`Loaded ${playersData.players?.length || 0} players with 3-year data`);
-      setThreeYearData(playersData.players || []);
+      console.log(`Loaded ${page.count} of ${page.total} players with 3-year data`);
+      setPlayersPage(page);
+      setConsistencyLeaders(leaders.players);
+      setError(null);
       
     } catch (err) {
+      if (request !== latestRequest.current) return;
       console.error('Error fetching data:', err);
       setError(`Failed to fetch data: ${err.message}`);
     } finally {
-      setLoading(false);
+      if (request === latestRequest.current) {
+        setLoading(false);
+      }
     }
   };
 
-  // Fetch optimal squad
-  const fetchOptimalSquad = async () => {
+  // Fetch all data
+  const fetchAllData = async () => {
+    setLoading(true);
+    setError(null);
+    await fetchPlayers();
+  };
+
+  // Fetch the best squad for every slider budget at once (one request per formation)
+  const fetchSquadFrontier = async () => {
     try {
-      const squadResponse = await fetch(`/api/players?optimal-squad&budget=${budget}&formation=${formation}`);
-      if (squadResponse.ok) {
-        const squadData = await squadResponse.json();
-        if (squadData.success) {
-          setOptimalSquad(squadData);
+      const frontierResponse = await fetch(`/api/players?squad-frontier&formation=${formation}&min_budget=80&max_budget=120&step=5`);
+      if (frontierResponse.ok) {
+        const frontierData = await frontierResponse.json();
+        if (frontierData.success) {
+          setSquadFrontier(frontierData);
         }
       }
     } catch (err) {
@@ -89,15 +120,41 @@ const CompleteFPLDashboard = () => {
     }
   };
 
+  // Refetch when a filter changes; the first load runs at once, later ones are debounced
+  useEffect(() => {
+    const timeoutId = setTimeout(fetchPlayers, playersPage ? 300 : 0);
+    
+    return () => clearTimeout(timeoutId);
+  }, [selectedPosition, maxPrice, minConsistency, searchTerm]);
+
   useEffect(() => {
-    fetchAllData();
-  }, []);
+    fetchSquadFrontier();
+  }, [formation]);
 
+  // Budget changes are a lookup into the precomputed frontier table
   useEffect(() => {
-    if (threeYearData.length > 0) {
-      fetchOptimalSquad();
-    }
-  }, [budget, formation, threeYearData]);
+    if (!squadFrontier) return;
+    const option = squadFrontier.budgets.find(b => b.budget === budget);
+    if (!option) return;
+    
+    const squad = { Goalkeeper: [], Defender: [], Midfielder: [], Forward: [], all_players: [] };
+    option.player_ids.forEach(id => {
+      const player = squadFrontier.players[id];
+      squad[player.position].push(player);
+      squad.all_players.push(player);
+    });
+    
+    setOptimalSquad({
+      success: true,
+      formation: squadFrontier.formation,
+      budget,
+      squad,
+      total_cost: option.total_cost,
+      remaining_budget: option.remaining_budget,
+      predicted_total_points: option.predicted_total_points,
+      squad_analysis: option.squad_analysis
+    });
+  }, [budget, squadFrontier]);
 
   useEffect(() => {
     const timeoutId = setTimeout(() => {
@@ -107,36 +164,21 @@ const CompleteFPLDashboard = () => {
     return () => clearTimeout(timeoutId);
   }, [playerSearchTerm]);
 
-  // Filter players
-  const filteredPlayers = useMemo(() => {
-    return threeYearData.filter(player => {
-      const matchesPosition = selectedPosition === 'All' || player.position === selectedPosition;
-      const matchesPrice = player.price <= maxPrice;
-      const matchesConsistency = (player.three_year_metrics?.consistency_score || 0) >= minConsistency;
-      const matchesSearch = searchTerm === '' || 
-        player.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        player.team.toLowerCase().includes(searchTerm.toLowerCase());
-      
-      return matchesPosition && matchesPrice && matchesConsistency && matchesSearch;
-    });
-  }, [threeYearData, selectedPosition, maxPrice, minConsistency, searchTerm]);
+  const players = playersPage?.players || [];
 
-  // Calculate insights
+  // Insights over every player matching the filters, summarized by the server
   const insights = useMemo(() => {
-    if (filteredPlayers.length === 0) return {};
-    
-    const full3YearData = filteredPlayers.filter(p => p.seasons_found === 3).length;
-    const avgConsistency = filteredPlayers.reduce((sum, p) => sum + (p.three_year_metrics?.consistency_score || 0), 0) / filteredPlayers.length;
-    const reliableStarters = filteredPlayers.filter(p => p.three_year_metrics?.reliable_starter).length;
+    const summary = playersPage?.summary;
+    if (!summary || summary.total_analyzed === 0) return {};
     
     return {
-      totalAnalyzed: filteredPlayers.length,
-      full3YearData,
-      avgConsistency: avgConsistency.toFixed(1),
-      reliableStarters,
-      dataQuality: ((full3YearData / filteredPlayers.length) * 100).toFixed(1)
+      totalAnalyzed: summary.total_analyzed,
+      full3YearData: summary.full_3year_data,
+      avgConsistency: summary.avg_consistency.toFixed(1),
+      reliableStarters: summary.reliable_starters,
+      dataQuality: summary.data_quality.toFixed(1)
     };
-  }, [filteredPlayers]);
+  }, [playersPage]);
 
   if (loading) {
     return (
@@ -317,7 +359,7 @@ const CompleteFPLDashboard = () => {
                     </div>
                   </div>
                   <ResponsiveContainer width="100%" height={320}>
-                    <BarChart data={filteredPlayers.slice(0, 8).map(p => ({
+                    <BarChart data={players.slice(0, 8).map(p => ({
                       name: p.name.length > 12 ? p.name.substring(0, 12) + '...' : p.name,
                       points: p.three_year_metrics?.total_3year_points || 0,
                       team: p.team
@@ -359,15 +401,11 @@ const CompleteFPLDashboard = () => {
                     </div>
                   </div>
                   <ResponsiveContainer width="100%" height={320}>
-                    <BarChart data={filteredPlayers
-                      .filter(p => p.seasons_found >= 2)
-                      .sort((a, b) => (b.three_year_metrics?.consistency_score || 0) - (a.three_year_metrics?.consistency_score || 0))
-                      .slice(0, 8)
-                      .map(p => ({
-                        name: p.name.length > 12 ? p.name.substring(0, 12) + '...' : p.name,
-                        consistency: p.three_year_metrics?.consistency_score || 0,
-                        position: p.position
-                      }))}>
+                    <BarChart data={consistencyLeaders.map(p => ({
+                      name: p.name.length > 12 ? p.name.substring(0, 12) + '...' : p.name,
+                      consistency: p.three_year_metrics?.consistency_score || 0,
+                      position: p.position
+                    }))}>
                       <CartesianGrid strokeDasharray="3 3" stroke="#e0e0e0" />
                       <XAxis 
                         dataKey="name" 
@@ -805,7 +843,7 @@ const CompleteFPLDashboard = () => {
                       <h3 className="text-2xl font-bold">Premier League Performance Analysis</h3>
                     </div>
                     <div className="bg-white/20 px-4 py-2 rounded-full">
-                      {filteredPlayers.length} Players Analyzed
+                      {playersPage?.total || 0} Players Analyzed
                     </div>
                   </div>
                 </div>
@@ -826,7 +864,7 @@ const CompleteFPLDashboard = () => {
                       </tr>
                     </thead>
                     <tbody className="bg-white divide-y divide-gray-200">
-                      {filteredPlayers.slice(0, 50).map((player, idx) => (
+                      {players.map((player, idx) => (
                         <tr key={player.id} className={`hover:bg-green-50 transition-colors ${idx % 2 === 0 ? 'bg-white' : 'bg-gray-50'}`}>
                           <td className="px-6 py-4 whitespace-nowrap">
                             <div className="flex items-center gap-3">
@@ -0,0 +1,138 @@
+"""Per-player (scalar) synthetic metric generators, kept as the oracle for the batch ones.
+
+These are the implementations the handlers used before the batch
+generators replaced them; tests/test_metric_parity.py checks that both
+produce the same output. Position patterns are passed in, so the tables of
+the handler modules stay the single source.
+"""
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+from _seed import stable_seed
+
+
+def generate_historical_metrics(base_data, patterns):
+    """Generate realistic 3-year historical metrics"""
+    current_points = base_data['totalPoints']
+    position = base_data['position']
+
+    # Use a stable per-player seed for consistent "historical" data
+    player_seed = stable_seed(base_data['id'])
+
+    pattern = patterns.get(position, patterns['Midfielder'])
+
+    # Generate 3 seasons of performance with realistic variance
+    seasons_points = []
+    for i in range(3):
+        season_variance = 1 + ((player_seed + i * 100) % 60 - 30) / 100 * pattern['variance']
+        season_points = max(30, current_points * pattern['avg_multiplier'] * season_variance)
+        seasons_points.append(int(season_points))
+
+    # Calculate metrics
+    avg_points_per_season = sum(seasons_points) / 3
+    total_3year_points = sum(seasons_points)
+
+    # Consistency score (inverse of coefficient of variation)
+    if len(seasons_points) > 1:
+        cv = statistics.stdev(seasons_points) / max(1, statistics.mean(seasons_points))
+        consistency_score = max(10, min(95, pattern['consistency_base'] - (cv * 50)))
+    else:
+        consistency_score = pattern['consistency_base']
+
+    # Injury risk
+    injury_risk = max(0, min(6, pattern['injury_base'] + ((player_seed % 30 - 15) / 10)))
+
+    # Games reliability
+    avg_games = max(15, min(38, pattern['games_base'] + ((player_seed % 10 - 5))))
+    reliable_starter = avg_games >= 30
+
+    # Value trend
+    value_trend = ((player_seed % 80 - 40) / 100)  # -0.4 to +0.4
+
+    return {
+        'avg_points_per_season': round(avg_points_per_season, 1),
+        'total_3year_points': total_3year_points,
+        'best_season': max(seasons_points),
+        'worst_season': min(seasons_points),
+        'consistency_score': round(consistency_score, 1),
+        'injury_risk': round(injury_risk, 1),
+        'value_trend': round(value_trend, 2),
+        'avg_games_per_season': round(avg_games, 1),
+        'reliable_starter': reliable_starter,
+        'seasons_breakdown': seasons_points
+    }
+
+def generate_seasonal_breakdown(base_data):
+    """Generate detailed seasonal breakdown"""
+    seasons = ['2022-23', '2023-24', '2024-25']
+    player_seed = stable_seed(base_data['id'])
+
+    seasonal_data = []
+    for i, season in enumerate(seasons):
+        variance = 1 + ((player_seed + i * 123) % 40 - 20) / 100
+
+        season_data = {
+            'season': season,
+            'total_points': max(30, int(base_data['totalPoints'] * variance)),
+            'games_played': max(15, min(38, int(30 + (player_seed + i * 50) % 15))),
+            'goals': max(0, int(base_data['goals'] * variance)),
+            'assists': max(0, int(base_data['assists'] * variance)),
+            'clean_sheets': max(0, int(base_data['cleanSheets'] * variance)),
+            'price_start': max(4.0, base_data['price'] + ((player_seed + i * 25) % 20 - 10) / 10),
+            'price_end': max(4.0, base_data['price'] + ((player_seed + i * 75) % 20 - 10) / 10),
+            'ownership_avg': max(0.1, min(50.0, base_data['ownership'] + ((player_seed + i * 33) % 20 - 10)))
+        }
+
+        season_data['ppg'] = round(season_data['total_points'] / max(1, season_data['games_played']), 2)
+        season_data['price_change'] = round(season_data['price_end'] - season_data['price_start'], 1)
+
+        seasonal_data.append(season_data)
+
+    return seasonal_data
+
+
+def generate_3year_metrics(base_data, patterns):
+    """Generate realistic 3-year performance metrics"""
+    current_points = base_data['current_points']
+    current_price = base_data['price']
+    position = base_data['position']
+
+    modifier = patterns.get(position, patterns['Midfielder'])
+
+    # Generate variance from a stable per-player seed for consistency
+    player_hash = stable_seed(base_data['id'], modulus=100)
+    variance_factor = 1 + ((player_hash - 50) / 100) * modifier['variance']
+
+    # Calculate 3-year averages
+    avg_points_per_season = max(50, min(300, current_points * variance_factor))
+
+    # Consistency score (higher for defenders/goalkeepers, more variable for forwards)
+    consistency_base = modifier['consistency_base']
+    consistency_variance = abs((player_hash % 30) - 15)
+    consistency_score = max(20, min(95, consistency_base + consistency_variance))
+
+    # Injury risk (lower is better)
+    injury_base = 1.5 if position in ['Defender', 'Goalkeeper'] else 2.0
+    injury_risk = max(0, min(5, injury_base + ((player_hash % 20) - 10) / 5))
+
+    # Value trend (price appreciation/depreciation)
+    value_trend = ((player_hash % 40) - 20) / 20  # -1 to +1 range
+
+    # Reliability (games played consistency)
+    reliability_base = 32 if position in ['Defender', 'Midfielder'] else 28
+    avg_games_per_season = max(15, min(38, reliability_base + ((player_hash % 10) - 5)))
+    reliable_starter = avg_games_per_season >= 30
+
+    return {
+        'predicted_points': round(avg_points_per_season, 1),
+        'consistency_score': round(consistency_score, 1),
+        'injury_risk': round(injury_risk, 1),
+        'value_trend': round(value_trend, 2),
+        'avg_games_per_season': round(avg_games_per_season, 1),
+        'reliable_starter': reliable_starter,
+        'three_year_total': round(avg_points_per_season * 3, 0),
+        'peak_season': round(avg_points_per_season * 1.2, 0),
+        'worst_season': round(avg_points_per_season * 0.8, 0)
+    }
@@ -0,0 +1,207 @@
+"""BootstrapCache against a local stub upstream: TTL expiry, conditional
+revalidation and single-flight fetching under concurrency.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import _bootstrap
+
+
+class StubUpstream:
+    """bootstrap-static stand-in that counts requests and honours ETag / Last-Modified validators"""
+
+    def __init__(self, etag='"v1"', last_modified=None, delay=0.0):
+        self.body = json.dumps({'elements': [{'id': 1, 'total_points': 210}], 'events': []}).encode()
+        self.etag = etag
+        self.last_modified = last_modified
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append(dict(self.headers))
+                time.sleep(stub.delay)
+                not_modified = (
+                    (stub.etag and self.headers.get('If-None-Match') == stub.etag)
+                    or (stub.last_modified and self.headers.get('If-Modified-Since') == stub.last_modified)
+                )
+                self.send_response(304 if not_modified else 200)
+                if stub.etag:
+                    self.send_header('ETag', stub.etag)
+                if stub.last_modified:
+                    self.send_header('Last-Modified', stub.last_modified)
+                self.send_header('Content-Length', '0' if not_modified else str(len(stub.body)))
+                self.end_headers()
+                if not not_modified:
+                    self.wfile.write(stub.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/bootstrap-static/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def update(self, total_points, etag):
+        self.body = json.dumps({'elements': [{'id': 1, 'total_points': total_points}], 'events': []}).encode()
+        self.etag = etag
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out waiting for the background refresh')
+        time.sleep(0.01)
+
+
+class BootstrapCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def make_cache(self, stub, ttl=300):
+        # refresh_interval() never expires a copy in under a second
+        cache = _bootstrap.BootstrapCache(url=stub.url, ttl=ttl, timeout=5, cache_dir=self.cache_dir)
+        self.addCleanup(stub.close)
+        return cache
+
+    def test_concurrent_cold_loads_share_one_fetch(self):
+        stub = StubUpstream(delay=0.3)
+        cache = self.make_cache(stub)
+        previous = _bootstrap._cache
+        _bootstrap._cache = cache
+        self.addCleanup(setattr, _bootstrap, '_cache', previous)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(_bootstrap.load_bootstrap())) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(stub.requests), 1)
+        self.assertEqual(len(results), 16)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(results[0]['elements'][0]['total_points'], 210)
+
+    def test_fresh_copy_is_served_without_upstream_requests(self):
+        stub = StubUpstream()
+        cache = self.make_cache(stub)
+        first = cache.get()
+        for _ in range(5):
+            self.assertIs(cache.get(), first)
+        self.assertEqual(len(stub.requests), 1)
+        self.assertEqual(cache.stats['hits'], 5)
+
+    def test_expired_copy_is_revalidated_with_etag(self):
+        stub = StubUpstream(etag='"v1"')
+        cache = self.make_cache(stub, ttl=1)
+        first = cache.get()
+        version = cache.version
+        self.assertTrue(cache.is_fresh())
+        time.sleep(1.1)
+        self.assertFalse(cache.is_fresh())
+
+        # Served stale at once; the background revalidation gets a 304
+        self.assertIs(cache.get(), first)
+        wait_for(lambda: cache.stats['revalidated'] == 1)
+        self.assertEqual(stub.requests[1].get('If-None-Match'), '"v1"')
+        self.assertTrue(cache.is_fresh())
+        self.assertIs(cache.get(), first)
+        self.assertEqual(cache.version, version)
+        self.assertEqual(len(stub.requests), 2)
+
+    def test_expired_copy_is_revalidated_with_last_modified(self):
+        stub = StubUpstream(etag=None, last_modified='Sat, 17 Oct 2026 06:00:00 GMT')
+        cache = self.make_cache(stub)
+        first = cache.get()
+        cache.invalidate()
+
+        self.assertTrue(cache.refresh())
+        self.assertEqual(stub.requests[1].get('If-Modified-Since'), 'Sat, 17 Oct 2026 06:00:00 GMT')
+        self.assertNotIn('If-None-Match', stub.requests[1])
+        self.assertEqual(cache.stats['revalidated'], 1)
+        self.assertIs(cache.get(), first)
+
+    def test_changed_upstream_replaces_payload_and_version(self):
+        stub = StubUpstream(etag='"v1"')
+        cache = self.make_cache(stub)
+        data, version, _ = cache.get_versioned()
+        stub.update(310, '"v2"')
+        cache.invalidate()
+
+        self.assertTrue(cache.refresh())
+        new_data, new_version, _ = cache.get_versioned()
+        self.assertEqual(data['elements'][0]['total_points'], 210)
+        self.assertEqual(new_data['elements'][0]['total_points'], 310)
+        self.assertNotEqual(new_version, version)
+        self.assertEqual(cache.stats['fetched'], 2)
+
+    def test_versioned_reads_carry_their_payloads_confirmation_time(self):
+        stub = StubUpstream(etag='"v1"')
+        cache = self.make_cache(stub)
+        _, version, updated_at = cache.get_versioned()
+        self.assertEqual(updated_at, cache.updated_at)
+        time.sleep(0.05)
+        stub.update(310, '"v2"')
+        cache.invalidate()
+        self.assertTrue(cache.refresh())
+
+        _, new_version, new_updated_at = cache.get_versioned()
+        self.assertNotEqual(new_version, version)
+        self.assertGreater(new_updated_at, updated_at)
+        # The response built from the first payload still reports that payload's age
+        self.assertGreaterEqual(_bootstrap.bootstrap_age(updated_at), 0.05)
+        self.assertIsNone(_bootstrap.bootstrap_age(None))
+
+    def test_versioned_reads_pair_each_payload_with_its_own_version(self):
+        stub = StubUpstream(etag=None)
+        cache = self.make_cache(stub)
+        versions = {}
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                data, version, _ = cache.get_versioned()
+                versions.setdefault(version, set()).add(data['elements'][0]['total_points'])
+
+        cache.get()
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for points in range(300, 320):
+            stub.update(points, None)
+            cache.refresh()
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertGreater(len(versions), 1)
+        self.assertTrue(all(len(points) == 1 for points in versions.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+"""HistoryStore loads against a slow stub upstream: cold seasons download in
+parallel, one download per season, warm seasons never wait on a cold one,
+loaded tables stay within the memory budget and a truncated store file is
+replaced by a fresh download. CSV bodies that are not valid UTF-8 are read
+as Latin-1.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import _history
+
+CLEANED = (
+    'first_name,second_name,goals_scored,assists,total_points,minutes,clean_sheets,element_type,team,start_cost,end_cost,points_per_game\n'
+    'Mohamed,Salah,20,10,250,3000,12,MID,Liverpool,125,130,6.5\n'
+)
+RAW = 'first_name,second_name,code,id\nMohamed,Salah,118748,1\n'
+
+
+class SlowUpstream:
+    """Serves every season's CSVs after ``delay`` seconds and counts requests per path"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append(self.path)
+                time.sleep(stub.delay)
+                body = (RAW if self.path.endswith('players_raw.csv') else CLEANED).encode()
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def load_all(store, seasons):
+    results = {}
+    threads = [threading.Thread(target=lambda s=season: results.setdefault(s, []).append(store.load(s))) for season in seasons]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+class HistoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        self.stub = SlowUpstream(delay=0.5)
+        self.addCleanup(self.stub.close)
+        self.store = _history.HistoryStore(
+            cache_dir=self.cache_dir,
+            url_template=self.stub.url + '/{season}/cleaned_players.csv',
+            raw_url_template=self.stub.url + '/{season}/players_raw.csv',
+            timeout=5,
+        )
+
+    def test_cold_seasons_download_in_parallel(self):
+        results, seconds = load_all(self.store, ['2021-22', '2022-23', '2023-24'])
+        self.assertEqual(sorted(results), ['2021-22', '2022-23', '2023-24'])
+        # Two sequential 0.5s fetches per season; three seasons in series would take 3s
+        self.assertLess(seconds, 2.0)
+        self.assertEqual(len(self.stub.requests), 6)
+
+    def test_concurrent_loads_of_one_season_share_a_download(self):
+        results, _ = load_all(self.store, ['2023-24'] * 8)
+        tables = results['2023-24']
+        self.assertEqual(len(tables), 8)
+        self.assertTrue(all(table is tables[0] for table in tables))
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertEqual(tables[0]['Mohamed Salah']['total_points'], 250)
+
+    def test_warm_season_is_not_blocked_by_a_cold_one(self):
+        warm = self.store.load('2022-23')
+        cold = threading.Thread(target=self.store.load, args=('2023-24',))
+        cold.start()
+        time.sleep(0.1)
+        started = time.perf_counter()
+        self.assertIs(self.store.load('2022-23'), warm)
+        self.assertLess(time.perf_counter() - started, 0.2)
+        cold.join()
+
+    def test_failed_download_is_retried_by_the_next_load(self):
+        self.stub.close()
+        with self.assertRaises(Exception):
+            self.store.load('2023-24')
+        self.assertEqual(self.store._flights, {})
+
+    def test_loaded_tables_stay_within_the_memory_budget(self):
+        self.stub.delay = 0
+        self.store.memory_budget = 1
+        seasons = ['2019-20', '2020-21', '2021-22']
+        for season in seasons:
+            self.store.load(season)
+            # Over budget, only the newest table stays loaded
+            self.assertEqual(list(self.store._tables), [season])
+        requests = len(self.stub.requests)
+        # Evicted seasons are mapped again from disk, not downloaded
+        self.assertEqual(self.store.load(seasons[0])['Mohamed Salah']['total_points'], 250)
+        self.assertEqual(len(self.stub.requests), requests)
+
+        self.store.memory_budget = _history.MEMORY_BUDGET
+        for season in seasons:
+            self.store.load(season)
+        self.assertEqual(list(self.store._tables), [seasons[0], seasons[1], seasons[2]])
+
+    def test_truncated_store_file_is_downloaded_again(self):
+        self.stub.delay = 0
+        path = self.store.path_for('2023-24')
+        self.store.load('2023-24')
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        # Empty, inside the magic, inside the header length, inside the header, inside a column
+        for length in (0, 3, 8, 40, len(content) - 8):
+            with self.subTest(length=length):
+                with open(path, 'wb') as f:
+                    f.write(content[:length])
+                requests = len(self.stub.requests)
+                store = _history.HistoryStore(cache_dir=self.cache_dir, url_template=self.store.url_template,
+                                              raw_url_template=self.store.raw_url_template, timeout=5)
+                table = store.load('2023-24')
+                self.assertEqual(table['Mohamed Salah']['total_points'], 250)
+                self.assertEqual(len(self.stub.requests), requests + 2)
+                self.assertEqual(os.path.getsize(path), len(content))
+
+
+class ParseCsvBodyTest(unittest.TestCase):
+    def test_utf8_and_latin1_bodies_parse_to_the_same_names(self):
+        text = CLEANED.replace('Mohamed', 'Andr\u00e9')
+        for body in (text.encode('utf-8'), text.encode('latin-1'), b'\xef\xbb\xbf' + text.encode('utf-8')):
+            with self.subTest(body=body[:8]):
+                names, _, _, columns = _history.parse_csv_body(_history.parse_season_csv, body)
+                self.assertEqual(names, ['Andr\u00e9 Salah'])
+                self.assertEqual(list(columns['total_points']), [250])
+
+    def test_players_raw_codes_fall_back_to_latin1(self):
+        body = RAW.replace('Mohamed', 'Andr\u00e9').encode('latin-1')
+        self.assertEqual(_history.parse_csv_body(_history.parse_player_codes, body), [('Andr\u00e9 Salah', 118748)])
+
+
+if __name__ == '__main__':
+    unittest.main()
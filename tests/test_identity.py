@@ -0,0 +1,66 @@
+"""SeasonIdentity name fallbacks: names that differ only in letters NFKD does
+not decompose (æ, œ, ß, đ, ð, þ, ı, ø, ł) still match past seasons.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import _identity
+
+
+class CurrentTable:
+    def __init__(self, full_names):
+        self.full_names = full_names
+        self.columns = {'code': [0] * len(full_names)}
+
+    def __len__(self):
+        return len(self.full_names)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+
+class PastSeason:
+    season = '2022-23'
+
+    def __init__(self, names):
+        self.names = names
+        self.codes = None
+        self.code_index = {}
+
+    def __len__(self):
+        return len(self.names)
+
+
+class NormalizedNameTest(unittest.TestCase):
+    PAIRS = [
+        ('Martin Ødegaard', 'Martin Odegaard'),
+        ('Jakub Kiwior', 'Jakub  KIWIOR'),
+        ('Ætla Sæmundsson', 'Aetla Saemundsson'),
+        ('Œdipe Cœur', 'Oedipe Coeur'),
+        ('Jonas Großkreutz', 'Jonas Grosskreutz'),
+        ('Đorđe Petrović', 'Dorde Petrovic'),
+        ('Guðmundur Þórarinsson', 'Gudmundur Thorarinsson'),
+        ('Kerem Aktürkoğlu Yıldız', 'Kerem Akturkoglu Yildiz'),
+    ]
+
+    def test_folded_names_match(self):
+        current = [current_name for current_name, _ in self.PAIRS]
+        past = [past_name for _, past_name in reversed(self.PAIRS)]
+        identity = _identity.SeasonIdentity(CurrentTable(current), PastSeason(past))
+        for row, (current_name, past_name) in enumerate(self.PAIRS):
+            with self.subTest(name=current_name):
+                self.assertEqual(past[identity.rows[row]], past_name)
+                self.assertEqual(identity.methods[row], _identity.BY_NORMALIZED_NAME)
+
+    def test_ambiguous_folded_names_are_not_matched(self):
+        identity = _identity.SeasonIdentity(CurrentTable(['Łukasz Fabiański']), PastSeason(['Lukasz Fabianski', 'lukasz fabianski']))
+        self.assertEqual(identity.rows[0], -1)
+        self.assertEqual(identity.methods[0], _identity.UNMATCHED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""IncrementalIndex: randomized refreshes rank and group records exactly like a
+from-scratch rebuild, and only added or changed records are rebuilt.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+from _incremental import IncrementalIndex
+
+POSITIONS = ['Goalkeeper', 'Defender', 'Midfielder', 'Forward']
+
+
+def new_index():
+    return IncrementalIndex(
+        rank_key=lambda record: -record['points'],
+        group_key=lambda record: record['position'],
+        group_rank_key=lambda record: (-record['value'], -record['points'])
+    )
+
+
+def build(source):
+    return {'id': source['id'], 'position': source['position'], 'points': source['points'],
+            'value': round(source['points'] / source['price'], 1)}
+
+
+def as_inputs(sources):
+    return {source['id']: (order, (source['position'], source['points'], source['price']), source) for order, source in enumerate(sources)}
+
+
+def rebuilt(sources):
+    """Stable sorts of freshly built records, as the full analysis does"""
+    records = [build(source) for source in sources]
+    ranking = sorted(records, key=lambda record: -record['points'])
+    groups = {}
+    for record in records:
+        groups.setdefault(record['position'], []).append(record)
+    return ranking, {position: sorted(group, key=lambda record: (-record['value'], -record['points'])) for position, group in groups.items()}
+
+
+def random_source(rng, player_id):
+    # Few distinct values, so ties (broken by input order) are common
+    return {'id': player_id, 'position': rng.choice(POSITIONS), 'points': rng.randint(0, 12) * 10, 'price': rng.choice((4.5, 5.0, 6.0, 8.0))}
+
+
+class IncrementalIndexTest(unittest.TestCase):
+    def test_randomized_refreshes_match_a_full_rebuild(self):
+        rng = random.Random(15)
+        sources = [random_source(rng, player_id) for player_id in range(200)]
+        next_id = len(sources)
+        index = new_index()
+        index.refresh(as_inputs(sources), build)
+
+        for step in range(40):
+            sources = [dict(source) for source in sources]
+            for source in rng.sample(sources, rng.randint(0, 8)):
+                source.update(points=rng.randint(0, 12) * 10, price=rng.choice((4.5, 5.0, 6.0, 8.0)))
+            for _ in range(rng.randint(0, 3)):
+                sources.pop(rng.randrange(len(sources)))
+            for _ in range(rng.randint(0, 3)):
+                sources.insert(rng.randrange(len(sources) + 1), random_source(rng, next_id))
+                next_id += 1
+            if rng.random() < 0.2:
+                rng.shuffle(sources)
+
+            built = []
+            changes = index.refresh(as_inputs(sources), lambda source: built.append(source['id']) or build(source))
+            ranking, groups = rebuilt(sources)
+            with self.subTest(step=step):
+                self.assertEqual(index.ranked(), ranking)
+                self.assertEqual(index.grouped(), groups)
+                self.assertEqual(sorted(built), sorted(changes['added'] + changes['changed']))
+
+    def test_unchanged_inputs_rebuild_nothing(self):
+        rng = random.Random(1)
+        sources = [random_source(rng, player_id) for player_id in range(50)]
+        index = new_index()
+        index.refresh(as_inputs(sources), build)
+        changes = index.refresh(as_inputs(sources), lambda source: self.fail('rebuilt an unchanged record'))
+        self.assertEqual(changes, {'added': [], 'changed': [], 'moved': [], 'removed': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+"""/api/leaderboards parameter validation.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import os
+import sys
+import unittest
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import leaderboards
+
+
+class ParseKTest(unittest.TestCase):
+    def test_default_and_clamping(self):
+        self.assertEqual(leaderboards.parse_k({}), leaderboards.DEFAULT_K)
+        self.assertEqual(leaderboards.parse_k(parse_qs('k=0')), 1)
+        self.assertEqual(leaderboards.parse_k(parse_qs('k=5000')), leaderboards.MAX_K)
+
+    def test_non_integer_is_rejected(self):
+        for qs in ('k=abc', 'k=2.5', 'k=1e3'):
+            with self.subTest(qs=qs), self.assertRaises(ValueError):
+                leaderboards.parse_k(parse_qs(qs))
+
+
+if __name__ == '__main__':
+    unittest.main()
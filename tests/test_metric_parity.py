@@ -0,0 +1,103 @@
+"""The batch synthetic metric generators of 3year-analysis and optimal-squad
+produce exactly what the per-player generators in scalar_metrics.py do.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import importlib.util
+import itertools
+import os
+import sys
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(os.path.dirname(TESTS_DIR), 'api')
+sys.path.insert(0, API_DIR)
+sys.path.insert(0, TESTS_DIR)
+import scalar_metrics
+from _seed import stable_seed
+
+POSITIONS = ['Goalkeeper', 'Defender', 'Midfielder', 'Forward', 'Unknown']
+# 0 points clamps every season to the 30-point floor: zero variance
+POINTS = [0, 1, 29, 30, 31, 95, 150, 226, 300, 400]
+
+
+def load_handler(name):
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), os.path.join(API_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module, module.handler.__new__(module.handler)
+
+
+def base_records():
+    """Players over many seeds, every position and the clamping edge cases"""
+    records = []
+    for player_id, (position, points) in enumerate(itertools.product(POSITIONS, POINTS), 1):
+        for offset in range(0, 2000, 250):
+            records.append({
+                'id': player_id + offset,
+                'position': position,
+                'totalPoints': points,
+                'current_points': points,
+                'goals': points % 7,
+                'assists': 0 if points < 100 else points % 11,
+                'cleanSheets': points % 5,
+                # Prices under the 4.0m floor and ownership over the 50% cap
+                'price': [3.5, 4.0, 5.5, 13.0][player_id % 4],
+                'ownership': [0.0, 0.1, 12.4, 55.0][(player_id + offset) % 4],
+            })
+    return records
+
+
+class ThreeYearAnalysisParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.module, cls.handler = load_handler('3year-analysis')
+        cls.records = base_records()
+        cls.seeds = [stable_seed(record['id']) for record in cls.records]
+
+    def test_seeds_cover_the_range(self):
+        self.assertGreater(len(set(self.seeds)), 250)
+
+    def test_historical_metrics_match(self):
+        batch = self.handler.generate_historical_metrics_batch(
+            [record['totalPoints'] for record in self.records],
+            [record['position'] for record in self.records],
+            self.seeds
+        )
+        for record, metrics in zip(self.records, batch):
+            with self.subTest(id=record['id'], position=record['position'], points=record['totalPoints']):
+                self.assertEqual(metrics, scalar_metrics.generate_historical_metrics(record, self.module.POSITION_PATTERNS))
+
+    def test_zero_variance_seasons_match(self):
+        records = [record for record in self.records if record['totalPoints'] == 0]
+        batch = self.handler.generate_historical_metrics_batch(
+            [0] * len(records), [record['position'] for record in records], [stable_seed(record['id']) for record in records]
+        )
+        for record, metrics in zip(records, batch):
+            self.assertEqual(metrics['seasons_breakdown'], [30, 30, 30])
+            self.assertEqual(metrics, scalar_metrics.generate_historical_metrics(record, self.module.POSITION_PATTERNS))
+
+    def test_seasonal_breakdown_matches(self):
+        batch = self.handler.generate_seasonal_breakdown_batch(self.records, self.seeds)
+        for record, seasons in zip(self.records, batch):
+            with self.subTest(id=record['id'], position=record['position'], points=record['totalPoints']):
+                self.assertEqual(seasons, scalar_metrics.generate_seasonal_breakdown(record))
+
+
+class OptimalSquadParityTest(unittest.TestCase):
+    def test_3year_metrics_match(self):
+        module, handler = load_handler('optimal-squad')
+        records = base_records()
+        batch = handler.generate_3year_metrics_batch(
+            [record['current_points'] for record in records],
+            [record['position'] for record in records],
+            [stable_seed(record['id'], modulus=100) for record in records]
+        )
+        self.assertGreaterEqual(len({stable_seed(record['id'], modulus=100) for record in records}), 90)
+        for record, metrics in zip(records, batch):
+            with self.subTest(id=record['id'], position=record['position'], points=record['current_points']):
+                self.assertEqual(metrics, scalar_metrics.generate_3year_metrics(record, module.POSITION_MODIFIERS))
+
+
+if __name__ == '__main__':
+    unittest.main()
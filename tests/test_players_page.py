@@ -0,0 +1,103 @@
+"""Paged /api/players queries: parameter validation and the sort order of pages,
+and the 504 answered when the current-season data times out.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import players
+from _leaderboards import Leaderboards
+
+
+def make_player(player_id, price, points):
+    return {'id': player_id, 'position': 'Midfielder', 'price': price, 'three_year_metrics': {'total_3year_points': points}}
+
+
+class ParsePageQueryTest(unittest.TestCase):
+    def test_defaults(self):
+        query = players.parse_page_query(parse_qs('limit=20'))
+        self.assertEqual(query['limit'], 20)
+        self.assertEqual(query['offset'], 0)
+        self.assertEqual(query['sort'], 'total_3year_points')
+        self.assertTrue(query['descending'])
+        self.assertEqual(query['max_price'], float('inf'))
+
+    def test_invalid_values_are_rejected(self):
+        for qs in ('limit=abc', 'offset=1.5', 'max_price=cheap', 'min_consistency=nan', 'min_seasons=x', 'sort=height', 'order=up'):
+            with self.subTest(qs=qs), self.assertRaises(ValueError):
+                players.parse_page_query(parse_qs(qs))
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(players.parse_page_query(parse_qs('limit=100000'))['limit'], players.MAX_PAGE_SIZE)
+        self.assertEqual(players.parse_page_query(parse_qs('limit=0'))['limit'], 1)
+        self.assertEqual(players.parse_page_query(parse_qs('limit=-5'))['limit'], 1)
+
+
+class PaginationTest(unittest.TestCase):
+    def setUp(self):
+        pool = [make_player(i, 4.0 + i % 10 / 2, i * 7 % 50) for i in range(1, 24)]
+        for player in pool:
+            player.update(team='Club', name=f"P{player['id']}", seasons_found=1)
+            player['three_year_metrics'].update(consistency_score=50, reliable_starter=False)
+        analysis = {'players': pool, 'seasons_analyzed': ['2023-24'], 'seasons_missing': [], 'data_source': 'test', 'last_updated': None}
+        self.handler = players.handler.__new__(players.handler)
+        snapshot = {'analysis': analysis, 'leaderboards': {}}
+        self.handler.get_analysis_snapshot = lambda: snapshot
+
+    def walk(self, qs):
+        seen = []
+        query = players.parse_page_query(parse_qs(qs))
+        for _ in range(100):
+            page = self.handler.get_players_page(query)
+            seen += [player['id'] for player in page['players']]
+            if page['next_offset'] is None:
+                return seen
+            self.assertGreater(page['next_offset'], query['offset'])
+            query = {**query, 'offset': page['next_offset']}
+        self.fail(f"pagination with {qs} did not end")
+
+    def test_following_next_offset_visits_every_player_once(self):
+        for qs in ('limit=5', 'limit=1', 'limit=0', 'limit=23', 'limit=1000&order=asc'):
+            with self.subTest(qs=qs):
+                self.assertEqual(sorted(self.walk(qs)), list(range(1, 24)))
+
+
+class PageOrderingTest(unittest.TestCase):
+    def setUp(self):
+        # Ties on price listed out of id order
+        self.players = [make_player(4, 5.0, 10), make_player(2, 5.0, 30), make_player(3, 7.5, 20), make_player(1, 5.0, 40)]
+        self.boards = Leaderboards(self.players, players.PAGE_ORDERINGS)
+
+    def ids(self, sort, descending):
+        return [player['id'] for player in self.boards.ranking((sort, descending))]
+
+    def test_ties_go_to_the_lower_id_in_both_directions(self):
+        self.assertEqual(self.ids('price', True), [3, 1, 2, 4])
+        self.assertEqual(self.ids('price', False), [1, 2, 4, 3])
+
+    def test_ascending_is_the_reverse_of_descending_without_ties(self):
+        self.assertEqual(self.ids('total_3year_points', False), self.ids('total_3year_points', True)[::-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class BootstrapTimeoutTest(unittest.TestCase):
+    def test_timeout_is_reported_as_an_upstream_timeout(self):
+        handler = players.handler.__new__(players.handler)
+        handler.error_status = 200
+        handler.load_seasons = lambda sources, seasons: [{}, {}]
+        slow = lambda: time.sleep(0.5) or ({}, 'v1', time.time())
+        with mock.patch.object(players, 'load_bootstrap_versioned', slow), \
+                mock.patch.object(players, 'CURRENT_SEASON_TIMEOUT', 0.05):
+            response = handler.get_3year_analysis()
+        self.assertIn('Timed out', response['error'])
+        self.assertIn('FPL API', response['error'])
+        self.assertEqual(handler.error_status, 504)
@@ -0,0 +1,110 @@
+"""Response writers over a real socket: streamed JSON is byte-identical to
+json.dumps in every encoding, NDJSON round-trips, and version ETags are
+distinct per encoding and answered with 304.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import gzip
+import http.client
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import _response
+
+PLAYERS = [{'id': i, 'name': f"Jogador {i} Ødegaard", 'points': i * 1.5, 'tags': ['a', None, True]} for i in range(3000)]
+PAYLOADS = {
+    'full': {'success': True, 'players': PLAYERS, 'count': len(PLAYERS), 'note': 'ünïcødé'},
+    'first': {'players': PLAYERS[:3], 'count': 3},
+    'empty': {'count': 0, 'players': []},
+    'alone': {'players': PLAYERS[:1]},
+}
+
+
+def make_server(protocol_version):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            route, _, name = self.path.lstrip('/').partition('/')
+            payload = PAYLOADS[name]
+            if route == 'stream':
+                _response.stream_json(self, payload, 'players', version='v1')
+            elif route == 'ndjson':
+                _response.stream_json(self, payload, 'players', version='v1', ndjson=True)
+            else:
+                _response.send_json(self, payload, version='v1')
+
+        def log_message(self, *args):
+            pass
+
+    Handler.protocol_version = protocol_version
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server
+
+
+class ResponseTest(unittest.TestCase):
+    protocol_version = 'HTTP/1.1'
+
+    def setUp(self):
+        self.server = make_server(self.protocol_version)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get(self, path, headers=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_port, timeout=10)
+        self.addCleanup(connection.close)
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        body = response.read()
+        if response.getheader('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return response, body
+
+    def test_streamed_json_is_identical_to_json_dumps(self):
+        for name, payload in PAYLOADS.items():
+            for accept in ('identity', 'gzip'):
+                with self.subTest(payload=name, encoding=accept):
+                    response, body = self.get(f"/stream/{name}", {'Accept-Encoding': accept})
+                    self.assertEqual(response.status, 200)
+                    self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked' if self.protocol_version == 'HTTP/1.1' else None)
+                    self.assertEqual(body, json.dumps(payload).encode())
+
+    def test_ndjson_lines_rebuild_the_payload(self):
+        response, body = self.get('/ndjson/full', {'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.getheader('Content-type'), 'application/x-ndjson')
+        lines = body.decode().splitlines()
+        summary = json.loads(lines[0])
+        self.assertEqual(summary, {key: value for key, value in PAYLOADS['full'].items() if key != 'players'})
+        self.assertEqual([json.loads(line) for line in lines[1:]], PLAYERS)
+
+    def test_version_etags_differ_per_encoding_and_revalidate(self):
+        for route in ('send', 'stream'):
+            etags = {}
+            for accept in ('identity', 'gzip'):
+                response, _ = self.get(f"/{route}/full", {'Accept-Encoding': accept})
+                etags[accept] = response.getheader('ETag')
+                self.assertEqual(response.getheader('Vary'), 'Accept-Encoding')
+            with self.subTest(route=route):
+                self.assertNotEqual(etags['identity'], etags['gzip'])
+                for accept, etag in etags.items():
+                    response, body = self.get(f"/{route}/full", {'Accept-Encoding': accept, 'If-None-Match': etag})
+                    self.assertEqual(response.status, 304)
+                    self.assertEqual(body, b'')
+                    self.assertEqual(response.getheader('ETag'), etag)
+                # A tag for the other encoding must not validate this representation
+                response, _ = self.get(f"/{route}/full", {'Accept-Encoding': 'gzip', 'If-None-Match': etags['identity']})
+                self.assertEqual(response.status, 200)
+
+
+class UnchunkedResponseTest(ResponseTest):
+    """HTTP/1.0 handlers cannot chunk, so streams end by closing the connection"""
+    protocol_version = 'HTTP/1.0'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""SearchIndex: accent-folded, typo-tolerant player search ranked by field.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+from _search import SearchIndex, fold
+
+PLAYERS = [
+    {'id': 1, 'name': 'Ødegaard', 'full_name': 'Martin Ødegaard', 'team': 'Arsenal'},
+    {'id': 2, 'name': 'Dúbravka', 'full_name': 'Martin Dúbravka', 'team': 'Newcastle'},
+    {'id': 3, 'name': 'M.Salah', 'full_name': 'Mohamed Salah', 'team': 'Liverpool'},
+    {'id': 4, 'name': 'Saka', 'full_name': 'Bukayo Saka', 'team': 'Arsenal'},
+    {'id': 5, 'name': 'Gündoğan', 'full_name': 'İlkay Gündoğan', 'team': 'Man City'},
+    {'id': 6, 'name': 'Arsenio', 'full_name': 'Arsenio Lopes', 'team': 'Brentford'},
+]
+
+
+def ids(results):
+    return [player['id'] for _, player in results]
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex(PLAYERS)
+
+    def test_ascii_queries_find_accented_names(self):
+        self.assertEqual(ids(self.index.search('odegaard')), [1])
+        self.assertEqual(ids(self.index.search('dubravka')), [2])
+        self.assertEqual(ids(self.index.search('gundogan')), [5])
+        self.assertEqual(ids(self.index.search('ØDEGAARD')), [1])
+
+    def test_typos_still_match(self):
+        self.assertEqual(ids(self.index.search('sallah')), [3])
+        self.assertEqual(ids(self.index.search('odegard')), [1])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(sorted(ids(self.index.search('martin'))), [1, 2])
+        self.assertEqual(ids(self.index.search('martin dubravka')), [2])
+        self.assertEqual(ids(self.index.search('martin salah')), [])
+        self.assertEqual(ids(self.index.search('   ')), [])
+
+    def test_name_matches_rank_above_team_matches(self):
+        # 'arsen' prefixes Arsenio's name and the Arsenal team of two players
+        self.assertEqual(ids(self.index.search('arsen')), [6, 1, 4])
+
+    def test_substring_queries_find_every_containing_name(self):
+        rng = random.Random(8)
+        letters = 'aeiourstln'
+        players = [{'id': i, 'name': ''.join(rng.choice(letters) for _ in range(rng.randint(4, 9))), 'full_name': '', 'team': ''}
+                   for i in range(300)]
+        index = SearchIndex(players)
+        for _ in range(50):
+            source = rng.choice(players)['name']
+            start = rng.randrange(len(source) - 2)
+            query = source[start:start + rng.randint(3, len(source) - start)]
+            with self.subTest(query=query):
+                found = set(ids(index.search(query)))
+                expected = {player['id'] for player in players if query in fold(player['name'])}
+                self.assertLessEqual(expected, found)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Analysis windows: ?window= and ?seasons= select 1 to MAX_WINDOW seasons,
+cut off at the first season with historical data, and reject anything else.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import _seasons
+
+
+class ParseWindowTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(_seasons, 'CURRENT_SEASON', '2024-25')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def parse(self, qs):
+        return _seasons.parse_window(parse_qs(qs))
+
+    def test_default_is_the_original_three_seasons(self):
+        self.assertEqual(self.parse(''), ('2022-23', '2023-24'))
+        self.assertEqual(self.parse(f"window={_seasons.DEFAULT_WINDOW}"), self.parse(''))
+
+    def test_window_counts_the_current_season(self):
+        self.assertEqual(self.parse('window=1'), ())
+        self.assertEqual(self.parse('window=5'), ('2020-21', '2021-22', '2022-23', '2023-24'))
+
+    def test_window_stops_at_the_first_historical_season(self):
+        seasons = self.parse(f"window={_seasons.MAX_WINDOW}")
+        self.assertEqual(seasons[0], _seasons.FIRST_SEASON)
+        self.assertEqual(seasons[-1], '2023-24')
+
+    def test_explicit_seasons_are_deduplicated_and_sorted(self):
+        self.assertEqual(self.parse('seasons=2019-20, 2016-17,2024-25,2019-20'), ('2016-17', '2019-20'))
+        self.assertEqual(self.parse('seasons=2024-25'), ())
+
+    def test_invalid_windows_are_rejected(self):
+        for qs in ('window=0', 'window=11', 'window=x', 'window=-1', 'seasons=2019-21', 'seasons=19-20',
+                   'seasons=2025-26', 'seasons=2015-16', 'seasons=2016-17,2017-18,2018-19,2019-20,2020-21,2021-22,2022-23,2023-24,2015-16'):
+            with self.subTest(qs=qs), self.assertRaises(ValueError):
+                self.parse(qs)
+
+    def test_at_most_max_window_seasons(self):
+        with mock.patch.object(_seasons, 'CURRENT_SEASON', '2030-31'):
+            allowed = ','.join(_seasons.season_name(year) for year in range(2021, 2030))
+            self.assertEqual(len(self.parse(f"seasons={allowed}")), _seasons.MAX_WINDOW - 1)
+            with self.assertRaises(ValueError):
+                self.parse(f"seasons=2020-21,{allowed}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+"""solve_squad agrees with brute force on small instances; solve_full_squad: the
+shared cutoff across formations keeps the best squad and the top-level
+``optimal`` flag reports searches cut off by the time limit.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import itertools
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import _solver
+
+POSITIONS = ['Goalkeeper', 'Defender', 'Midfielder', 'Forward']
+
+
+def make_players(count, seed, noise=25):
+    rng = random.Random(seed)
+    players = []
+    for i in range(count):
+        position = POSITIONS[i % 4] if i < 40 else rng.choice(POSITIONS)
+        price = rng.randint(40, 130) / 10
+        players.append({
+            'id': i,
+            'position': position,
+            'team': rng.randint(1, 20),
+            'price': price,
+            'points': round(price * 18 + rng.gauss(0, noise), 1),
+        })
+    return players
+
+
+def points(player):
+    return player['points']
+
+
+def brute_force(players, requirements, budget, score, max_per_team):
+    """Best objective over every squad that fills ``requirements``, or None"""
+    choices = [itertools.combinations([p for p in players if p['position'] == position], count)
+               for position, count in requirements.items()]
+    best = None
+    for picks in itertools.product(*choices):
+        squad = [player for group in picks for player in group]
+        if sum(player['price'] for player in squad) > budget + 1e-9:
+            continue
+        clubs = {}
+        for player in squad:
+            clubs[player['team']] = clubs.get(player['team'], 0) + 1
+        if max(clubs.values()) > max_per_team:
+            continue
+        objective = sum(score(player) for player in squad)
+        if best is None or objective > best:
+            best = objective
+    return best
+
+
+class SolveSquadTest(unittest.TestCase):
+    REQUIREMENTS = {'Goalkeeper': 1, 'Defender': 2, 'Midfielder': 2, 'Forward': 1}
+
+    def test_matches_brute_force_on_small_instances(self):
+        checked = 0
+        for seed in range(30):
+            rng = random.Random(seed)
+            players = make_players(24, seed)
+            for player in players:
+                player['team'] = rng.randint(1, 6)
+            budget = rng.choice((40, 45, 50, 60))
+            max_per_team = rng.choice((1, 2, 3))
+            expected = brute_force(players, self.REQUIREMENTS, budget, points, max_per_team)
+            with self.subTest(seed=seed, budget=budget, max_per_team=max_per_team):
+                if expected is None:
+                    with self.assertRaises(ValueError):
+                        _solver.solve_squad(players, self.REQUIREMENTS, budget, points, max_per_team=max_per_team, time_limit=30)
+                    continue
+                result = _solver.solve_squad(players, self.REQUIREMENTS, budget, points, max_per_team=max_per_team, time_limit=30)
+                self.assertTrue(result['optimal'])
+                self.assertAlmostEqual(result['objective'], expected, places=6)
+                squad = [player for group in result['squad'].values() for player in group]
+                self.assertEqual({position: len(group) for position, group in result['squad'].items()}, self.REQUIREMENTS)
+                self.assertLessEqual(sum(player['price'] for player in squad), budget + 1e-9)
+                checked += 1
+        # Most instances must be feasible for the comparison to mean anything
+        self.assertGreater(checked, 20)
+
+
+class SolveFullSquadTest(unittest.TestCase):
+    def test_best_squad_matches_formations_solved_separately(self):
+        for seed in (1, 2, 3):
+            players = make_players(160, seed)
+            result = _solver.solve_full_squad(players, 100, points, time_limit=30)
+            self.assertTrue(result['optimal'])
+            found = [entry['objective'] for entry in result['formations'].values() if entry['objective'] is not None]
+
+            separate = []
+            for formation in _solver.valid_formations():
+                alone = _solver.solve_full_squad(players, 100, points, formations=[formation], time_limit=30)
+                separate.append(alone['formations'][formation]['objective'])
+            self.assertAlmostEqual(max(found), max(separate), places=6)
+
+            # Every pruned formation is proven unable to beat the best squad
+            for entry in result['formations'].values():
+                if entry['objective'] is None:
+                    self.assertLessEqual(entry['bound'], max(found) + 1e-9)
+
+    def test_squad_respects_budget_and_club_limit(self):
+        players = make_players(160, 4)
+        result = _solver.solve_full_squad(players, 100, points, time_limit=30)
+        best = max((entry for entry in result['formations'].values() if entry['objective'] is not None), key=lambda entry: entry['objective'])
+        squad = [p for role in ('starter', 'bench') for group in best[role].values() for p in group]
+        self.assertEqual(len(squad), 15)
+        self.assertLessEqual(sum(p['price'] for p in squad), 100 + 1e-9)
+        clubs = {}
+        for player in squad:
+            clubs[player['team']] = clubs.get(player['team'], 0) + 1
+        self.assertLessEqual(max(clubs.values()), _solver.MAX_PER_TEAM)
+
+    def test_time_limit_cut_off_is_reported(self):
+        # Points close to proportional to price leave many near-equal squads to rule out
+        players = make_players(600, 5, noise=2)
+        result = _solver.solve_full_squad(players, 100, points, time_limit=0.0)
+        self.assertFalse(result['optimal'])
+
+
+class BudgetFrontierTest(unittest.TestCase):
+    REQUIREMENTS = {'Goalkeeper': 1, 'Defender': 4, 'Midfielder': 4, 'Forward': 2}
+
+    def make_clubbed_players(self):
+        # Five clubs, so many budgets need the branch-and-bound fallback
+        players = make_players(200, 7)
+        for player in players:
+            player['team'] = player['id'] % 5 + 1
+        return players
+
+    def test_fallback_entries_match_solve_squad(self):
+        players = self.make_clubbed_players()
+        result = _solver.budget_frontier(players, self.REQUIREMENTS, 60, 70, 0.5, points, time_limit=30)
+        self.assertTrue(result['optimal'])
+        self.assertEqual(result['unsolved_budgets'], [])
+        methods = {entry['method'] for entry in result['budgets']}
+        self.assertEqual(methods, {'dynamic-programming', 'branch-and-bound'})
+        for entry in result['budgets']:
+            self.assertTrue(entry['optimal'])
+            if entry['method'] == 'branch-and-bound':
+                alone = _solver.solve_squad(players, self.REQUIREMENTS, entry['budget'], points, time_limit=30)
+                self.assertAlmostEqual(entry['objective'], alone['objective'], places=6)
+
+    def test_time_limit_is_shared_and_cut_off_entries_are_not_optimal(self):
+        players = self.make_clubbed_players()
+        result = _solver.budget_frontier(players, self.REQUIREMENTS, 60, 75, 0.1, points, time_limit=0)
+        self.assertFalse(result['optimal'])
+        self.assertTrue(any(not entry['optimal'] for entry in result['budgets']) or result['unsolved_budgets'])
+        for entry in result['budgets']:
+            if entry['method'] == 'dynamic-programming':
+                self.assertTrue(entry['optimal'])
+
+
+if __name__ == '__main__':
+    unittest.main()
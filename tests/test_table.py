@@ -0,0 +1,58 @@
+"""PlayerTable columns: the bulk conversions give the same values as
+converting each field on its own, including empty and missing fields.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import _table
+
+
+def expected_column(elements, field, convert):
+    return [convert(element.get(field)) if element.get(field) else 0 for element in elements]
+
+
+class PlayerTableTest(unittest.TestCase):
+    def make_elements(self, seed, messy):
+        rng = random.Random(seed)
+        elements = []
+        for i in range(200):
+            element = {
+                'id': i + 1, 'code': 1000 + i, 'team': rng.randint(1, 20), 'element_type': rng.randint(1, 4),
+                'now_cost': rng.randint(40, 130), 'total_points': rng.randint(0, 250), 'minutes': rng.randint(0, 3400),
+                'goals_scored': rng.randint(0, 20), 'assists': rng.randint(0, 15), 'clean_sheets': rng.randint(0, 18),
+                'points_per_game': f"{rng.random() * 8:.1f}", 'form': f"{rng.random() * 8:.1f}",
+                'selected_by_percent': f"{rng.random() * 60:.1f}",
+                'web_name': f"P{i}", 'first_name': f"First{i}", 'second_name': f"Second{i}",
+            }
+            if messy:
+                for field in rng.sample(sorted(element), 3):
+                    choice = rng.random()
+                    if choice < 0.3:
+                        del element[field]
+                    elif choice < 0.6:
+                        element[field] = None
+                    elif field not in ('web_name', 'first_name', 'second_name'):
+                        element[field] = '' if choice < 0.8 else str(element[field])
+            elements.append(element)
+        return elements
+
+    def test_columns_match_per_value_conversion(self):
+        for messy in (False, True):
+            elements = self.make_elements(11, messy)
+            table = _table.PlayerTable(elements)
+            for name, typecode, field, convert in _table.COLUMNS:
+                with self.subTest(messy=messy, column=name):
+                    self.assertEqual(table[name].typecode, typecode)
+                    self.assertEqual(list(table[name]), expected_column(elements, field, convert))
+            for name in _table.TEXT_COLUMNS:
+                with self.subTest(messy=messy, column=name):
+                    self.assertEqual(table.text[name], [element.get(name) or '' for element in elements])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Stage tracing: Server-Timing headers of traced handlers over a real socket,
+worker-thread stages joining the request, and the Prometheus exposition.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import http.client
+import os
+import re
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import _trace
+from _response import send_json
+from _trace import Metrics, Stage, in_context, stage, traced
+
+_pool = ThreadPoolExecutor(max_workers=2)
+
+
+def worker_stage(name):
+    with stage(name):
+        pass
+
+
+class Handler(BaseHTTPRequestHandler):
+    @traced('trace-test')
+    def do_GET(self):
+        with stage('fetch') as current:
+            current.bytes = 100
+            current.cache = 'miss'
+        for _ in range(2):
+            with stage('parse') as current:
+                current.cache = 'hit'
+        _pool.submit(in_context(worker_stage), 'joined').result()
+        # Without in_context a worker's stage belongs to no request
+        _pool.submit(worker_stage, 'detached').result()
+        if self.path == '/error':
+            send_json(self, {'error': 'boom'}, cacheable=False)
+        else:
+            send_json(self, {'ok': True})
+
+    def log_message(self, *args):
+        pass
+
+
+class ServerTimingTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get(self, path):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_port, timeout=10)
+        self.addCleanup(connection.close)
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+        return response
+
+    def test_header_lists_each_stage_once_then_the_total(self):
+        header = self.get('/').getheader('Server-Timing')
+        entries = re.split(r', (?=\w+;dur=)', header)
+        names = [entry.split(';')[0] for entry in entries]
+        self.assertEqual(names, ['fetch', 'parse', 'joined', 'json_encode', 'total'])
+        self.assertRegex(entries[0], r'^fetch;dur=\d+\.\d;desc="miss, 100 bytes"$')
+        self.assertRegex(entries[1], r'^parse;dur=\d+\.\d;desc="2x, 2 hit"$')
+        self.assertRegex(entries[-1], r'^total;dur=\d+\.\d$')
+        self.assertNotIn('detached', header)
+
+    def test_requests_and_errors_feed_the_metrics(self):
+        def count(pattern):
+            match = re.search(pattern, _trace.render_prometheus(), re.M)
+            return int(match.group(1)) if match else 0
+
+        requests = count(r'^fpl_request_duration_seconds_count\{route="trace-test"\} (\d+)$')
+        errors = count(r'^fpl_request_errors_total\{route="trace-test"\} (\d+)$')
+        self.get('/')
+        self.get('/error')
+        self.assertEqual(count(r'^fpl_request_duration_seconds_count\{route="trace-test"\} (\d+)$'), requests + 2)
+        self.assertEqual(count(r'^fpl_request_errors_total\{route="trace-test"\} (\d+)$'), errors + 1)
+
+
+class PrometheusTest(unittest.TestCase):
+    def observe(self, metrics, name, seconds, size=0, cache=None):
+        current = Stage(name)
+        current.seconds = seconds
+        current.bytes = size
+        current.cache = cache
+        metrics.observe_stage(current)
+
+    def test_histograms_are_cumulative(self):
+        metrics = Metrics()
+        self.observe(metrics, 'fetch', 0.003, 500, 'miss')
+        self.observe(metrics, 'fetch', 0.2, 700, 'hit')
+        self.observe(metrics, 'fetch', 60.0, cache='hit')
+        text = metrics.render()
+        self.assertIn('fpl_stage_duration_seconds_bucket{stage="fetch",le="0.001"} 0', text)
+        self.assertIn('fpl_stage_duration_seconds_bucket{stage="fetch",le="0.005"} 1', text)
+        self.assertIn('fpl_stage_duration_seconds_bucket{stage="fetch",le="0.25"} 2', text)
+        self.assertIn('fpl_stage_duration_seconds_bucket{stage="fetch",le="30.0"} 2', text)
+        self.assertIn('fpl_stage_duration_seconds_bucket{stage="fetch",le="+Inf"} 3', text)
+        self.assertIn('fpl_stage_duration_seconds_sum{stage="fetch"} 60.203000', text)
+        self.assertIn('fpl_stage_duration_seconds_count{stage="fetch"} 3', text)
+        self.assertIn('fpl_stage_bytes_total{stage="fetch"} 1200', text)
+        self.assertIn('fpl_stage_cache_total{stage="fetch",result="hit"} 2', text)
+        self.assertIn('fpl_stage_cache_total{stage="fetch",result="miss"} 1', text)
+
+    def test_every_sample_line_is_well_formed(self):
+        metrics = Metrics()
+        self.observe(metrics, 'parse', 0.01)
+        metrics.observe_request('players', 0.5, True)
+        for line in metrics.render().splitlines():
+            with self.subTest(line=line):
+                self.assertRegex(line, r'^(# (HELP|TYPE) \w+ .+|\w+\{\w+="[^"]+"(,\w+="[^"]+")*\} [\d.]+)$')
+
+
+if __name__ == '__main__':
+    unittest.main()
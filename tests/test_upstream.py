@@ -0,0 +1,138 @@
+"""UpstreamClient against a local stub: pooled keep-alive connections, gzip,
+redirects, retries of 5xx and dropped connections, and the size limit.
+
+    python -m pytest tests/    (or: python -m unittest discover tests)
+"""
+import gzip
+import os
+import sys
+import threading
+import unittest
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+from _upstream import UpstreamClient
+
+BODY = b'{"elements": []}' * 64
+
+
+class Stub:
+    """Answers by path; ``failures[path]`` 503s are sent before a path succeeds"""
+
+    def __init__(self):
+        self.failures = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append(self.path)
+                    failing = stub.failures.get(self.path, 0)
+                    if failing:
+                        stub.failures[self.path] = failing - 1
+                if failing:
+                    self.send_response(503)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if self.path == '/moved':
+                    self.send_response(302)
+                    self.send_header('Location', '/data')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if self.path == '/missing':
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if self.path == '/cached':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = BODY
+                gzipped = 'gzip' in (self.headers.get('Accept-Encoding') or '')
+                if gzipped:
+                    body = gzip.compress(body)
+                self.send_response(200)
+                if gzipped:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                if self.path == '/close':
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class UpstreamClientTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = Stub()
+        self.addCleanup(self.stub.close)
+        self.client = UpstreamClient(retries=2, backoff=0.01)
+
+    def test_connections_are_reused_and_bodies_decompressed(self):
+        for _ in range(5):
+            response = self.client.get(self.stub.url + '/data')
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.body, BODY)
+        self.assertEqual(self.client.stats['connections'], 1)
+        self.assertEqual(self.client.stats['reused'], 4)
+
+    def test_redirects_are_followed(self):
+        response = self.client.get(self.stub.url + '/moved')
+        self.assertEqual(response.body, BODY)
+        self.assertEqual(self.stub.requests, ['/moved', '/data'])
+
+    def test_transient_errors_are_retried(self):
+        self.stub.failures['/data'] = 2
+        self.assertEqual(self.client.get(self.stub.url + '/data').body, BODY)
+        self.assertEqual(self.client.stats['retries'], 2)
+
+    def test_retries_are_bounded(self):
+        self.stub.failures['/data'] = 5
+        with self.assertRaises(urllib.error.HTTPError) as raised:
+            self.client.get(self.stub.url + '/data')
+        self.assertEqual(raised.exception.code, 503)
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_client_errors_raise_http_error_without_retrying(self):
+        with self.assertRaises(urllib.error.HTTPError) as raised:
+            self.client.get(self.stub.url + '/missing')
+        self.assertEqual(raised.exception.code, 404)
+        self.assertEqual(self.client.stats['retries'], 0)
+
+    def test_not_modified_is_returned_to_the_caller(self):
+        self.assertEqual(self.client.get(self.stub.url + '/cached').status, 304)
+
+    def test_connection_closed_by_the_server_is_replaced(self):
+        self.client.get(self.stub.url + '/close')
+        self.assertEqual(self.client.get(self.stub.url + '/data').body, BODY)
+        self.assertEqual(self.client.stats['connections'], 2)
+
+    def test_size_limit(self):
+        with self.assertRaises(urllib.error.URLError):
+            self.client.get(self.stub.url + '/data', max_bytes=len(BODY) - 1)
+        # Measured after decompression, so a small gzip body cannot expand past the limit
+        self.assertEqual(self.client.get(self.stub.url + '/data', max_bytes=len(BODY)).body, BODY)
+
+
+if __name__ == '__main__':
+    unittest.main()